@@ -19,6 +19,26 @@ class SettingsManager:
         self._default_settings = {
             "verbose_build": 1,  # 0: none, 1: -v, 2: -vv
             "toast_position": "TOP_RIGHT",
+            "doctor_cache_ttl": 6 * 60 * 60,  # seconds before cached doctor results are stale
+            "preflight_budget_ms": 500,  # total time budget for pre-flight checks
+            "build_execution_mode": "subprocess",  # "subprocess" or "worker"
+            "build_worker_max_builds": 10,  # recycle the build worker after N builds
+            "wheelhouse_enabled": False,  # prefetch dependency wheels into ~/.fletfactory/wheelhouse
+            "wheelhouse_index_url": "",  # empty uses pip's configured index
+            "wheelhouse_find_links": [],  # local directories or pages with wheels
+            "wheelhouse_offline": False,  # resolve from find links only, never the index
+            "index_proxy_enabled": False,  # serve pip in builds through a local caching index proxy
+            "index_proxy_upstream": "https://pypi.org/simple",
+            "web_precompress_enabled": False,  # write .gz/.br siblings after web builds
+            "web_asset_manifest_enabled": False,  # content-hashed asset manifest and precache service worker
+            "android_abi_fanout_enabled": False,  # split APKs: one parallel flet build per ABI
+            "android_abi_build_memory_mb": 3072,  # memory reserved per concurrent ABI build
+            "resource_policy_enabled": False,  # run builds with the resource policy of their platform
+            "resource_policies": {  # per platform cmd value, "default" for the others
+                "default": {"nice": 10, "io_class": "best-effort", "io_level": 7, "reserve_cpus": 1},
+                "apk": {"nice": 10, "io_class": "best-effort", "io_level": 7, "reserve_cpus": 1, "memory_mb": 6144},
+                "aab": {"nice": 10, "io_class": "best-effort", "io_level": 7, "reserve_cpus": 1, "memory_mb": 6144},
+            },
             # Add other default settings here
         }
         self._settings_file = self._get_settings_file_path()
@@ -0,0 +1,216 @@
+import asyncio
+import dataclasses
+import hashlib
+import os
+import shlex
+import shutil
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from utils.utils import app_data_dir
+from ui.components.form import FormState
+from core.preflight import project_dir, output_dir
+from core.project_scan import ExcludeMatcher
+from core.watcher import DEFAULT_WATCH_EXCLUDES
+
+OutputCallback = Callable[[str], None]
+RunBuild = Callable[[List[str], Optional[Dict[str, str]], OutputCallback], Awaitable[int]]
+
+# the ABIs a split APK build covers, named as flet build --arch takes them for Android
+FANOUT_ABIS = ["arm64-v8a", "armeabi-v7a", "x86_64"]
+DEFAULT_BUILD_MEMORY_MB = 3072  # a gradle daemon plus the flutter tool, per concurrent build
+ARTIFACT_EXTENSIONS = (".apk", ".aab")
+FANOUT_LOG = "build-fanout.log"
+
+
+def fanout_abis(form_state: FormState) -> List[str]:
+    """ABIs to build separately, empty when a single build covers the selection"""
+    if form_state.selected_platform is None or form_state.selected_platform.cmd_value != "apk":
+        return []
+    if not form_state.split_apk_per_abi or form_state.arch:
+        return []
+    return list(FANOUT_ABIS)
+
+
+def mem_available() -> Optional[int]:
+    """Bytes of memory available for new processes, None where it can't be read"""
+    try:
+        with open("/proc/meminfo", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    try:
+        # no /proc (macOS), assume half of the physical memory is free
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // 2
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def plan_concurrency(builds: int, memory_per_build: int) -> int:
+    available = mem_available()
+    if available is None:
+        return 1
+    return max(1, min(builds, available // max(1, memory_per_build)))
+
+
+@dataclass
+class MirrorStats:
+    linked: int = 0
+    unchanged: int = 0
+    removed: int = 0
+
+
+def mirror_tree(source: str, target: str, exclude: List[str]) -> MirrorStats:
+    """
+    Keep target a hardlinked mirror of source, leaving excluded paths (like target/build) alone
+
+    Files are copied instead where hardlinks aren't possible, e.g. across devices.
+    """
+    matcher = ExcludeMatcher(exclude)
+    stats = MirrorStats()
+    seen = set()
+    stack = [""]
+    while stack:
+        rel_dir = stack.pop()
+        prefix = f"{rel_dir}/" if rel_dir else ""
+        try:
+            with os.scandir(os.path.join(source, rel_dir)) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        for entry in entries:
+            rel_path = prefix + entry.name
+            if entry.is_dir(follow_symlinks=False):
+                if not matcher.path_excluded(rel_path, is_dir=True):
+                    stack.append(rel_path)
+                continue
+            if not entry.is_file(follow_symlinks=False) or matcher.path_excluded(rel_path):
+                continue
+            seen.add(rel_path)
+            destination = os.path.join(target, rel_path)
+            source_stat = entry.stat(follow_symlinks=False)
+            try:
+                target_stat = os.stat(destination)
+                if target_stat.st_ino == source_stat.st_ino or (
+                    target_stat.st_size == source_stat.st_size and target_stat.st_mtime_ns == source_stat.st_mtime_ns
+                ):
+                    stats.unchanged += 1
+                    continue
+            except FileNotFoundError:
+                pass
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            tmp = f"{destination}.fanout-tmp"
+            if os.path.lexists(tmp):
+                os.remove(tmp)
+            try:
+                os.link(entry.path, tmp)
+            except OSError:
+                shutil.copy2(entry.path, tmp)
+            os.replace(tmp, destination)
+            stats.linked += 1
+
+    for current, dirs, files in os.walk(target):
+        rel_dir = os.path.relpath(current, target).replace(os.sep, "/")
+        prefix = "" if rel_dir == "." else f"{rel_dir}/"
+        dirs[:] = [name for name in dirs if not matcher.path_excluded(prefix + name, is_dir=True)]
+        for name in files:
+            rel_path = prefix + name
+            if rel_path not in seen and not matcher.path_excluded(rel_path):
+                os.remove(os.path.join(current, name))
+                stats.removed += 1
+    return stats
+
+
+@dataclass
+class AbiBuildResult:
+    abi: str
+    returncode: int = -1
+    duration: float = 0.0
+    output_dir: str = ""
+    artifacts: List[str] = field(default_factory=list)  # paths, once merged into the main output directory
+    log: List[str] = field(default_factory=list)
+
+
+class AbiFanout:
+    """
+    Builds split APKs with one flet build per ABI, in parallel as far as memory allows
+
+    flet generates its flutter project under <project>/build, so every ABI builds from its
+    own hardlinked mirror of the project in ~/.fletfactory, which also keeps gradle's
+    incremental state between runs. Artifacts and logs are merged into the output directory.
+    """
+    def __init__(self, run_build: RunBuild, memory_per_build_mb: int = DEFAULT_BUILD_MEMORY_MB):
+        self.run_build = run_build
+        self.memory_per_build = memory_per_build_mb * 1024 * 1024
+
+    @staticmethod
+    def staging_dir(form_state: FormState, abi: str) -> str:
+        key = hashlib.sha1(str(project_dir(form_state)).encode("utf-8")).hexdigest()[:16]
+        return str(app_data_dir("abi_builds", key, abi))
+
+    def _command(self, form_state: FormState, abi: str, staging: str, abi_output: str) -> List[str]:
+        abi_state = dataclasses.replace(
+            form_state, python_app_path=staging, arch=abi, output_directory=abi_output, on_change=None
+        )
+        # the same round trip as the command field, values are shell quoted
+        return shlex.split(" ".join(abi_state.get_build_command()))
+
+    async def run(self, form_state: FormState, abis: List[str], env: Dict[str, str], on_output: OutputCallback) -> Tuple[int, List[AbiBuildResult]]:
+        main_output = str(output_dir(form_state))
+        concurrency = plan_concurrency(len(abis), self.memory_per_build)
+        workers = max(1, (os.cpu_count() or 1) // concurrency)
+        # not "Building ...", the resource monitor takes that for the start of the flutter build
+        on_output(f"Fan-out over {', '.join(abis)}: {concurrency} builds at a time, {workers} gradle workers each\n")
+        semaphore = asyncio.Semaphore(concurrency)
+        results = [AbiBuildResult(abi=abi, output_dir=os.path.join(main_output, abi)) for abi in abis]
+
+        async def build(result: AbiBuildResult):
+            async with semaphore:
+                staging = self.staging_dir(form_state, result.abi)
+                # build/ inside the mirror is the staged project's own flutter project, never touched
+                stats = await asyncio.to_thread(mirror_tree, str(project_dir(form_state)), staging, DEFAULT_WATCH_EXCLUDES)
+                on_output(f"[{result.abi}] staged project: {stats.linked} linked, {stats.unchanged} unchanged, {stats.removed} removed\n")
+                args = self._command(form_state, result.abi, staging, result.output_dir)
+                on_output(f"[{result.abi}] {' '.join(args)}\n")
+
+                def on_line(line: str):
+                    result.log.append(line)
+                    on_output(f"[{result.abi}] {line}")
+
+                abi_env = {**env, "GRADLE_OPTS": f"{env.get('GRADLE_OPTS', '')} -Dorg.gradle.workers.max={workers}".strip()}
+                start = time.perf_counter()
+                result.returncode = await self.run_build(args, abi_env, on_line)
+                result.duration = time.perf_counter() - start
+                on_output(f"[{result.abi}] finished with exit code {result.returncode} in {result.duration:.0f}s\n")
+
+        await asyncio.gather(*(build(result) for result in results))
+        await asyncio.to_thread(self._merge, main_output, results)
+        returncode = next((result.returncode for result in results if result.returncode != 0), 0)
+        return returncode, results
+
+    @staticmethod
+    def _merge(main_output: str, results: List[AbiBuildResult]):
+        """Move the per-ABI artifacts into the output directory and write the combined log"""
+        os.makedirs(main_output, exist_ok=True)
+        for result in results:
+            os.makedirs(result.output_dir, exist_ok=True)
+            with open(os.path.join(result.output_dir, "build.log"), "w", encoding="utf-8") as f:
+                f.writelines(result.log)
+            if result.returncode != 0:
+                continue
+            for name in os.listdir(result.output_dir):
+                if not name.endswith(ARTIFACT_EXTENSIONS):
+                    continue
+                stem, ext = os.path.splitext(name)
+                merged_name = name if result.abi in stem else f"{stem}-{result.abi}{ext}"
+                merged_path = os.path.join(main_output, merged_name)
+                os.replace(os.path.join(result.output_dir, name), merged_path)
+                result.artifacts.append(merged_path)
+
+        with open(os.path.join(main_output, FANOUT_LOG), "w", encoding="utf-8") as f:
+            for result in results:
+                f.write(f"===== {result.abi}: exit code {result.returncode}, {result.duration:.1f}s =====\n")
+                f.writelines(result.log)
+                f.write("\n")
@@ -0,0 +1,267 @@
+import mmap
+import os
+import re
+import struct
+import time
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional, Tuple
+from utils.utils import format_bytes
+
+ARTIFACT_EXTENSIONS = (".apk", ".aab", ".ipa")
+MAX_SEARCH_DEPTH = 2  # flet writes artifacts directly in the output directory, gradle one or two levels down
+MTIME_SLACK = 2.0  # seconds, covers coarse filesystem timestamps when comparing with the build's start
+TOP_N = 5
+
+# a category regresses when it grows by both of these
+REGRESSION_BYTES = 256 * 1024
+REGRESSION_RATIO = 0.05
+
+# zip records, APPNOTE.TXT 4.3
+_EOCD = struct.Struct("<4sHHHHIIH")
+_EOCD64_LOCATOR = struct.Struct("<4sIQI")
+_EOCD64 = struct.Struct("<4sQHHIIQQQQ")
+_CENTRAL = struct.Struct("<4sHHHHHHIIIHHHHHII")
+_EXTRA_HEADER = struct.Struct("<HH")
+EOCD_SIGNATURE = b"PK\x05\x06"
+EOCD64_LOCATOR_SIGNATURE = b"PK\x06\x07"
+CENTRAL_SIGNATURE = b"PK\x01\x02"
+ZIP64_EXTRA_ID = 0x0001
+UTF8_FLAG = 0x0800
+
+_ABI_DIR = re.compile(r"^(?:base/)?lib/([^/]+)/")
+
+
+@dataclass
+class ZipEntry:
+    name: str
+    compressed: int
+    size: int
+
+
+def read_central_directory(path: str) -> List[ZipEntry]:
+    """
+    List the entries of a zip by reading only its central directory
+
+    The file is memory-mapped, so only the pages holding the end of central directory
+    record and the directory itself are read, whatever the size of the archive.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < _EOCD.size:
+            raise ValueError(f"{path} is not a zip file")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            # the record sits at the very end, followed by a comment of up to 64 KB
+            eocd = m.rfind(EOCD_SIGNATURE, max(0, len(m) - _EOCD.size - 0xFFFF))
+            if eocd < 0:
+                raise ValueError(f"{path} is not a zip file")
+            _, _, _, _, count, _, cd_offset, _ = _EOCD.unpack_from(m, eocd)
+
+            locator = eocd - _EOCD64_LOCATOR.size
+            if (count == 0xFFFF or cd_offset == 0xFFFFFFFF) and locator >= 0 \
+                    and m[locator:locator + 4] == EOCD64_LOCATOR_SIGNATURE:
+                _, _, eocd64_offset, _ = _EOCD64_LOCATOR.unpack_from(m, locator)
+                count, _, cd_offset = _EOCD64.unpack_from(m, eocd64_offset)[7:10]
+
+            entries = []
+            offset = cd_offset
+            for _ in range(count):
+                fields = _CENTRAL.unpack_from(m, offset)
+                if fields[0] != CENTRAL_SIGNATURE:
+                    raise ValueError(f"{path}: corrupt central directory at offset {offset}")
+                flags, compressed, size = fields[3], fields[8], fields[9]
+                name_length, extra_length, comment_length = fields[10], fields[11], fields[12]
+                start = offset + _CENTRAL.size
+                name = m[start:start + name_length].decode("utf-8" if flags & UTF8_FLAG else "cp437")
+                if compressed == 0xFFFFFFFF or size == 0xFFFFFFFF:
+                    size, compressed = _zip64_sizes(m, start + name_length, extra_length, size, compressed)
+                entries.append(ZipEntry(name, compressed, size))
+                offset = start + name_length + extra_length + comment_length
+            return entries
+
+
+def _zip64_sizes(m: mmap.mmap, offset: int, length: int, size: int, compressed: int) -> Tuple[int, int]:
+    """Sizes that overflow 32 bits are stored, in this order, in the zip64 extra field"""
+    end = offset + length
+    while offset + _EXTRA_HEADER.size <= end:
+        header_id, data_size = _EXTRA_HEADER.unpack_from(m, offset)
+        offset += _EXTRA_HEADER.size
+        if header_id == ZIP64_EXTRA_ID:
+            position = offset
+            if size == 0xFFFFFFFF:
+                size = struct.unpack_from("<Q", m, position)[0]
+                position += 8
+            if compressed == 0xFFFFFFFF:
+                compressed = struct.unpack_from("<Q", m, position)[0]
+            break
+        offset += data_size
+    return size, compressed
+
+
+def classify(name: str) -> str:
+    """Size category of an APK/AAB/IPA entry"""
+    lower = name.lower()
+    abi_match = _ABI_DIR.match(name)
+    abi = f" ({abi_match.group(1)})" if abi_match else ""
+    if "sitepackages" in lower or "site-packages" in lower:
+        return f"Python packages{abi}"
+    if "python" in lower and (abi_match or ".framework/" in lower or "stdlib" in lower or lower.endswith(".zip")):
+        return f"Python runtime{abi}"
+    if "flutter_assets/app/" in lower:
+        return "App"
+    if "flutter_assets/" in lower:
+        return "Flutter assets"
+    if abi_match:
+        return f"Native libraries{abi}"
+    if ".framework/" in lower or lower.endswith((".dylib", ".so")):
+        return "Native libraries"
+    if lower.endswith(".dex"):
+        return "Dex code"
+    if lower.startswith(("meta-inf/", "bundle-metadata/")) or "_codesignature/" in lower:
+        return "Signing & metadata"
+    if lower.startswith(("res/", "base/res/")) or lower.endswith((".arsc", ".car", ".nib", ".storyboardc", ".pb")):
+        return "Resources"
+    return "Other"
+
+
+@dataclass
+class CategorySize:
+    files: int = 0
+    compressed: int = 0
+    size: int = 0
+
+
+@dataclass
+class ArtifactReport:
+    path: str
+    file_size: int
+    entries: int = 0
+    categories: Dict[str, CategorySize] = field(default_factory=dict)
+    largest: List[Tuple[str, int]] = field(default_factory=list)  # (entry, compressed bytes)
+    duration: float = 0.0
+
+    @property
+    def name(self) -> str:
+        return os.path.basename(self.path)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ArtifactReport":
+        return cls(
+            path=data["path"],
+            file_size=data["file_size"],
+            entries=data.get("entries", 0),
+            categories={name: CategorySize(**size) for name, size in data.get("categories", {}).items()},
+            largest=[tuple(item) for item in data.get("largest", [])],
+            duration=data.get("duration", 0.0),
+        )
+
+    def regressions(self, previous: "ArtifactReport") -> List[str]:
+        """Categories, and the artifact as a whole, that grew noticeably since the previous build"""
+        flagged = []
+        compared = [(name, item.compressed, previous.categories.get(name, CategorySize()).compressed)
+                    for name, item in self.categories.items()]
+        for name, current, before in [("Total", self.file_size, previous.file_size)] + compared:
+            growth = current - before
+            if growth > REGRESSION_BYTES and growth > before * REGRESSION_RATIO:
+                flagged.append(f"{name} +{format_bytes(growth)} ({format_bytes(before)} → {format_bytes(current)})")
+        return flagged
+
+    def summary(self, previous: Optional["ArtifactReport"] = None) -> str:
+        def delta(current: int, before: Optional[int]) -> str:
+            if before is None or current == before:
+                return ""
+            return f"  {'+' if current > before else '-'}{format_bytes(abs(current - before))}"
+
+        lines = [
+            f"{self.name}: {format_bytes(self.file_size)}, {self.entries} entries "
+            f"(read in {self.duration * 1000:.0f} ms)"
+            + delta(self.file_size, previous.file_size if previous else None)
+        ]
+        for name, item in sorted(self.categories.items(), key=lambda kv: kv[1].compressed, reverse=True):
+            before = previous.categories.get(name, CategorySize()).compressed if previous else None
+            lines.append(
+                f"  {name:<32} {format_bytes(item.compressed):>9}  ({format_bytes(item.size)} unpacked, "
+                f"{item.files} files){delta(item.compressed, before)}"
+            )
+        if self.largest:
+            lines.append("  Largest entries:")
+            lines.extend(f"    {format_bytes(size):>9}  {entry}" for entry, size in self.largest)
+        return "\n".join(lines)
+
+
+def analyze_artifact(path: str) -> ArtifactReport:
+    start = time.perf_counter()
+    entries = read_central_directory(path)
+    report = ArtifactReport(path=os.path.abspath(path), file_size=os.path.getsize(path), entries=len(entries))
+    for entry in entries:
+        if entry.name.endswith("/"):
+            continue
+        item = report.categories.setdefault(classify(entry.name), CategorySize())
+        item.files += 1
+        item.compressed += entry.compressed
+        item.size += entry.size
+    report.largest = [(entry.name, entry.compressed) for entry in sorted(entries, key=lambda e: e.compressed, reverse=True)[:TOP_N]]
+    report.duration = time.perf_counter() - start
+    return report
+
+
+def find_artifacts(output_dir: str, since: float = 0.0) -> List[str]:
+    """
+    APK/AAB/IPA files in a build output directory, newest first
+
+    With since (a time.time() value, usually the build's start), files older than it are
+    left out: leftovers of earlier builds, like a universal APK next to new split ones.
+    """
+    found = []
+    stack = [(output_dir, 0)]
+    while stack:
+        directory, depth = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.is_file() and entry.name.lower().endswith(ARTIFACT_EXTENSIONS):
+                        if entry.stat().st_mtime >= since - MTIME_SLACK:
+                            found.append(entry.path)
+                    elif entry.is_dir(follow_symlinks=False) and depth < MAX_SEARCH_DEPTH:
+                        stack.append((entry.path, depth + 1))
+        except OSError:
+            continue
+    return sorted(found, key=os.path.getmtime, reverse=True)
+
+
+def analyze_artifacts(output_dir: str, since: float = 0.0, paths: Optional[List[str]] = None) -> List[ArtifactReport]:
+    """Reports of the given artifacts, or of those find_artifacts finds in the output directory"""
+    reports = []
+    for path in paths if paths is not None else find_artifacts(output_dir, since):
+        try:
+            reports.append(analyze_artifact(path))
+        except (OSError, ValueError, struct.error) as e:
+            print(f"Error analyzing {path}: {e}")
+    return reports
+
+
+# MARK: Benchmark
+def _make_artifact(path: str, total_bytes: int = 200 * 1024 * 1024, files: int = 4000):
+    """An APK-shaped zip of random (incompressible) data"""
+    import zipfile
+    layout = ["lib/arm64-v8a/libflutter.so", "lib/arm64-v8a/libpython3.12.so", "lib/x86_64/libflutter.so",
+              "assets/flutter_assets/app/app.zip", "assets/flutter_assets/fonts/font.ttf", "classes.dex", "res/drawable/icon.png"]
+    chunk = os.urandom(total_bytes // files)
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as archive:
+        for i in range(files):
+            base, ext = os.path.splitext(layout[i % len(layout)])
+            archive.writestr(f"{base}{i}{ext}", chunk)
+
+
+if __name__ == "__main__":
+    # usage: python -m core.artifact_report [artifact], defaults to a generated 200 MB APK
+    import sys
+    import tempfile
+    if len(sys.argv) > 1:
+        print(analyze_artifact(sys.argv[1]).summary())
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            artifact = os.path.join(tmp, "app-release.apk")
+            _make_artifact(artifact)
+            print(analyze_artifact(artifact).summary())
@@ -0,0 +1,187 @@
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List
+from utils.utils import app_data_dir
+from core.merkle_index import MerkleIndex
+
+MANIFEST_NAME = "asset-manifest.json"
+SERVICE_WORKER_NAME = "fletfactory-sw.js"
+FLUTTER_SERVICE_WORKER = "flutter_service_worker.js"
+PRECACHE_PREFIX = "precache-manifest."
+REGISTER_MARKER = "<!-- fletfactory-sw -->"
+REVISION_LENGTH = 16
+
+# generated files and precompressed variants are never part of the manifest
+MANIFEST_EXCLUDES = [MANIFEST_NAME, SERVICE_WORKER_NAME, FLUTTER_SERVICE_WORKER, f"{PRECACHE_PREFIX}*.js", "*.gz", "*.br"]
+# fetched on every navigation, caching them would pin users to an old deployment
+NETWORK_FIRST = {"index.html", "version.json", "manifest.json"}
+
+SERVICE_WORKER_TEMPLATE = """// generated by Flet Factory, precaches build assets by content revision
+importScripts("{precache}");
+const CACHE = "fletfactory-precache";
+const ENTRIES = self.__precacheManifest;
+const keyOf = (entry) => new URL(entry.url, self.registration.scope).href + "?__rev=" + entry.revision;
+const byUrl = new Map(ENTRIES.map((entry) => [new URL(entry.url, self.registration.scope).href, keyOf(entry)]));
+
+self.addEventListener("install", (event) => {{
+  event.waitUntil((async () => {{
+    const cache = await caches.open(CACHE);
+    const cached = new Set((await cache.keys()).map((request) => request.url));
+    // unchanged assets keep their entries, only new revisions are fetched
+    await Promise.all(ENTRIES.filter((entry) => !cached.has(keyOf(entry))).map(async (entry) => {{
+      const response = await fetch(new Request(entry.url, {{ cache: "reload" }}));
+      if (response.ok) await cache.put(keyOf(entry), response);
+    }}));
+    await self.skipWaiting();
+  }})());
+}});
+
+self.addEventListener("activate", (event) => {{
+  event.waitUntil((async () => {{
+    const cache = await caches.open(CACHE);
+    const current = new Set(byUrl.values());
+    for (const request of await cache.keys()) {{
+      if (!current.has(request.url)) await cache.delete(request);
+    }}
+    await self.clients.claim();
+  }})());
+}});
+
+self.addEventListener("fetch", (event) => {{
+  if (event.request.method !== "GET") return;
+  const url = new URL(event.request.url);
+  const key = byUrl.get(url.origin + url.pathname);
+  if (!key) return;
+  event.respondWith(caches.open(CACHE).then(async (cache) => (await cache.match(key)) || fetch(event.request)));
+}});
+"""
+
+REGISTER_SNIPPET = (
+    f'{REGISTER_MARKER}<script>if ("serviceWorker" in navigator) {{ '
+    f'window.addEventListener("load", () => navigator.serviceWorker.register("{SERVICE_WORKER_NAME}")); }}</script>'
+)
+
+
+@dataclass
+class ManifestReport:
+    version: str
+    service_worker: str = SERVICE_WORKER_NAME
+    files: int = 0
+    precached: int = 0
+    changed: List[str] = field(default_factory=list)  # revisions that differ from the previous build
+    unchanged: int = 0
+    hashed: int = 0  # files whose content had to be read
+    duration: float = 0.0
+
+    def summary(self) -> str:
+        return (
+            f"Asset manifest {self.version}: {self.files} files, {len(self.changed)} changed, "
+            f"{self.unchanged} keep their cache entries ({self.hashed} hashed in {self.duration:.2f}s), "
+            f"precached by {self.service_worker}"
+        )
+
+
+def _state_file(root: str):
+    return app_data_dir("asset_manifest") / f"{hashlib.sha1(root.encode('utf-8')).hexdigest()}.json"
+
+
+def generate_manifest(root: str, register_service_worker: bool = True) -> ManifestReport:
+    """
+    Hash the web output and write a versioned asset manifest, precache list and service worker
+
+    Hashing reuses the Merkle index of the output, so only files whose stat changed are read,
+    in parallel. Revisions are compared with the previous build's manifest, which is kept in
+    ~/.fletfactory because clean builds wipe the output directory.
+
+    Only one service worker can control a scope. When flutter generated its own worker,
+    which its loader registers at the same scope, the precache worker replaces that file
+    instead of being registered next to it; the two would otherwise evict each other.
+    """
+    start = time.perf_counter()
+    root_dir = os.path.abspath(os.path.expanduser(root))
+    service_worker = FLUTTER_SERVICE_WORKER if os.path.isfile(os.path.join(root_dir, FLUTTER_SERVICE_WORKER)) else SERVICE_WORKER_NAME
+    if register_service_worker and service_worker == SERVICE_WORKER_NAME:
+        # before hashing, so the manifest records the index.html that is actually served
+        _register(os.path.join(root_dir, "index.html"))
+    index = MerkleIndex(root, exclude=MANIFEST_EXCLUDES)
+    diff = index.update()
+    version = index.root_hash[:REVISION_LENGTH]
+    report = ManifestReport(version=version, service_worker=service_worker, hashed=diff.hashed)
+
+    previous: Dict[str, dict] = {}
+    state_file = _state_file(index.root)
+    if state_file.exists():
+        try:
+            with open(state_file, "r", encoding="utf-8") as f:
+                previous = json.load(f).get("files", {})
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Error loading previous asset manifest: {e}")
+
+    files: Dict[str, dict] = {}
+    precache: List[dict] = []
+    for rel_path in sorted(index.files):
+        record = index.files[rel_path]
+        revision = record[3][:REVISION_LENGTH]
+        files[rel_path] = {"revision": revision, "size": record[1]}
+        if previous.get(rel_path, {}).get("revision") == revision:
+            report.unchanged += 1
+        else:
+            report.changed.append(rel_path)
+        if rel_path not in NETWORK_FIRST and os.path.basename(rel_path) not in NETWORK_FIRST:
+            precache.append({"url": rel_path, "revision": revision})
+    report.files = len(files)
+    report.precached = len(precache)
+
+    manifest = {"version": version, "generated": int(time.time()), "files": files}
+    _write(os.path.join(index.root, MANIFEST_NAME), json.dumps(manifest, indent=2))
+
+    # versioned name, so the service worker changes byte-wise and browsers install it
+    precache_name = f"{PRECACHE_PREFIX}{version}.js"
+    for name in os.listdir(index.root):
+        if name.startswith(PRECACHE_PREFIX) and name != precache_name:
+            os.remove(os.path.join(index.root, name))
+    _write(os.path.join(index.root, precache_name), f"self.__precacheManifest = {json.dumps(precache, indent=2)};\n")
+    _write(os.path.join(index.root, service_worker), SERVICE_WORKER_TEMPLATE.format(precache=precache_name))
+    if service_worker != SERVICE_WORKER_NAME and os.path.exists(os.path.join(index.root, SERVICE_WORKER_NAME)):
+        os.remove(os.path.join(index.root, SERVICE_WORKER_NAME))  # left by a build without flutter's worker
+
+    try:
+        with open(state_file, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+    except IOError as e:
+        print(f"Error saving asset manifest state: {e}")
+
+    report.duration = time.perf_counter() - start
+    return report
+
+
+def _write(path: str, content: str):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+
+def _register(index_html: str):
+    """Add the service worker registration to index.html once"""
+    try:
+        with open(index_html, "r", encoding="utf-8") as f:
+            html = f.read()
+    except OSError:
+        return
+    if REGISTER_MARKER in html:
+        return
+    if "</body>" in html:
+        html = html.replace("</body>", f"{REGISTER_SNIPPET}\n</body>", 1)
+    else:
+        html += f"\n{REGISTER_SNIPPET}\n"
+    _write(index_html, html)
+
+
+if __name__ == "__main__":
+    # usage: python -m core.asset_manifest <web build output>
+    import sys
+    print(generate_manifest(sys.argv[1] if len(sys.argv) > 1 else "build/web").summary())
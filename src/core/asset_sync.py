@@ -0,0 +1,181 @@
+import ctypes
+import ctypes.util
+import hashlib
+import json
+import os
+import shutil
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+from utils.utils import format_bytes
+
+MANIFEST_NAME = ".fletfactory-assets.json"
+
+FICLONE = 0x40049409  # linux/fs.h, reflink the whole file
+
+
+@dataclass
+class SyncReport:
+    copied: List[str] = field(default_factory=list)
+    linked: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+    bytes_copied: int = 0
+    bytes_linked: int = 0
+    bytes_skipped: int = 0
+
+    @property
+    def files(self) -> List[str]:
+        return self.copied + self.linked + self.skipped
+
+    @property
+    def changed(self) -> int:
+        return len(self.copied) + len(self.linked)
+
+    def merge(self, other: "SyncReport"):
+        self.copied += other.copied
+        self.linked += other.linked
+        self.skipped += other.skipped
+        self.bytes_copied += other.bytes_copied
+        self.bytes_linked += other.bytes_linked
+        self.bytes_skipped += other.bytes_skipped
+
+    def summary(self) -> str:
+        return (
+            f"{self.changed} updated ({format_bytes(self.bytes_copied)} copied, "
+            f"{format_bytes(self.bytes_linked)} linked), "
+            f"{len(self.skipped)} unchanged ({format_bytes(self.bytes_skipped)} skipped)"
+        )
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _reflink(source: Path, dest: Path) -> bool:
+    """Copy-on-write clone of source, if the filesystem supports it"""
+    if sys.platform.startswith("linux"):
+        import fcntl
+        try:
+            with open(source, "rb") as src, open(dest, "wb") as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            shutil.copystat(source, dest)
+            return True
+        except OSError:
+            dest.unlink(missing_ok=True)
+            return False
+    if sys.platform == "darwin":
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        if hasattr(libc, "clonefile"):
+            return libc.clonefile(os.fsencode(source), os.fsencode(dest), 0) == 0
+    return False
+
+
+def _place(source: Path, dest: Path, link_target: Optional[Path]) -> str:
+    """
+    Materialize source at dest, returning how: 'linked' or 'copied'
+
+    The user's source file is never hardlinked, so writing to an asset can't
+    modify it. Only destinations holding identical content share an inode.
+    """
+    dest.unlink(missing_ok=True)
+    if _reflink(source, dest):
+        return "linked"
+    if link_target is not None:
+        try:
+            os.link(link_target, dest)
+            return "linked"
+        except OSError:
+            pass
+    shutil.copy2(source, dest)
+    return "copied"
+
+
+class AssetManifest:
+    """Content hashes of synced assets, stored next to them"""
+    def __init__(self, directory: Path):
+        self.path = directory / MANIFEST_NAME
+        self.data: Dict[str, Dict[str, dict]] = {"sources": {}, "files": {}}
+        if self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.data.update(json.load(f))
+            except (json.JSONDecodeError, IOError) as e:
+                print(f"Error loading asset manifest: {e}")
+
+    def save(self):
+        try:
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, indent=2)
+        except IOError as e:
+            print(f"Error saving asset manifest: {e}")
+
+    @staticmethod
+    def _matches(entry: Optional[dict], stat: os.stat_result) -> bool:
+        return bool(entry) and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns
+
+    def hash_of(self, section: str, key: str, path: Path, stat: os.stat_result) -> str:
+        """Content hash of a file, reusing the recorded one while its stat is unchanged"""
+        entry = self.data[section].get(key)
+        if self._matches(entry, stat):
+            return entry["sha256"]
+        digest = file_sha256(path)
+        self.record(section, key, stat, digest)
+        return digest
+
+    def record(self, section: str, key: str, stat: os.stat_result, digest: str):
+        self.data[section][key] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest}
+
+    def wrote(self, key: str, path: Path) -> bool:
+        """Whether path is a file synced under key and left as it was written"""
+        try:
+            return self._matches(self.data["files"].get(key), path.stat())
+        except OSError:
+            return False
+
+    def forget(self, key: str):
+        self.data["files"].pop(key, None)
+
+
+def sync_asset(source: Path, destinations: List[Path], manifest_dir: Path) -> SyncReport:
+    """
+    Sync one source file to several destinations, skipping up to date ones
+
+    Destinations whose content hash already matches the source are left
+    untouched so their mtimes don't invalidate downstream build caches.
+    Changed destinations are reflinked from the source or hardlinked to an
+    up to date sibling when possible, and copied otherwise.
+    """
+    report = SyncReport()
+    manifest = AssetManifest(manifest_dir)
+    source_stat = source.stat()
+    source_hash = manifest.hash_of("sources", str(source.resolve()), source, source_stat)
+    link_target = None  # an up to date destination later ones can be hardlinked to
+
+    for dest in destinations:
+        key = dest.name
+        if dest.exists():
+            dest_stat = dest.stat()
+            # cheap size check first, only hash when the sizes agree
+            if dest_stat.st_size == source_stat.st_size and manifest.hash_of("files", key, dest, dest_stat) == source_hash:
+                report.skipped.append(str(dest))
+                report.bytes_skipped += source_stat.st_size
+                link_target = link_target or dest
+                continue
+
+        how = _place(source, dest, link_target)
+        link_target = link_target or dest
+        manifest.record("files", key, dest.stat(), source_hash)
+        if how == "linked":
+            report.linked.append(str(dest))
+            report.bytes_linked += source_stat.st_size
+        else:
+            report.copied.append(str(dest))
+            report.bytes_copied += source_stat.st_size
+
+    manifest.save()
+    return report
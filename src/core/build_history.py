@@ -0,0 +1,76 @@
+import json
+import time
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Dict, List, Optional
+from utils.utils import app_data_dir
+
+HISTORY_VERSION = 1
+MAX_RECORDS = 50  # kept per project and platform
+
+
+@dataclass
+class BuildRecord:
+    platform: str
+    returncode: int
+    timestamp: float = field(default_factory=time.time)
+    duration: float = 0.0
+    artifacts: List[dict] = field(default_factory=list)  # ArtifactReport.to_dict()
+    budget_status: str = ""  # passed, warned or failed when size budgets were checked
+    resources: dict = field(default_factory=dict)  # ResourceMonitor.to_dict(): peaks and per-phase totals
+
+    @property
+    def succeeded(self) -> bool:
+        # a build over its size budget failed even though flet exited cleanly
+        return self.returncode == 0 and self.budget_status != "failed"
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BuildRecord":
+        known = {name: data[name] for name in cls.__dataclass_fields__ if name in data}
+        return cls(**known)
+
+
+class BuildHistory:
+    """Past builds per project and platform, in ~/.fletfactory/build_history.json"""
+    def __init__(self, history_file: Optional[Path] = None):
+        self._history_file = history_file or app_data_dir() / "build_history.json"
+        self._entries: Dict[str, List[dict]] = self._load()
+
+    def _load(self) -> Dict[str, List[dict]]:
+        if not self._history_file.exists():
+            return {}
+        try:
+            with open(self._history_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data.get("builds", {}) if data.get("version") == HISTORY_VERSION else {}
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Error loading build history: {e}")
+            return {}
+
+    def _save(self):
+        try:
+            with open(self._history_file, "w", encoding="utf-8") as f:
+                json.dump({"version": HISTORY_VERSION, "builds": self._entries}, f)
+        except IOError as e:
+            print(f"Error saving build history: {e}")
+
+    @staticmethod
+    def _key(project: str, platform: str) -> str:
+        return f"{project}|{platform}"
+
+    def records(self, project: str, platform: str) -> List[BuildRecord]:
+        """Builds of a project for a platform, oldest first"""
+        return [BuildRecord.from_dict(entry) for entry in self._entries.get(self._key(project, platform), [])]
+
+    def last_successful(self, project: str, platform: str) -> Optional[BuildRecord]:
+        """Latest build that exited cleanly within its size budgets"""
+        for record in reversed(self.records(project, platform)):
+            if record.succeeded:
+                return record
+        return None
+
+    def add(self, project: str, record: BuildRecord):
+        entries = self._entries.setdefault(self._key(project, record.platform), [])
+        entries.append(asdict(record))
+        del entries[:-MAX_RECORDS]
+        self._save()
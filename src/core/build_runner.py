@@ -0,0 +1,92 @@
+import asyncio
+from typing import Callable, Dict, List, Optional
+from core.build_worker import BuildWorkerPool, DEFAULT_MAX_BUILDS
+from core.process_tree import session_kwargs, terminate_process_tree
+from core.resource_policy import ResourcePolicy, cgroup_scope_available
+
+OutputCallback = Callable[[str], None]
+StartCallback = Callable[[int], None]  # pid of the process running the build
+
+EXECUTION_MODES = ("subprocess", "worker")
+
+
+async def run_build_subprocess(
+    args: List[str],
+    env: Optional[Dict[str, str]],
+    on_output: OutputCallback,
+    on_start: Optional[StartCallback] = None,
+    policy: Optional[ResourcePolicy] = None,
+) -> int:
+    """Run a build command as a child process, streaming its output line by line"""
+    if policy is not None:
+        if policy.memory_mb:
+            # probes systemd-run once, off the event loop
+            await asyncio.to_thread(cgroup_scope_available)
+        args = policy.command(args)
+        env = policy.env(env)
+    process = await asyncio.create_subprocess_exec(
+        *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+        env=env,
+        # flutter, gradle and the policy wrappers run in the build's group and are stopped with it
+        **session_kwargs(),
+    )
+    if on_start:
+        on_start(process.pid)
+
+    try:
+        # Stream output to the callback
+        while True:
+            line_bytes = await process.stdout.readline()
+            if not line_bytes:
+                break
+            on_output(line_bytes.decode('utf-8', errors='replace'))
+
+        # Wait for process to complete
+        await process.wait()
+    except asyncio.CancelledError:
+        # a cancelled build must not keep running (and writing its output) in the background
+        await terminate_process_tree(process.pid, process.wait)
+        raise
+    return process.returncode
+
+
+class BuildRunner:
+    """Runs flet build commands, either as a subprocess or in a pre-warmed worker"""
+    def __init__(self, settings_manager):
+        self.settings_manager = settings_manager
+        self._pool: Optional[BuildWorkerPool] = None
+
+    @property
+    def mode(self) -> str:
+        mode = self.settings_manager.get("build_execution_mode", "subprocess")
+        return mode if mode in EXECUTION_MODES else "subprocess"
+
+    def _get_pool(self) -> BuildWorkerPool:
+        if self._pool is None:
+            self._pool = BuildWorkerPool(
+                slots=1,
+                max_builds=self.settings_manager.get("build_worker_max_builds", DEFAULT_MAX_BUILDS)
+            )
+        return self._pool
+
+    async def warm_up(self):
+        """Start the worker pool ahead of the first build when worker mode is enabled"""
+        if self.mode == "worker":
+            await self._get_pool().start()
+
+    async def run(
+        self,
+        args: List[str],
+        env: Optional[Dict[str, str]],
+        on_output: OutputCallback,
+        on_start: Optional[StartCallback] = None,
+        policy: Optional[ResourcePolicy] = None,
+    ) -> int:
+        """Run a build command and return its exit code"""
+        # a policy wraps the command in its tools, so restricted builds can't reuse the long lived worker
+        if self.mode == "worker" and args and args[0] == "flet" and (policy is None or policy.is_default):
+            # a cancelled build is killed and its worker replaced by the pool
+            return await self._get_pool().run(args, env, on_output, on_start)
+        return await run_build_subprocess(args, env, on_output, on_start, policy)
@@ -0,0 +1,311 @@
+import asyncio
+import multiprocessing
+import os
+import select
+import sys
+import threading
+import time
+import traceback
+from typing import Callable, Dict, List, Optional
+from core.process_tree import signal_process_tree, terminate_process_tree
+
+DEFAULT_MAX_BUILDS = 10  # recycle a worker after this many builds
+OUTPUT_POLL_INTERVAL = 0.1
+OUTPUT_DRAIN_SECONDS = 2.0  # how long output is still forwarded once the build returned
+
+OutputCallback = Callable[[str], None]
+
+
+class WorkerCrashed(Exception):
+    """The worker process died while running a build"""
+
+
+# MARK: Worker process
+def _forward_output(read_fd: int, conn, done: threading.Event, send_lock: threading.Lock, closed: threading.Event):
+    """
+    Forward everything written to the redirected stdout/stderr to the parent
+
+    Stops at EOF, or once done is set and the pipe is drained: children that outlive
+    the build, like the gradle daemon, keep the pipe's write end open and EOF never comes.
+    Nothing is sent once closed is set, the parent has been told the build exited by then.
+    """
+    drain_until = None
+    with os.fdopen(read_fd, "rb", buffering=0) as pipe:
+        while True:
+            # select doesn't take pipes on windows, reads there block until EOF
+            if os.name != "nt":
+                ready, _, _ = select.select([pipe], [], [], OUTPUT_POLL_INTERVAL)
+                if done.is_set() and drain_until is None:
+                    drain_until = time.monotonic() + OUTPUT_DRAIN_SECONDS
+                if drain_until is not None and (not ready or time.monotonic() > drain_until):
+                    break
+                if not ready:
+                    continue
+            chunk = pipe.read(65536)
+            if not chunk:
+                break
+            with send_lock:
+                if closed.is_set():
+                    break
+                conn.send(("output", chunk))
+
+
+def _run_job(conn, job: dict) -> int:
+    import flet_cli.cli
+
+    saved_environ = dict(os.environ)
+    saved_cwd = os.getcwd()
+    saved_argv = sys.argv
+    saved_fds = os.dup(1), os.dup(2)
+
+    os.environ.update(job.get("env") or {})
+    os.chdir(job.get("cwd") or saved_cwd)
+
+    # redirect at the fd level so output of flutter/gradle children is captured too
+    read_fd, write_fd = os.pipe()
+    build_done = threading.Event()
+    send_lock, closed = threading.Lock(), threading.Event()
+    forwarder = threading.Thread(target=_forward_output, args=(read_fd, conn, build_done, send_lock, closed), daemon=True)
+    forwarder.start()
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os.dup2(write_fd, 1)
+    os.dup2(write_fd, 2)
+    os.close(write_fd)
+
+    returncode = 0
+    try:
+        sys.argv = ["flet", *job["argv"][1:]]
+        flet_cli.cli.main()
+    except SystemExit as e:
+        returncode = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except BaseException:
+        traceback.print_exc()
+        returncode = 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2(saved_fds[0], 1)
+        os.dup2(saved_fds[1], 2)
+        for fd in saved_fds:
+            os.close(fd)
+        build_done.set()
+        forwarder.join(timeout=OUTPUT_DRAIN_SECONDS + 1)
+        with send_lock:
+            # a forwarder still blocked in a read (windows) must not send after the exit message
+            closed.set()
+        sys.argv = saved_argv
+        os.chdir(saved_cwd)
+        os.environ.clear()
+        os.environ.update(saved_environ)
+
+    return returncode
+
+
+def _worker_main(conn):
+    """Entry point of a pre-warmed build worker"""
+    if os.name != "nt":
+        # lead a group of its own so a cancelled build is killed along with flutter and gradle
+        os.setsid()
+    import flet_cli.cli  # noqa: F401 - pre-import before the first build arrives
+
+    conn.send(("ready", os.getpid()))
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        conn.send(("exit", _run_job(conn, job)))
+
+
+def _get_context():
+    """forkserver where available so workers fork from a process with flet_cli already imported"""
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(["flet_cli.cli"])
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+# MARK: Parent side
+class BuildWorker:
+    """A long-lived process that runs `flet build` in-process"""
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.builds = 0
+        self.crashed = False
+        self._ready = False
+
+    @property
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    async def _recv(self):
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(None, self.conn.recv)
+        except (EOFError, OSError) as e:
+            self.crashed = True
+            self.process.join(timeout=1)
+            raise WorkerCrashed(f"build worker exited with code {self.process.exitcode}") from e
+
+    async def wait_ready(self):
+        """Wait until the worker finished importing flet_cli"""
+        while not self._ready:
+            kind, _ = await self._recv()
+            self._ready = kind == "ready"
+
+    async def run(self, argv: List[str], env: Optional[Dict[str, str]], on_output: OutputCallback, on_start: Optional[Callable[[int], None]] = None) -> int:
+        await self.wait_ready()
+        try:
+            self.conn.send({"argv": argv, "env": env, "cwd": os.getcwd()})
+        except OSError as e:
+            self.crashed = True
+            raise WorkerCrashed("build worker is not running") from e
+        self.builds += 1
+        if on_start:
+            # the build runs inside the worker, its tools are the worker's children
+            on_start(self.process.pid)
+
+        buffer = b""
+        while True:
+            kind, payload = await self._recv()
+            if kind == "output":
+                buffer += payload
+                *lines, buffer = buffer.split(b"\n")
+                for line in lines:
+                    on_output(line.decode("utf-8", errors="replace") + "\n")
+            elif kind == "exit":
+                if buffer:
+                    on_output(buffer.decode("utf-8", errors="replace"))
+                return payload
+
+    async def terminate(self):
+        """Stop the worker in the middle of a build, with every process the build started"""
+        await terminate_process_tree(self.process.pid, lambda: asyncio.to_thread(self.process.join))
+
+    def stop(self):
+        """Terminate the worker"""
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+        self.conn.close()
+
+
+class BuildWorkerPool:
+    """Pool of pre-warmed build workers, one per build slot"""
+    def __init__(self, slots: int = 1, max_builds: int = DEFAULT_MAX_BUILDS):
+        self.slots = slots
+        self.max_builds = max_builds
+        self._context = None
+        self._idle: Optional[asyncio.Queue] = None
+        self._busy = set()
+        self._workers = []
+
+    async def start(self):
+        """Spawn the workers ahead of the first build"""
+        if self._idle is not None:
+            return
+        self._context = _get_context()
+        self._idle = asyncio.Queue()
+        for _ in range(self.slots):
+            self._idle.put_nowait(await self._spawn_worker())
+
+    async def _spawn_worker(self) -> BuildWorker:
+        # starting a process blocks, with forkserver until the server is up and has imported flet_cli
+        worker = await asyncio.to_thread(BuildWorker, self._context)
+        self._workers = [w for w in self._workers if w.alive] + [worker]
+        return worker
+
+    async def wait_ready(self):
+        """Wait until every idle worker finished pre-importing flet_cli"""
+        await self.start()
+        for worker in list(self._workers):
+            if worker not in self._busy:
+                await worker.wait_ready()
+
+    async def run(self, argv: List[str], env: Optional[Dict[str, str]], on_output: OutputCallback, on_start: Optional[Callable[[int], None]] = None) -> int:
+        await self.start()
+        worker = await self._idle.get()
+        self._busy.add(worker)
+        try:
+            return await worker.run(argv, env, on_output, on_start)
+        except WorkerCrashed as e:
+            on_output(f"\n{e}\n")
+            return -1
+        except asyncio.CancelledError:
+            # kill the build with its worker: a worker that is still building can't take the next
+            # job, and its pending recv would swallow that job's messages
+            worker.crashed = True
+            await worker.terminate()
+            raise
+        finally:
+            self._busy.discard(worker)
+            # crashed or worn out workers are replaced by a fresh pre-warmed one
+            if worker.crashed or not worker.alive or worker.builds >= self.max_builds:
+                worker.stop()
+                worker = await self._spawn_worker()
+            self._idle.put_nowait(worker)
+
+    def cancel_all(self):
+        """Kill workers with an in-flight build, they are replaced when their run returns"""
+        for worker in list(self._busy):
+            signal_process_tree(worker.process.pid, force=True)
+
+    def shutdown(self):
+        if self._idle is None:
+            return
+        while not self._idle.empty():
+            self._idle.get_nowait().stop()
+        self.cancel_all()
+
+
+# MARK: Benchmark
+async def measure_spawn_to_first_output(argv: List[str], runs: int = 5) -> Dict[str, float]:
+    """Average seconds from launching `argv` to its first output, for both execution paths"""
+    from core.build_runner import run_build_subprocess
+
+    async def timed(run) -> float:
+        start = time.perf_counter()
+        first = []
+
+        def on_output(line):
+            if not first:
+                first.append(time.perf_counter() - start)
+
+        await run(on_output)
+        return first[0] if first else time.perf_counter() - start
+
+    pool = BuildWorkerPool(slots=1, max_builds=runs + 1)
+    await pool.wait_ready()
+
+    subprocess_times = [
+        await timed(lambda cb: run_build_subprocess(argv, dict(os.environ), cb))
+        for _ in range(runs)
+    ]
+    worker_times = [
+        await timed(lambda cb: pool.run(argv, None, cb))
+        for _ in range(runs)
+    ]
+    pool.shutdown()
+    return {
+        "subprocess": sum(subprocess_times) / runs,
+        "worker": sum(worker_times) / runs,
+    }
+
+
+if __name__ == "__main__":
+    # usage: python -m core.build_worker [flet args...], e.g. python -m core.build_worker flet --version
+    argv = sys.argv[1:] or ["flet", "--version"]
+    results = asyncio.run(measure_spawn_to_first_output(argv))
+    for mode, seconds in results.items():
+        print(f"{mode}: {seconds * 1000:.1f} ms to first output")
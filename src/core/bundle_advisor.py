@@ -0,0 +1,215 @@
+import heapq
+import json
+import os
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import List, Optional
+from utils.utils import app_data_dir, format_bytes
+from core.project_scan import get_scanner
+
+ADVISOR_VERSION = 2  # bump to invalidate cached reports when the rules change
+TOP_N = 10
+MAX_CACHED_REPORTS = 64
+
+# (exclude pattern, why it doesn't belong in the app package)
+JUNK_RULES = [
+    ("__pycache__/", "Python bytecode cache"),
+    (".pytest_cache/", "Test runner cache"),
+    (".mypy_cache/", "Type checker cache"),
+    (".ruff_cache/", "Linter cache"),
+    (".git/", "Git repository"),
+    (".hg/", "Mercurial repository"),
+    (".svn/", "Subversion repository"),
+    (".venv/", "Virtual environment"),
+    ("venv/", "Virtual environment"),
+    ("node_modules/", "Node.js dependencies"),
+    ("tests/", "Test suite"),
+    ("test/", "Test suite"),
+    (".ipynb_checkpoints/", "Notebook checkpoints"),
+    ("*.ipynb", "Jupyter notebook"),
+    ("*.log", "Log file"),
+    (".DS_Store", "Finder metadata"),
+]
+
+# heavy data files that are often left over from development, but that the app may read at runtime
+DATA_RULES = [
+    ("*.csv", "Dataset"),
+    ("*.tsv", "Dataset"),
+    ("*.parquet", "Dataset"),
+    ("*.feather", "Dataset"),
+    ("*.h5", "Dataset"),
+    ("*.hdf5", "Dataset"),
+    ("*.npy", "Dataset"),
+    ("*.npz", "Dataset"),
+    ("*.pkl", "Pickled data"),
+]
+
+
+@dataclass
+class HeavyItem:
+    path: str  # relative to the analyzed directory
+    bytes: int
+    files: int = 1
+
+
+@dataclass
+class Suggestion:
+    pattern: str
+    reason: str
+    files: int
+    bytes: int  # estimated bytes saved by excluding the pattern on its own
+    data: bool = False  # data the app might need, see DATA_RULES
+
+    @property
+    def label(self) -> str:
+        return f"{self.pattern} ({format_bytes(self.bytes)}{', data' if self.data else ''})"
+
+    @property
+    def description(self) -> str:
+        if self.data:
+            return f"{self.reason}, {self.files} files - only exclude it if the app doesn't load it"
+        return f"{self.reason}, {self.files} files"
+
+
+@dataclass
+class BundleReport:
+    tree_hash: str
+    total_files: int = 0
+    total_bytes: int = 0
+    largest_files: List[HeavyItem] = field(default_factory=list)
+    largest_dirs: List[HeavyItem] = field(default_factory=list)
+    suggestions: List[Suggestion] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BundleReport":
+        return cls(
+            tree_hash=data["tree_hash"],
+            total_files=data["total_files"],
+            total_bytes=data["total_bytes"],
+            largest_files=[HeavyItem(**item) for item in data["largest_files"]],
+            largest_dirs=[HeavyItem(**item) for item in data["largest_dirs"]],
+            suggestions=[Suggestion(**item) for item in data["suggestions"]],
+        )
+
+    def suggestions_for(self, existing: List[str]) -> List[Suggestion]:
+        """Suggestions not already covered by the current exclude patterns"""
+        current = {pattern.strip().strip("/") for pattern in existing}
+        return [s for s in self.suggestions if s.pattern.strip("/") not in current]
+
+
+class BundleAdvisor:
+    """Ranks what makes an app directory heavy, cached per tree hash in ~/.fletfactory/advisor"""
+    def __init__(self, cache_dir: Optional[Path] = None):
+        self.cache_dir = cache_dir or app_data_dir("advisor")
+        self._last: Optional[BundleReport] = None  # the latest report, reused without touching the disk cache
+
+    def analyze(self, root: str) -> BundleReport:
+        scanner = get_scanner(root)
+        tree_hash = scanner.tree_hash()
+        if self._last is not None and self._last.tree_hash == tree_hash:
+            return self._last
+        self._last = self._load_or_build(scanner, tree_hash)
+        return self._last
+
+    def _load_or_build(self, scanner, tree_hash: str) -> BundleReport:
+        cache_file = self.cache_dir / f"v{ADVISOR_VERSION}-{tree_hash}.json"
+
+        if cache_file.exists():
+            try:
+                with open(cache_file, "r", encoding="utf-8") as f:
+                    report = BundleReport.from_dict(json.load(f))
+                os.utime(cache_file)  # mtime doubles as the LRU timestamp
+                return report
+            except (json.JSONDecodeError, IOError, KeyError, TypeError) as e:
+                print(f"Error loading bundle report: {e}")
+
+        report = self._build_report(scanner, tree_hash)
+        try:
+            with open(cache_file, "w", encoding="utf-8") as f:
+                json.dump(asdict(report), f, indent=2)
+            self._evict()
+        except IOError as e:
+            print(f"Error saving bundle report: {e}")
+        return report
+
+    @staticmethod
+    def _build_report(scanner, tree_hash: str) -> BundleReport:
+        dirs = scanner.scan()
+        root_entry = dirs.get("")
+        report = BundleReport(
+            tree_hash=tree_hash,
+            total_files=root_entry.tree_files if root_entry else 0,
+            total_bytes=root_entry.tree_bytes if root_entry else 0,
+        )
+
+        def all_files():
+            for rel_path, entry in dirs.items():
+                prefix = f"{rel_path}/" if rel_path else ""
+                for name, size in entry.files.items():
+                    yield size, prefix + name
+
+        report.largest_files = [
+            HeavyItem(path=path, bytes=size)
+            for size, path in heapq.nlargest(TOP_N, all_files())
+        ]
+        report.largest_dirs = [
+            HeavyItem(path=rel_path, bytes=entry.tree_bytes, files=entry.tree_files)
+            for rel_path, entry in heapq.nlargest(
+                TOP_N, ((p, e) for p, e in dirs.items() if p), key=lambda item: item[1].tree_bytes
+            )
+        ]
+
+        rules = [(pattern, reason, False) for pattern, reason in JUNK_RULES]
+        rules += [(pattern, reason, True) for pattern, reason in DATA_RULES]
+        previews = scanner.preview_each([pattern for pattern, _, _ in rules])
+        for (pattern, reason, data), preview in zip(rules, previews):
+            if preview.excluded_files:
+                report.suggestions.append(Suggestion(
+                    pattern=pattern,
+                    reason=reason,
+                    files=preview.excluded_files,
+                    bytes=preview.excluded_bytes,
+                    data=data,
+                ))
+        report.suggestions.sort(key=lambda s: s.bytes, reverse=True)
+        return report
+
+    def _evict(self):
+        """Keep only the most recently used reports"""
+        reports = sorted(self.cache_dir.glob("*.json"), key=lambda p: p.stat().st_mtime_ns, reverse=True)
+        for stale in reports[MAX_CACHED_REPORTS:]:
+            stale.unlink(missing_ok=True)
+
+
+def format_report(report: BundleReport) -> str:
+    lines = [f"{report.total_files} files, {format_bytes(report.total_bytes)}", "", "Largest files:"]
+    lines += [f"  {format_bytes(item.bytes):>10}  {item.path}" for item in report.largest_files]
+    lines += ["", "Largest directories:"]
+    lines += [f"  {format_bytes(item.bytes):>10}  {item.path}/ ({item.files} files)" for item in report.largest_dirs]
+    if report.suggestions:
+        lines += ["", "Suggested exclusions:"]
+        lines += [
+            f"  {format_bytes(s.bytes):>10}  {s.pattern} - {s.description}"
+            for s in report.suggestions
+        ]
+    return "\n".join(lines)
+
+
+def format_heaviest(report: BundleReport, count: int = 3) -> str:
+    """The few largest files and directories, for the advisor panel"""
+    lines = []
+    if report.largest_files:
+        lines.append("Largest files: " + ", ".join(
+            f"{item.path} ({format_bytes(item.bytes)})" for item in report.largest_files[:count]
+        ))
+    if report.largest_dirs:
+        lines.append("Largest directories: " + ", ".join(
+            f"{item.path}/ ({format_bytes(item.bytes)}, {item.files} files)" for item in report.largest_dirs[:count]
+        ))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # usage: python -m core.bundle_advisor [app directory]
+    import sys
+    print(format_report(BundleAdvisor().analyze(sys.argv[1] if len(sys.argv) > 1 else ".")))
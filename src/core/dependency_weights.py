@@ -0,0 +1,255 @@
+import glob
+import hashlib
+import json
+import os
+import re
+import site
+import sys
+from dataclasses import dataclass, field, asdict
+from importlib import metadata
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+from utils.utils import app_data_dir, format_bytes
+
+try:
+    from packaging.requirements import Requirement, InvalidRequirement
+except ImportError:  # packaging is optional, requirements are parsed with a regex without it
+    Requirement = None
+
+WEIGHTS_VERSION = 1  # bump to invalidate cached sizes when the measurement changes
+MAX_CACHED_ENVIRONMENTS = 8
+
+_NAME_RE = re.compile(r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)\s*(?:\[([^\]]*)\])?")
+_EXTRA_MARKER_RE = re.compile(r"""extra\s*==\s*['"]([^'"]+)['"]""")
+
+
+def canonical_name(name: str) -> str:
+    """PEP 503 normalized project name"""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def parse_requirement(requirement: str) -> Tuple[str, Set[str]]:
+    """Return the (canonical name, extras) of a requirement string"""
+    if Requirement is not None:
+        try:
+            req = Requirement(requirement)
+            return canonical_name(req.name), {canonical_name(e) for e in req.extras}
+        except InvalidRequirement:
+            pass
+    match = _NAME_RE.match(requirement)
+    if not match:
+        return "", set()
+    extras = {canonical_name(e.strip()) for e in (match.group(2) or "").split(",") if e.strip()}
+    return canonical_name(match.group(1)), extras
+
+
+def _applies(requirement: str, extras: Set[str]) -> bool:
+    """Whether a dependency declared in metadata applies to this interpreter and the requested extras"""
+    if ";" not in requirement:
+        return True
+    if Requirement is not None:
+        try:
+            marker = Requirement(requirement).marker
+            if marker is None:
+                return True
+            return any(marker.evaluate({"extra": extra}) for extra in (extras or {""}))
+        except (InvalidRequirement, ValueError):
+            pass
+    # without packaging only "extra" markers are evaluated, other markers are assumed true
+    needed = _EXTRA_MARKER_RE.findall(requirement.split(";", 1)[1])
+    return not needed or any(canonical_name(extra) in extras for extra in needed)
+
+
+def site_packages_dirs(project_dir: Optional[str] = None) -> List[str]:
+    """site-packages of the project's virtual environment, or of the running interpreter"""
+    if project_dir:
+        for venv in (".venv", "venv", "env"):
+            found = (
+                glob.glob(os.path.join(project_dir, venv, "lib", "python*", "site-packages"))
+                + glob.glob(os.path.join(project_dir, venv, "Lib", "site-packages"))
+            )
+            if found:
+                return sorted(found)
+    dirs = list(site.getsitepackages()) if hasattr(site, "getsitepackages") else []
+    user_site = site.getusersitepackages() if hasattr(site, "getusersitepackages") else None
+    if user_site and os.path.isdir(user_site):
+        dirs.append(user_site)
+    return [d for d in dirs if os.path.isdir(d)] or [p for p in sys.path if p.endswith("site-packages")]
+
+
+def environment_fingerprint(dirs: List[str]) -> str:
+    """Changes whenever a distribution is installed or removed, both touch the site-packages mtime"""
+    parts = [str(WEIGHTS_VERSION)]
+    for directory in dirs:
+        try:
+            parts.append(f"{directory}:{os.stat(directory).st_mtime_ns}")
+        except OSError:
+            parts.append(f"{directory}:missing")
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class DistInfo:
+    name: str
+    version: str
+    bytes: int  # installed size, excluding bytecode caches and files outside site-packages
+    requires: List[str] = field(default_factory=list)
+
+
+def _measure(dist) -> DistInfo:
+    size = 0
+    for file in dist.files or []:
+        parts = file.parts
+        if parts and (parts[0] == ".." or "__pycache__" in parts):
+            continue
+        if file.size is not None:
+            size += file.size
+            continue
+        try:
+            size += os.stat(dist.locate_file(file)).st_size
+        except OSError:
+            continue
+    return DistInfo(
+        name=dist.metadata["Name"] or "",
+        version=dist.version or "",
+        bytes=size,
+        requires=list(dist.requires or []),
+    )
+
+
+@dataclass
+class DependencyWeight:
+    requirement: str
+    name: str
+    version: str = ""
+    installed: bool = False
+    own_bytes: int = 0
+    total_bytes: int = 0  # the dependency and everything it pulls in
+    unique_bytes: int = 0  # the part of total_bytes no other top-level dependency pulls in
+    closure: List[str] = field(default_factory=list)
+    missing: List[str] = field(default_factory=list)  # transitive requirements not installed locally
+
+    @property
+    def label(self) -> str:
+        if not self.installed:
+            return "not installed"
+        if len(self.closure) > 1:
+            return f"{format_bytes(self.total_bytes)}, {len(self.closure)} pkgs"
+        return format_bytes(self.total_bytes)
+
+
+class DependencyWeights:
+    """Installed sizes of requirements and their transitive closure, cached per environment fingerprint"""
+    def __init__(self, project_dir: Optional[str] = None, cache_file: Optional[Path] = None):
+        self.dirs = site_packages_dirs(project_dir)
+        self.fingerprint = environment_fingerprint(self.dirs)
+        self._cache_file = cache_file or app_data_dir() / "dependency_weights.json"
+        self._all_entries = self._load()
+        self._dists: Dict[str, dict] = self._all_entries.get(self.fingerprint, {}).get("dists", {})
+        self._dirty = False
+        self._installed: Optional[Dict[str, object]] = None
+
+    def _load(self) -> Dict[str, dict]:
+        if not self._cache_file.exists():
+            return {}
+        try:
+            with open(self._cache_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Error loading dependency weights: {e}")
+            return {}
+
+    def _save(self):
+        if not self._dirty:
+            return
+        # re-inserted at the end, so the eviction below sees it as the most recent
+        self._all_entries.pop(self.fingerprint, None)
+        self._all_entries[self.fingerprint] = {"dirs": self.dirs, "dists": self._dists}
+        # keep the most recently written environments only
+        for key in list(self._all_entries)[:-MAX_CACHED_ENVIRONMENTS]:
+            del self._all_entries[key]
+        try:
+            with open(self._cache_file, "w", encoding="utf-8") as f:
+                json.dump(self._all_entries, f)
+            self._dirty = False
+        except IOError as e:
+            print(f"Error saving dependency weights: {e}")
+
+    def _installed_dists(self) -> Dict[str, object]:
+        if self._installed is None:
+            self._installed = {}
+            for dist in metadata.distributions(path=self.dirs):
+                name = dist.metadata["Name"]
+                # the first one on the path wins, like the import system
+                if name and canonical_name(name) not in self._installed:
+                    self._installed[canonical_name(name)] = dist
+        return self._installed
+
+    def dist_info(self, name: str) -> Optional[DistInfo]:
+        """Size and requirements of an installed distribution, measured once per environment"""
+        if name not in self._dists:
+            dist = self._installed_dists().get(name)
+            if dist is None:
+                return None
+            self._dists[name] = asdict(_measure(dist))
+            self._dirty = True
+        return DistInfo(**self._dists[name])
+
+    def _closure(self, requirement: str) -> Tuple[List[str], List[str]]:
+        """Installed and missing distributions a requirement resolves to, breadth first"""
+        name, extras = parse_requirement(requirement)
+        if not name:
+            return [], []
+        seen: Dict[str, Set[str]] = {}
+        missing: List[str] = []
+        queue = [(name, extras)]
+        while queue:
+            current, current_extras = queue.pop(0)
+            known = seen.get(current)
+            if known is not None and current_extras <= known:
+                continue
+            seen[current] = (known or set()) | current_extras
+            info = self.dist_info(current)
+            if info is None:
+                seen.pop(current)
+                if current not in missing:
+                    missing.append(current)
+                continue
+            for dependency in info.requires:
+                if _applies(dependency, current_extras):
+                    queue.append(parse_requirement(dependency.split(";", 1)[0]))
+        return list(seen), missing
+
+    def analyze(self, requirements: List[str]) -> List[DependencyWeight]:
+        """Weigh each top-level requirement against the local environment"""
+        closures = {requirement: self._closure(requirement) for requirement in requirements}
+        usage: Dict[str, int] = {}
+        for closure, _ in closures.values():
+            for name in closure:
+                usage[name] = usage.get(name, 0) + 1
+
+        results = []
+        for requirement in requirements:
+            name, _ = parse_requirement(requirement)
+            closure, missing = closures[requirement]
+            info = self.dist_info(name) if name else None
+            sizes = {dep: self.dist_info(dep).bytes for dep in closure}
+            results.append(DependencyWeight(
+                requirement=requirement,
+                name=name,
+                version=info.version if info else "",
+                installed=info is not None,
+                own_bytes=info.bytes if info else 0,
+                total_bytes=sum(sizes.values()),
+                unique_bytes=sum(size for dep, size in sizes.items() if usage[dep] == 1),
+                closure=closure,
+                missing=missing,
+            ))
+        self._save()
+        return results
+
+    def union_bytes(self, weights: List[DependencyWeight]) -> int:
+        """Estimated site-packages size, shared dependencies counted once"""
+        names = {name for weight in weights for name in weight.closure}
+        return sum(self.dist_info(name).bytes for name in names)
+
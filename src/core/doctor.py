@@ -0,0 +1,161 @@
+import asyncio
+import json
+import re
+import sys
+import time
+from typing import AsyncIterator, List, Optional, Tuple
+
+STATUS_SYMBOLS = {
+    "✓": "PASSED",
+    "✔": "PASSED",
+    "✗": "FAILED",
+    "✖": "FAILED",
+    "!": "WARNING",
+}
+
+# Line classifier table shared by flutter and flet doctor.
+# Lines are matched without stripping leading whitespace, so indented
+# detail lines (e.g. "    ✗ cmdline-tools component is missing") never
+# classify as top level checks.
+LINE_CLASSIFIERS = [
+    # [✓] Flutter (Channel stable, 3.29.0, on macOS ...), -v appends the check's duration: [1,234ms]
+    ("flutter_check", re.compile(r'^\[(?P<symbol>.)?\]\s*(?P<name>.*?)(?:\s*\(.*\))?(?:\s*\[[\d.,]+m?s\])?$')),
+    # ✔ Flet Version: 0.27.5
+    ("flet_check", re.compile(r'^(?P<symbol>[✔✓✖✗!])\s+(?P<name>[^:]+):\s*(?P<info>.*)$')),
+    ("blank", re.compile(r'^\s*$')),
+]
+
+
+def classify_line(line: str):
+    """Return the (kind, match) of the first classifier matching the line"""
+    for kind, pattern in LINE_CLASSIFIERS:
+        match = pattern.match(line)
+        if match:
+            return kind, match
+    return None, None
+
+
+class DoctorLineParser:
+    """Incremental parser turning doctor output lines into check results"""
+    def __init__(self):
+        self._last_result = None  # last flet check, extended by wrapped lines
+
+    def feed(self, line: str) -> Optional[dict]:
+        """Parse one line, returning a result as soon as a check is recognized"""
+        kind, match = classify_line(line.rstrip("\r\n"))
+
+        if kind == "flutter_check":
+            self._last_result = None
+            status = STATUS_SYMBOLS.get(match.group("symbol"), "UNKNOWN")
+            return {match.group("name").strip(): status}
+
+        if kind == "flet_check":
+            status = STATUS_SYMBOLS.get(match.group("symbol"), "UNKNOWN")
+            self._last_result = {
+                match.group("name").strip(): status,
+                "version_info": match.group("info").strip(),
+            }
+            return dict(self._last_result)
+
+        if kind == "blank":
+            self._last_result = None
+            return None
+
+        if self._last_result is not None:
+            # wrapped continuation of the previous flet check, re-emit it extended
+            self._last_result["version_info"] = f"{self._last_result['version_info']} {line.strip()}".strip()
+            return dict(self._last_result)
+
+        return None
+
+
+def check_name(result: dict) -> str:
+    """Name of the check a result reports on"""
+    return next((key for key in result if key != "version_info"), "")
+
+
+def merge_result(results: List[dict], result: dict):
+    """Add a result, replacing the earlier one for the same check: wrapped lines re-emit it extended"""
+    name = check_name(result)
+    for i, existing in enumerate(results):
+        if check_name(existing) == name:
+            results[i] = result
+            return
+    results.append(result)
+
+
+async def stream_doctor(*args, name: str = "Doctor") -> AsyncIterator[str]:
+    """Run a doctor command and yield each check as JSON as soon as its line arrives"""
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+        )
+    except OSError as e:
+        # e.g. flutter or flet not installed or not on PATH
+        yield json.dumps({"Error": f"Could not run {name}: {e}"})
+        return
+
+    parser = DoctorLineParser()
+    while True:
+        line_bytes = await process.stdout.readline()
+        if not line_bytes:
+            break
+
+        result = parser.feed(line_bytes.decode('utf-8', errors='replace'))
+        if result:
+            yield json.dumps(result)
+
+    await process.wait() # wait for process to complete
+
+    if process.returncode != 0:
+        yield json.dumps({"Error": f"{name} exited with code {process.returncode}"})
+
+
+def run_flutter_doctor() -> AsyncIterator[str]:
+    """Run flutter doctor and yield results line by line"""
+    return stream_doctor('flutter', 'doctor', '-v', name="Flutter doctor")
+
+
+def run_flet_doctor() -> AsyncIterator[str]:
+    """Run flet doctor and yield results line by line"""
+    return stream_doctor('flet', 'doctor', name="Flet doctor")
+
+
+# MARK: Benchmark
+_REPLAY_SCRIPT = """
+import sys, time
+delay = float(sys.argv[2])
+with open(sys.argv[1], encoding="utf-8") as f:
+    for line in f:
+        sys.stdout.write(line)
+        sys.stdout.flush()
+        time.sleep(delay)
+"""
+
+
+async def measure_time_to_first_result(transcript_path: str, line_delay: float = 0.05) -> Tuple[float, float, int]:
+    """
+    Replay a recorded doctor transcript through the streaming parser
+
+    Returns:
+        Seconds to the first result, seconds to the last result and the number of results
+    """
+    start = time.perf_counter()
+    first = last = None
+    count = 0
+    async for _ in stream_doctor(sys.executable, "-c", _REPLAY_SCRIPT, transcript_path, str(line_delay)):
+        last = time.perf_counter() - start
+        if first is None:
+            first = last
+        count += 1
+    return first or 0.0, last or 0.0, count
+
+
+if __name__ == "__main__":
+    # usage: python -m core.doctor <transcript> [<transcript> ...]
+    # record transcripts with e.g. `flutter doctor -v > flutter_doctor.txt`
+    for transcript in sys.argv[1:]:
+        first, last, count = asyncio.run(measure_time_to_first_result(transcript))
+        print(f"{transcript}: first result {first * 1000:.1f} ms, last result {last * 1000:.1f} ms, {count} results")
@@ -0,0 +1,164 @@
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import AsyncIterator, Callable, Dict, List, Optional
+from utils.utils import app_data_dir
+from core.doctor import merge_result
+
+# binary looked up on PATH for each doctor type
+DOCTOR_BINARIES = {
+    "flutter": "flutter",
+    "flet": "flet",
+}
+
+DEFAULT_TTL = 6 * 60 * 60  # 6 hours
+
+
+class DoctorCache:
+    """
+    Disk cache for flutter/flet doctor results.
+
+    Entries are invalidated when they are older than the TTL or when the
+    toolchain fingerprint (PATH and the doctor binaries' mtimes) changes.
+    """
+    def __init__(self, ttl: int = DEFAULT_TTL, cache_file: Optional[Path] = None):
+        self.ttl = ttl
+        self._cache_file = cache_file or app_data_dir() / "doctor_cache.json"
+        self._entries = self._load()
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._partial: Dict[str, List[dict]] = {}  # results of the in-flight run so far
+        self._listeners: Dict[str, List[Callable[[dict], None]]] = {}
+
+    def _load(self) -> Dict[str, dict]:
+        """Load cached entries from disk"""
+        if not self._cache_file.exists():
+            return {}
+        try:
+            with open(self._cache_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Error loading doctor cache: {e}")
+            return {}
+
+    def _save(self):
+        """Persist cached entries to disk"""
+        try:
+            with open(self._cache_file, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, indent=2)
+        except IOError as e:
+            print(f"Error saving doctor cache: {e}")
+
+    @staticmethod
+    def fingerprint(doctor_type: str) -> str:
+        """Fingerprint the toolchain a doctor run depends on"""
+        parts = [os.environ.get("PATH", "")]
+        binary = shutil.which(DOCTOR_BINARIES.get(doctor_type, doctor_type))
+        if binary:
+            real_binary = os.path.realpath(binary)
+            parts.append(real_binary)
+            # the binary itself and its directory change on upgrades
+            for candidate in (real_binary, os.path.dirname(real_binary)):
+                try:
+                    parts.append(str(os.stat(candidate).st_mtime_ns))
+                except OSError:
+                    parts.append("missing")
+        return hashlib.sha1("\0".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, doctor_type: str) -> Optional[dict]:
+        """Return the cached entry for a doctor if its fingerprint still matches"""
+        entry = self._entries.get(doctor_type)
+        if not entry or entry.get("fingerprint") != self.fingerprint(doctor_type):
+            return None
+        return entry
+
+    def age(self, entry: dict) -> float:
+        """Seconds elapsed since the entry was recorded"""
+        return max(0.0, time.time() - entry.get("timestamp", 0))
+
+    def is_stale(self, entry: Optional[dict]) -> bool:
+        """Whether an entry is missing or older than the TTL"""
+        return entry is None or self.age(entry) > self.ttl
+
+    def is_refreshing(self, doctor_type: str) -> bool:
+        task = self._refreshing.get(doctor_type)
+        return task is not None and not task.done()
+
+    def store(self, doctor_type: str, results: List[dict]):
+        """Record a complete doctor run"""
+        self._entries[doctor_type] = {
+            "timestamp": time.time(),
+            "fingerprint": self.fingerprint(doctor_type),
+            "results": results,
+        }
+        self._save()
+
+    async def refresh(
+        self,
+        doctor_type: str,
+        runner: Callable[[], AsyncIterator[str]],
+        on_result: Optional[Callable[[dict], None]] = None,
+    ) -> List[dict]:
+        """
+        Run a doctor and cache its results, sharing an in-flight run if there is one
+
+        on_result gets every result as it arrives, the ones an in-flight run already
+        produced first, so a manual run joining a background one still streams.
+        """
+        task = self._refreshing.get(doctor_type)
+        if task is None or task.done():
+            self._partial[doctor_type] = []
+            self._listeners[doctor_type] = []
+            task = asyncio.ensure_future(self._collect(doctor_type, runner))
+            self._refreshing[doctor_type] = task
+        if on_result is None:
+            return await asyncio.shield(task)
+
+        for result in list(self._partial[doctor_type]):
+            on_result(result)
+        listeners = self._listeners[doctor_type]
+        listeners.append(on_result)
+        try:
+            # shielded, the run is shared and one caller going away must not cancel it
+            return await asyncio.shield(task)
+        finally:
+            listeners.remove(on_result)
+
+    async def _collect(self, doctor_type: str, runner: Callable[[], AsyncIterator[str]]) -> List[dict]:
+        results = self._partial[doctor_type]
+        try:
+            async for result_json in runner():
+                try:
+                    result = json.loads(result_json)
+                except json.JSONDecodeError:
+                    print(f"Failed to decode JSON: {result_json}")
+                    continue
+                merge_result(results, result)
+                for listener in list(self._listeners[doctor_type]):
+                    listener(result)
+        except (OSError, asyncio.SubprocessError) as e:
+            results.append({"Error": f"Could not run {doctor_type} doctor: {e}"})
+        self.store(doctor_type, results)
+        return results
+
+    async def refresh_all(self, runners: Dict[str, Callable[[], AsyncIterator[str]]]) -> Dict[str, List[dict]]:
+        """Refresh every stale doctor concurrently"""
+        doctor_types = [doctor_type for doctor_type in runners if self.is_stale(self.get(doctor_type))]
+        results = await asyncio.gather(
+            *(self.refresh(doctor_type, runners[doctor_type]) for doctor_type in doctor_types)
+        )
+        return dict(zip(doctor_types, results))
+
+
+def format_age(seconds: float) -> str:
+    """Human readable age, e.g. '5m ago'"""
+    if seconds < 60:
+        return "just now"
+    if seconds < 3600:
+        return f"{int(seconds // 60)}m ago"
+    if seconds < 86400:
+        return f"{int(seconds // 3600)}h ago"
+    return f"{int(seconds // 86400)}d ago"
@@ -178,7 +178,7 @@ def get_package_options_fields():
             title="Dependencies",
             hint_text="Add python dependencies",
             hint_widget="e.g. flet",
-            widget_type="badges"
+            widget_type="dependency_badges"
         ),
         FieldDefinition(
             name="include_controls",
@@ -194,6 +194,14 @@ def get_package_options_fields():
             title="Exclude Additional Files",
             hint_text="Exclude files and directories from Python app package",
             hint_widget="e.g. __pycache__/",
+            widget_type="exclude_badges"
+        ),
+        FieldDefinition(
+            name="size_budgets",
+            property_name="size_budgets",
+            title="Size Budgets",
+            hint_text="Maximum artifact or output sizes per target, checked after each build (warns at 90%)",
+            hint_widget="e.g. apk=40MB or apk:Native libraries=25MB",
             widget_type="badges"
         ),
         FieldDefinition(
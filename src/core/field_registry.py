@@ -5,8 +5,9 @@ from ui.components.form import FormState
 from ui.components.widgets import (
     FactoryTextField, FactoryDropdown, FactoryCheckBox, FactoryBadgeInput,
     FactoryDropdownOption, FactoryField, IconPicker, MultipleFactoryTextField,
-    FactoryAuthorRow
+    FactoryAuthorRow, ExcludeFilesInput, DependencyBadgeInput
 )
+from core.preflight import app_dir, project_dir
 
 @dataclass
 class FieldDefinition:
@@ -104,6 +105,21 @@ class FieldRegistry:
                 ref=ref,
                 on_change=self.connect_field(field_name)
             )
+        elif field_def.widget_type == "exclude_badges":
+            return ExcludeFilesInput(
+                # no project yet: project_dir would fall back to the working directory
+                root_getter=lambda: str(app_dir(self.form_state)) if self.form_state.python_app_path else "",
+                hint_text=field_def.hint_widget or field_def.hint_text,
+                ref=ref,
+                on_change=self.connect_field(field_name)
+            )
+        elif field_def.widget_type == "dependency_badges":
+            return DependencyBadgeInput(
+                project_dir_getter=lambda: str(project_dir(self.form_state)),
+                hint_text=field_def.hint_widget or field_def.hint_text,
+                ref=ref,
+                on_change=self.connect_field(field_name)
+            )
         elif field_def.widget_type == "badges":
             return FactoryBadgeInput(
                 hint_text=field_def.hint_widget or field_def.hint_text,
@@ -0,0 +1,170 @@
+import hashlib
+import os
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from utils.utils import app_data_dir
+from core.asset_sync import AssetManifest
+
+try:
+    from PIL import Image
+except ImportError:  # a dependency, but icons are still copied as-is when it's missing
+    Image = None
+
+PIPELINE_VERSION = 1  # bump to invalidate cached outputs when rendering changes
+MASTER_SIZE = 1024  # largest size any spec renders
+
+
+@dataclass(frozen=True)
+class IconSpec:
+    name: str  # asset file stem, e.g. "icon_windows"
+    format: str  # "png", "ico" or "pngset" (a directory of PNGs)
+    size: int
+    sizes: Tuple[int, ...] = ()  # ICO frames or the sizes of a PNG set
+    flatten: bool = False  # drop alpha, iOS rejects transparent app icons
+    maskable: bool = False  # pad into the maskable safe zone (80%)
+
+    @property
+    def filename(self) -> str:
+        return self.name if self.format == "pngset" else f"{self.name}.{self.format}"
+
+
+# one file per platform, synced into the project's assets directory
+PLATFORM_ICON_SPECS = [
+    IconSpec("icon", "png", 1024),
+    IconSpec("icon_ios", "png", 1024, flatten=True),
+    IconSpec("icon_android", "png", 512),
+    IconSpec("icon_web", "png", 512),
+    IconSpec("icon_macos", "png", 1024),
+    IconSpec("icon_windows", "ico", 256, sizes=(16, 24, 32, 48, 64, 128, 256)),
+]
+
+# full size sets: the macOS one is kept in the cache for tooling that needs every resolution,
+# the web ones replace the icons flutter generates in a web build, see install_web_icons
+ICON_SET_SPECS = [
+    IconSpec("macos_iconset", "pngset", 1024, sizes=(16, 32, 64, 128, 256, 512, 1024)),
+    IconSpec("web_icons", "pngset", 512, sizes=(192, 512)),
+    IconSpec("web_icons_maskable", "pngset", 512, sizes=(192, 512), maskable=True),
+]
+
+
+def is_available() -> bool:
+    return Image is not None
+
+
+def _square(image, size: int, spec: IconSpec):
+    """Fit the image into a size x size canvas"""
+    image = image.convert("RGBA")
+    inner = int(size * 0.8) if spec.maskable else size
+    image.thumbnail((inner, inner), Image.LANCZOS)
+    background = (255, 255, 255, 255) if spec.maskable or spec.flatten else (0, 0, 0, 0)
+    canvas = Image.new("RGBA", (size, size), background)
+    canvas.paste(image, ((size - image.width) // 2, (size - image.height) // 2), image)
+    return canvas.convert("RGB") if spec.flatten else canvas
+
+
+def _render_master(source: Path, master: Path):
+    """Decode the source once and keep a downscaled copy every spec renders from"""
+    tmp = master.with_name(f".{master.name}.tmp")
+    with Image.open(source) as image:
+        image = image.convert("RGBA")
+        image.thumbnail((MASTER_SIZE, MASTER_SIZE), Image.LANCZOS)
+        image.save(tmp, format="PNG")
+    os.replace(tmp, master)
+
+
+def _render(source: str, spec: IconSpec, out_dir: str) -> str:
+    """Render one spec into out_dir"""
+    output = Path(out_dir) / spec.filename
+    tmp = Path(out_dir) / f".{spec.filename}.tmp"
+    with Image.open(source) as image:
+        # downscale the (possibly huge) source once, smaller sizes derive from it
+        base = _square(image, max(spec.sizes or (spec.size,)), spec)
+    if spec.format == "ico":
+        base.save(tmp, format="ICO", sizes=[(s, s) for s in spec.sizes])
+    elif spec.format == "pngset":
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        for size in spec.sizes:
+            base.resize((size, size), Image.LANCZOS).save(tmp / f"{spec.name}_{size}.png", format="PNG")
+    else:
+        base.save(tmp, format="PNG", optimize=True)
+    # atomic publish so an interrupted render never leaves a half written cache entry
+    os.replace(tmp, output)
+    return str(output)
+
+
+class IconPipeline:
+    """
+    Generates platform icons once per source hash and spec
+
+    Renders run in the calling thread: generate is called through asyncio.to_thread,
+    and with the downscaled master each spec is a few milliseconds of Pillow work.
+    """
+    def __init__(self, cache_dir: Optional[Path] = None):
+        self.cache_dir = cache_dir or app_data_dir("icons")
+
+    def source_hash(self, source: Path) -> str:
+        """Content hash of the source, recomputed only when its size or mtime changed"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        manifest = AssetManifest(self.cache_dir)
+        digest = manifest.hash_of("sources", str(source.resolve()), source, source.stat())
+        manifest.save()
+        return digest
+
+    def _entry_dir(self, source_hash: str, spec: IconSpec) -> Path:
+        spec_hash = hashlib.sha1(repr(spec).encode("utf-8")).hexdigest()[:12]
+        return self.cache_dir / f"v{PIPELINE_VERSION}" / source_hash / f"{spec.name}-{spec_hash}"
+
+    def generate(self, source: Path, specs: Optional[List[IconSpec]] = None) -> Dict[str, Path]:
+        """Return {spec name: generated file}, rendering only what isn't cached yet"""
+        specs = specs if specs is not None else PLATFORM_ICON_SPECS + ICON_SET_SPECS
+        source_hash = self.source_hash(source)
+
+        outputs, missing = {}, []
+        for spec in specs:
+            entry_dir = self._entry_dir(source_hash, spec)
+            output = entry_dir / spec.filename
+            outputs[spec.name] = output
+            if not output.exists():
+                entry_dir.mkdir(parents=True, exist_ok=True)
+                missing.append((spec, entry_dir))
+
+        if missing:
+            master = self.cache_dir / f"v{PIPELINE_VERSION}" / source_hash / "master.png"
+            if not master.exists():
+                _render_master(source, master)
+            for spec, entry_dir in missing:
+                _render(str(master), spec, str(entry_dir))
+
+        return outputs
+
+    def clear(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+
+def install_web_icons(outputs: Dict[str, Path], web_output: str) -> List[str]:
+    """
+    Replace the icons flutter generated in a web build with the rendered web sets
+
+    Flutter's maskable icons are plain copies of the regular ones, so launchers crop
+    them; the maskable set is padded into the safe zone. Returns the files written.
+    """
+    icons_dir = Path(web_output) / "icons"
+    if not icons_dir.is_dir():
+        return []
+    prefixes = {"web_icons": "Icon", "web_icons_maskable": "Icon-maskable"}  # flutter's web template names
+    written = []
+    for spec in ICON_SET_SPECS:
+        icon_set = outputs.get(spec.name)
+        if spec.name not in prefixes or icon_set is None or not icon_set.is_dir():
+            continue
+        prefix = prefixes[spec.name]
+        for size in spec.sizes:
+            rendered = icon_set / f"{spec.name}_{size}.png"
+            if rendered.is_file():
+                dest = icons_dir / f"{prefix}-{size}.png"
+                shutil.copyfile(rendered, dest)
+                written.append(str(dest))
+    return written
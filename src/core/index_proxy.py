@@ -0,0 +1,305 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+import urllib.error
+import urllib.request
+from dataclasses import dataclass, fields, replace
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+from urllib.parse import urljoin, urlsplit
+from utils.utils import app_data_dir
+
+DEFAULT_UPSTREAM = "https://pypi.org/simple"
+INDEX_TTL = 10 * 60  # seconds a project page is served from the cache before revalidating
+CHUNK_SIZE = 256 * 1024
+FILE_SCHEMES = ("http", "https")
+
+_HREF_RE = re.compile(r'href="([^"]+)"')
+
+
+@dataclass
+class ProxyStats:
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0  # requests that waited on an identical in-flight fetch
+    bytes_served: int = 0
+    bytes_fetched: int = 0
+
+    def summary(self) -> str:
+        total = self.hits + self.misses + self.coalesced
+        ratio = (self.hits + self.coalesced) / total if total else 0.0
+        return f"{self.hits} hits, {self.misses} misses, {self.coalesced} coalesced ({ratio:.0%} served locally)"
+
+    def snapshot(self) -> "ProxyStats":
+        return replace(self)
+
+    def since(self, earlier: "ProxyStats") -> "ProxyStats":
+        """Counts accumulated after an earlier snapshot, the proxy outlives single builds"""
+        return ProxyStats(**{f.name: getattr(self, f.name) - getattr(earlier, f.name) for f in fields(self)})
+
+
+class UpstreamError(Exception):
+    def __init__(self, status: int, message: str = ""):
+        super().__init__(message or f"upstream returned {status}")
+        self.status = status
+
+
+class BlobStore:
+    """Content-addressed files, blobs/<sha256[:2]>/<sha256>, plus a url -> digest index"""
+    def __init__(self, root: Path):
+        self.root = root
+        (root / "blobs").mkdir(parents=True, exist_ok=True)
+        (root / "urls").mkdir(parents=True, exist_ok=True)
+
+    def blob_path(self, digest: str) -> Path:
+        return self.root / "blobs" / digest[:2] / digest
+
+    def _url_entry(self, url: str) -> Path:
+        return self.root / "urls" / f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.json"
+
+    def lookup(self, url: str) -> Optional[dict]:
+        """Cached entry of a url: {"digest", "content_type", "fetched_at"}"""
+        try:
+            with open(self._url_entry(url), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        return entry if self.blob_path(entry["digest"]).exists() else None
+
+    def fetch(self, url: str) -> Tuple[dict, int]:
+        """Download url into the store, hashing while streaming, returns (entry, bytes fetched)"""
+        request = urllib.request.Request(url, headers={"Accept": "text/html", "User-Agent": "fletfactory-index-proxy"})
+        tmp = self.root / "blobs" / f".{os.getpid()}.{hashlib.sha1(url.encode('utf-8')).hexdigest()}.tmp"
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response, open(tmp, "wb") as f:
+                content_type = response.headers.get("Content-Type", "application/octet-stream")
+                for chunk in iter(lambda: response.read(CHUNK_SIZE), b""):
+                    digest.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+        except urllib.error.HTTPError as e:
+            tmp.unlink(missing_ok=True)
+            raise UpstreamError(e.code) from e
+        except (urllib.error.URLError, OSError) as e:
+            tmp.unlink(missing_ok=True)
+            raise UpstreamError(502, str(e)) from e
+
+        blob = self.blob_path(digest.hexdigest())
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        # identical content fetched from another url is stored once
+        if blob.exists():
+            tmp.unlink()
+        else:
+            os.replace(tmp, blob)
+        entry = {"digest": digest.hexdigest(), "content_type": content_type, "fetched_at": time.time()}
+        entry_tmp = self._url_entry(url).with_suffix(".tmp")
+        with open(entry_tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(entry_tmp, self._url_entry(url))
+        return entry, size
+
+
+class IndexProxy:
+    """
+    Caching PEP 503 index proxy on localhost, shared by concurrent builds
+
+    Project pages are fetched from the upstream and their file links rewritten to
+    /_files/<scheme>/<netloc>/<path>, so every distribution download also goes through
+    the proxy and lands in the content-addressed store. Concurrent requests for the
+    same url wait on a single upstream fetch.
+
+    Only http(s) urls on the upstream or on a file host it linked to are fetched, and
+    requests must name the proxy in their Host header, so neither local pages nor DNS
+    rebinding can use it to read arbitrary urls.
+    """
+    def __init__(self, upstream: str = DEFAULT_UPSTREAM, store_dir: Optional[Path] = None, host: str = "127.0.0.1", port: int = 0, index_ttl: float = INDEX_TTL):
+        self.upstream = upstream.rstrip("/") + "/"
+        if urlsplit(self.upstream).scheme not in FILE_SCHEMES:
+            raise ValueError(f"index proxy upstream must be an http(s) url, got {upstream}")
+        self.store = BlobStore(store_dir or app_data_dir("index_proxy"))
+        self.host = host
+        self.port = port
+        self.index_ttl = index_ttl
+        self.stats = ProxyStats()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._file_hosts: Set[str] = {urlsplit(self.upstream).netloc}  # netlocs /_files/ may fetch from
+
+    @property
+    def index_url(self) -> str:
+        return f"http://{self.host}:{self.port}/simple/"
+
+    @property
+    def running(self) -> bool:
+        return self._server is not None
+
+    async def start(self):
+        if self._server is not None:
+            return
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server is None:
+            return
+        self._server.close()
+        await self._server.wait_closed()
+        self._server = None
+
+    def build_env(self) -> Dict[str, str]:
+        """Environment pointing pip in child build processes at the proxy"""
+        return {"PIP_INDEX_URL": self.index_url}
+
+    # MARK: Fetching
+    async def _get(self, url: str, max_age: Optional[float] = None) -> dict:
+        """Return the store entry of a url, fetching it once no matter how many requests wait on it"""
+        entry = self.store.lookup(url)
+        if entry and (max_age is None or time.time() - entry["fetched_at"] < max_age):
+            self.stats.hits += 1
+            return entry
+
+        future = self._inflight.get(url)
+        if future is not None:
+            self.stats.coalesced += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[url] = future
+        self.stats.misses += 1
+        try:
+            entry, size = await asyncio.to_thread(self.store.fetch, url)
+            self.stats.bytes_fetched += size
+            future.set_result(entry)
+            return entry
+        except UpstreamError as e:
+            future.set_exception(e)
+            # mark the exception retrieved when nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            del self._inflight[url]
+
+    def _rewrite_links(self, html: str, page_url: str) -> str:
+        """Point distribution links back at the proxy, keeping hash fragments"""
+        def replace(match):
+            href = match.group(1).replace("&amp;", "&")
+            url = urljoin(page_url, href)
+            parts = urlsplit(url)
+            if parts.scheme not in FILE_SCHEMES:
+                return match.group(0)
+            self._file_hosts.add(parts.netloc)
+            proxied = f"/_files/{parts.scheme}/{parts.netloc}{parts.path}"
+            if parts.query:
+                proxied += f"?{parts.query}"
+            if parts.fragment:
+                proxied += f"#{parts.fragment}"
+            return f'href="{proxied}"'
+        return _HREF_RE.sub(replace, html)
+
+    # MARK: HTTP
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                except ValueError:
+                    await self._respond(writer, 400, b"bad request")
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                if method not in ("GET", "HEAD"):
+                    await self._respond(writer, 405, b"method not allowed")
+                elif not self._host_allowed(headers.get("host", "")):
+                    await self._respond(writer, 421, b"misdirected request")
+                else:
+                    await self._route(writer, target, head=method == "HEAD")
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def _host_allowed(self, host: str) -> bool:
+        """Whether a Host header names the proxy itself"""
+        return host.lower() in {f"{name}:{self.port}" for name in (self.host, "localhost", "127.0.0.1")}
+
+    async def _route(self, writer: asyncio.StreamWriter, target: str, head: bool):
+        path = target.split("?", 1)[0]
+        try:
+            if path.startswith("/_files/"):
+                scheme, _, rest = path[len("/_files/"):].partition("/")
+                if scheme not in FILE_SCHEMES or rest.partition("/")[0] not in self._file_hosts:
+                    await self._respond(writer, 403, b"forbidden")
+                    return
+                query = target[len(path):]
+                entry = await self._get(f"{scheme}://{rest}{query}")
+                await self._send_blob(writer, entry, head)
+            elif path.startswith("/simple/"):
+                page_url = self.upstream + path[len("/simple/"):]
+                entry = await self._get(page_url, max_age=self.index_ttl)
+                with open(self.store.blob_path(entry["digest"]), "r", encoding="utf-8", errors="replace") as f:
+                    html = self._rewrite_links(f.read(), page_url)
+                await self._respond(writer, 200, html.encode("utf-8"), "text/html; charset=utf-8", head)
+            else:
+                await self._respond(writer, 404, b"not found")
+        except UpstreamError as e:
+            await self._respond(writer, e.status if e.status < 600 else 502, str(e).encode("utf-8"))
+        except ConnectionError:
+            raise
+        except OSError as e:
+            # the blob went missing or is unreadable, e.g. the store was cleared under a running build
+            await self._respond(writer, 404 if isinstance(e, FileNotFoundError) else 502, f"cache read failed: {e}".encode("utf-8"))
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, body: bytes, content_type: str = "text/plain", head: bool = False):
+        writer.write(
+            f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+            f"Content-Type: {content_type}\r\nContent-Length: {len(body)}\r\n\r\n".encode("latin-1")
+        )
+        if not head:
+            writer.write(body)
+            self.stats.bytes_served += len(body)
+        await writer.drain()
+
+    async def _send_blob(self, writer: asyncio.StreamWriter, entry: dict, head: bool):
+        # opened before the headers go out, so a missing blob can still be answered with an error
+        with open(self.store.blob_path(entry["digest"]), "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            writer.write(
+                f"HTTP/1.1 200 OK\r\nContent-Type: {entry['content_type']}\r\nContent-Length: {size}\r\n"
+                f"ETag: \"{entry['digest']}\"\r\n\r\n".encode("latin-1")
+            )
+            if not head:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    writer.write(chunk)
+                    await writer.drain()
+                self.stats.bytes_served += size
+        await writer.drain()
+
+
+_proxy: Optional[IndexProxy] = None
+
+
+async def get_proxy(upstream: str = DEFAULT_UPSTREAM) -> IndexProxy:
+    """The app wide proxy, started on first use so every build shares one store"""
+    global _proxy
+    if _proxy is None or _proxy.upstream != upstream.rstrip("/") + "/":
+        if _proxy is not None:
+            await _proxy.stop()
+        _proxy = IndexProxy(upstream)
+    await _proxy.start()
+    return _proxy
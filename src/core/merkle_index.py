@@ -0,0 +1,275 @@
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from utils.utils import app_data_dir
+from core.project_scan import ExcludeMatcher, DirEntry
+
+INDEX_VERSION = 1
+RACY_WINDOW_NS = 2_000_000_000  # files modified this recently are rehashed next time, whatever their stat says
+PARALLEL_HASH_FILES = 8  # hash in a thread pool once this many files changed
+
+# stored per file: [mtime_ns, size, inode, sha256]
+FileRecord = List
+
+
+@dataclass
+class MerkleDiff:
+    root_hash: str
+    added: List[str] = field(default_factory=list)
+    modified: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    files: int = 0
+    stat_calls: int = 0
+    hashed: int = 0  # files whose content was read
+    duration: float = 0.0
+
+    @property
+    def changed(self) -> List[str]:
+        return sorted(self.added + self.modified + self.removed)
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.modified or self.removed)
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class MerkleIndex:
+    """
+    Persistent Merkle tree of a project directory in ~/.fletfactory/merkle
+
+    Files are rehashed only when their (mtime_ns, size, inode) changed, directory hashes
+    are recomputed only above changed entries, so an unchanged tree costs one stat per file.
+    """
+    def __init__(self, root: str, exclude: Optional[List[str]] = None, index_file: Optional[Path] = None):
+        self.root = os.path.abspath(os.path.expanduser(root))
+        self.exclude = list(exclude or [])
+        self._matcher = ExcludeMatcher(self.exclude)
+        key = hashlib.sha1(f"{self.root}\0{sorted(self.exclude)}".encode("utf-8")).hexdigest()
+        self.index_file = index_file or app_data_dir("merkle") / f"{key}.json"
+        self.files: Dict[str, FileRecord] = {}
+        self.dirs: Dict[str, str] = {}  # rel dir -> hash
+        self.root_hash = ""
+        self._load()
+
+    def _load(self):
+        if not self.index_file.exists():
+            return
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION and data.get("root") == self.root:
+                self.files = data["files"]
+                self.dirs = data["dirs"]
+                self.root_hash = data["root_hash"]
+        except (json.JSONDecodeError, IOError, KeyError) as e:
+            print(f"Error loading merkle index: {e}")
+
+    def _save(self):
+        tmp = self.index_file.with_suffix(".tmp")
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({
+                    "version": INDEX_VERSION,
+                    "root": self.root,
+                    "root_hash": self.root_hash,
+                    "files": self.files,
+                    "dirs": self.dirs,
+                }, f, separators=(",", ":"))
+            os.replace(tmp, self.index_file)
+        except IOError as e:
+            print(f"Error saving merkle index: {e}")
+
+    def _walk(self, diff: MerkleDiff) -> Tuple[Dict[str, os.stat_result], Dict[str, List[Tuple[str, bool]]]]:
+        """Stat every file, returning {rel file: stat} and {rel dir: [(name, is_dir)]}"""
+        stats: Dict[str, os.stat_result] = {}
+        listings: Dict[str, List[Tuple[str, bool]]] = {}
+        stack = [""]
+        while stack:
+            rel_dir = stack.pop()
+            prefix = f"{rel_dir}/" if rel_dir else ""
+            children = []
+            try:
+                with os.scandir(os.path.join(self.root, rel_dir) if rel_dir else self.root) as it:
+                    for entry in it:
+                        rel_path = prefix + entry.name
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if self._matcher.dir_excluded(rel_path):
+                                    continue
+                                children.append((entry.name, True))
+                                stack.append(rel_path)
+                            elif entry.is_file(follow_symlinks=False):
+                                stats[rel_path] = entry.stat(follow_symlinks=False)
+                                diff.stat_calls += 1
+                                children.append((entry.name, False))
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+            listings[rel_dir] = children
+        return stats, listings
+
+    def _drop_excluded_files(self, stats: Dict[str, os.stat_result], listings: Dict[str, List[Tuple[str, bool]]]):
+        if not self.exclude:
+            return
+        for rel_dir, children in listings.items():
+            names = [name for name, is_dir in children if not is_dir]
+            if not names:
+                continue
+            excluded = set(self._matcher.excluded_files(rel_dir, DirEntry(mtime_ns=0, dirs=[], files={n: 0 for n in names})))
+            if excluded:
+                prefix = f"{rel_dir}/" if rel_dir else ""
+                listings[rel_dir] = [(n, d) for n, d in children if d or n not in excluded]
+                for name in excluded:
+                    stats.pop(prefix + name, None)
+
+    def update(self) -> MerkleDiff:
+        """Bring the index up to date, returning what changed since the previous update"""
+        start = time.perf_counter()
+        diff = MerkleDiff(root_hash="")
+        stats, listings = self._walk(diff)
+        self._drop_excluded_files(stats, listings)
+        now_ns = time.time_ns()
+
+        # files whose stat changed, or that were too fresh to trust last time
+        to_hash = []
+        for rel_path, st in stats.items():
+            record = self.files.get(rel_path)
+            if record is None or record[0] != st.st_mtime_ns or record[1] != st.st_size or record[2] != st.st_ino:
+                to_hash.append(rel_path)
+
+        def hash_one(rel_path: str) -> Tuple[str, Optional[str]]:
+            try:
+                return rel_path, hash_file(os.path.join(self.root, rel_path))
+            except OSError:
+                return rel_path, None
+
+        if len(to_hash) >= PARALLEL_HASH_FILES:
+            with ThreadPoolExecutor() as pool:
+                hashed = list(pool.map(hash_one, to_hash))
+        else:
+            hashed = [hash_one(rel_path) for rel_path in to_hash]
+        diff.hashed = len(hashed)
+
+        dirty_dirs = set()
+        for rel_path, digest in hashed:
+            if digest is None:
+                stats.pop(rel_path, None)
+                continue
+            st = stats[rel_path]
+            previous = self.files.get(rel_path)
+            if previous is None:
+                diff.added.append(rel_path)
+            elif previous[3] != digest:
+                diff.modified.append(rel_path)
+            # racy: the file may change again within the mtime granularity without its stat changing
+            mtime_ns = -1 if now_ns - st.st_mtime_ns < RACY_WINDOW_NS else st.st_mtime_ns
+            self.files[rel_path] = [mtime_ns, st.st_size, st.st_ino, digest]
+            if previous is None or previous[3] != digest:
+                dirty_dirs.add(rel_path.rpartition("/")[0])
+
+        for rel_path in list(self.files):
+            if rel_path not in stats:
+                diff.removed.append(rel_path)
+                del self.files[rel_path]
+                dirty_dirs.add(rel_path.rpartition("/")[0])
+
+        self._update_dir_hashes(listings, dirty_dirs)
+        diff.root_hash = self.root_hash
+        diff.files = len(self.files)
+        diff.added.sort()
+        diff.modified.sort()
+        diff.removed.sort()
+        if diff.has_changes or to_hash:
+            self._save()
+        diff.duration = time.perf_counter() - start
+        return diff
+
+    def _update_dir_hashes(self, listings: Dict[str, List[Tuple[str, bool]]], dirty_dirs: set):
+        """Recompute hashes of changed directories and their ancestors, deepest first"""
+        # directories that appeared or disappeared dirty their parent
+        for rel_dir in listings:
+            if rel_dir not in self.dirs:
+                dirty_dirs.add(rel_dir)
+        for rel_dir in list(self.dirs):
+            if rel_dir not in listings:
+                del self.dirs[rel_dir]
+                if rel_dir:
+                    dirty_dirs.add(rel_dir.rpartition("/")[0])
+
+        # propagate to every ancestor
+        for rel_dir in list(dirty_dirs):
+            while rel_dir:
+                rel_dir = rel_dir.rpartition("/")[0]
+                dirty_dirs.add(rel_dir)
+
+        for rel_dir in sorted((d for d in dirty_dirs if d in listings), key=lambda d: d.count("/") if d else -1, reverse=True):
+            prefix = f"{rel_dir}/" if rel_dir else ""
+            digest = hashlib.sha256()
+            for name, is_dir in sorted(listings[rel_dir]):
+                child = self.dirs.get(prefix + name, "") if is_dir else self.files.get(prefix + name, [0, 0, 0, ""])[3]
+                digest.update(f"{'d' if is_dir else 'f'}\0{name}\0{child}\n".encode("utf-8"))
+            self.dirs[rel_dir] = digest.hexdigest()
+        self.root_hash = self.dirs.get("", "")
+
+
+# MARK: Benchmark
+def _make_tree(root: str, files: int, per_dir: int = 100):
+    for i in range(files):
+        directory = os.path.join(root, f"pkg{i // (per_dir * 10)}", f"mod{(i // per_dir) % 10}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"f{i}.py"), "w") as f:
+            f.write(f"value = {i}\n")
+
+
+def measure_unchanged_recheck(root: str) -> Dict[str, float]:
+    """Time a full index against a re-check of the unchanged tree, which should only stat"""
+    with tempfile.TemporaryDirectory() as index_dir:
+        index_file = Path(index_dir) / "index.json"
+        start = time.perf_counter()
+        first = MerkleIndex(root, index_file=index_file).update()
+        full = time.perf_counter() - start
+
+        # files written within the racy window get rehashed once more, let them settle
+        time.sleep(max(0.0, RACY_WINDOW_NS / 1e9 - full))
+        MerkleIndex(root, index_file=index_file).update()
+
+        start = time.perf_counter()
+        index = MerkleIndex(root, index_file=index_file)
+        loaded = time.perf_counter() - start
+        recheck = index.update()
+        return {
+            "files": first.files,
+            "full_index": full,
+            "load": loaded,
+            "recheck": recheck.duration,
+            "recheck_stat_calls": recheck.stat_calls,
+            "recheck_hashed": recheck.hashed,
+            "unchanged": recheck.root_hash == first.root_hash and not recheck.has_changes,
+        }
+
+
+if __name__ == "__main__":
+    # usage: python -m core.merkle_index [directory], defaults to a generated 50k file tree
+    if len(sys.argv) > 1:
+        results = measure_unchanged_recheck(sys.argv[1])
+    else:
+        with tempfile.TemporaryDirectory() as tree:
+            _make_tree(tree, 50_000)
+            results = measure_unchanged_recheck(tree)
+    for name, value in results.items():
+        print(f"{name}: {value * 1000:.1f} ms" if isinstance(value, float) else f"{name}: {value}")
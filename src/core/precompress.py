@@ -0,0 +1,181 @@
+import gzip
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from utils.utils import app_data_dir, format_bytes
+from core.merkle_index import MerkleIndex
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, only .gz variants are produced without it
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = {
+    ".js", ".mjs", ".css", ".html", ".htm", ".json", ".map", ".wasm", ".svg",
+    ".txt", ".xml", ".ttf", ".otf", ".ico", ".py", ".tar", ".frag", ".symbols",
+}
+MIN_SIZE = 1024  # smaller files gain nothing once headers are counted
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+VARIANT_EXCLUDES = ["*.gz", "*.br"]
+
+
+def is_available_brotli() -> bool:
+    return brotli is not None
+
+
+@dataclass
+class TypeReport:
+    files: int = 0
+    original_bytes: int = 0
+    gzip_bytes: int = 0
+    brotli_bytes: int = 0
+    seconds: float = 0.0
+
+    def ratio(self, compressed: int) -> float:
+        return compressed / self.original_bytes if self.original_bytes else 1.0
+
+
+@dataclass
+class PrecompressReport:
+    by_type: Dict[str, TypeReport] = field(default_factory=dict)
+    compressed: int = 0
+    skipped: int = 0  # unchanged since the last run
+    duration: float = 0.0
+
+    def summary(self) -> str:
+        lines = [f"Precompressed {self.compressed} files, {self.skipped} unchanged, in {self.duration:.2f}s"]
+        for ext, item in sorted(self.by_type.items(), key=lambda kv: kv[1].original_bytes, reverse=True):
+            line = (
+                f"  {ext:<8} {item.files:>4} files  {format_bytes(item.original_bytes):>9}"
+                f"  gz {item.ratio(item.gzip_bytes):.0%}"
+            )
+            if item.brotli_bytes:
+                line += f"  br {item.ratio(item.brotli_bytes):.0%}"
+            lines.append(line + f"  {item.seconds:.2f}s")
+        return "\n".join(lines)
+
+
+def _write_variant(path: str, data: bytes, original_size: int) -> int:
+    """Write a compressed sibling if it is smaller than the original, returns its size or 0"""
+    if len(data) >= original_size:
+        if os.path.exists(path):
+            os.remove(path)
+        return 0
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return len(data)
+
+
+def _remove_variants(path: str):
+    for suffix in (".gz", ".br"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def _compress(path: str, use_brotli: bool) -> Tuple[str, int, int, int, float]:
+    """Write .gz (and .br) siblings for one file, runs in a worker process"""
+    start = time.perf_counter()
+    with open(path, "rb") as f:
+        data = f.read()
+    # mtime=0 keeps the output identical for identical input
+    gzip_size = _write_variant(path + ".gz", gzip.compress(data, GZIP_LEVEL, mtime=0), len(data))
+    brotli_size = 0
+    if use_brotli and brotli is not None:
+        brotli_size = _write_variant(path + ".br", brotli.compress(data, quality=BROTLI_QUALITY), len(data))
+    return path, len(data), gzip_size, brotli_size, time.perf_counter() - start
+
+
+def _is_compressible(rel_path: str, size: int) -> bool:
+    return os.path.splitext(rel_path)[1].lower() in COMPRESSIBLE_EXTENSIONS and size >= MIN_SIZE
+
+
+def precompress(root: str, use_brotli: bool = True, max_workers: Optional[int] = None) -> PrecompressReport:
+    """
+    Produce .gz/.br siblings for the compressible files of a web build
+
+    Files whose content hash is unchanged since the last run keep their variants, which are
+    only touched so servers don't consider them older than the rewritten source.
+    """
+    start = time.perf_counter()
+    report = PrecompressReport()
+    index = MerkleIndex(root, exclude=VARIANT_EXCLUDES)
+    diff = index.update()
+    use_brotli = use_brotli and brotli is not None
+
+    # rel path -> [sha256, has .gz, has .br, brotli tried] as of the last run, so incompressible files are skipped too
+    state_file = app_data_dir("precompress") / f"{hashlib.sha1(index.root.encode('utf-8')).hexdigest()}.json"
+    state: Dict[str, list] = {}
+    if state_file.exists():
+        try:
+            with open(state_file, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Error loading precompress state: {e}")
+
+    # variants of sources that no longer exist
+    for rel_path in diff.removed:
+        _remove_variants(os.path.join(index.root, rel_path))
+
+    to_compress: List[str] = []
+    for rel_path, record in index.files.items():
+        if not _is_compressible(rel_path, record[1]):
+            # e.g. shrunk below MIN_SIZE: hosts serving variants without an mtime check would keep the old content
+            state.pop(rel_path, None)
+            _remove_variants(os.path.join(index.root, rel_path))
+            continue
+        path = os.path.join(index.root, rel_path)
+        previous = state.get(rel_path)
+        expected = []
+        if previous and previous[0] == record[3]:
+            expected = ([path + ".gz"] if previous[1] else []) + ([path + ".br"] if previous[2] and use_brotli else [])
+        # unchanged content whose variants are all still there (a clean rebuild deletes them)
+        if previous is None or previous[0] != record[3] or (use_brotli and not previous[3]) \
+                or not all(os.path.exists(v) for v in expected):
+            to_compress.append(path)
+            continue
+        report.skipped += 1
+        for variant in expected:
+            os.utime(variant)
+
+    if to_compress:
+        if len(to_compress) > 1:
+            # spawned, forking from the thread this runs in can copy locks held by other threads
+            with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                results = list(pool.map(_compress, to_compress, [use_brotli] * len(to_compress)))
+        else:
+            results = [_compress(to_compress[0], use_brotli)]
+        for path, original, gzip_size, brotli_size, seconds in results:
+            rel_path = os.path.relpath(path, index.root).replace(os.sep, "/")
+            state[rel_path] = [index.files[rel_path][3], bool(gzip_size), bool(brotli_size), use_brotli]
+            ext = os.path.splitext(path)[1].lower()
+            item = report.by_type.setdefault(ext, TypeReport())
+            item.files += 1
+            item.original_bytes += original
+            item.gzip_bytes += gzip_size or original
+            item.brotli_bytes += (brotli_size or original) if use_brotli else 0
+            item.seconds += seconds
+            report.compressed += 1
+
+    state = {rel_path: entry for rel_path, entry in state.items() if rel_path in index.files}
+    try:
+        with open(state_file, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+    except IOError as e:
+        print(f"Error saving precompress state: {e}")
+
+    report.duration = time.perf_counter() - start
+    return report
+
+
+if __name__ == "__main__":
+    # usage: python -m core.precompress <web build output>
+    import sys
+    print(precompress(sys.argv[1] if len(sys.argv) > 1 else "build/web").summary())
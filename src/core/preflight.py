@@ -0,0 +1,150 @@
+import asyncio
+import tempfile
+import time
+from dataclasses import dataclass
+from os.path import expanduser
+from pathlib import Path
+from typing import Callable, List, Tuple
+from ui.components.form import FormState
+from utils.utils import Platform
+from core.toolchain import ToolchainIndex, TOOL_NAMES
+
+DEFAULT_BUDGET_MS = 500
+
+CheckOutcome = Tuple[str, str]  # (status, message)
+
+
+@dataclass
+class PreflightResult:
+    name: str
+    status: str  # PASSED, WARNING, FAILED or TIMEOUT
+    message: str = ""
+    duration: float = 0.0  # seconds
+
+    @property
+    def failed(self) -> bool:
+        return self.status == "FAILED"
+
+
+def project_dir(form_state: FormState) -> Path:
+    return Path(expanduser(form_state.python_app_path or ".")).resolve()
+
+
+def app_dir(form_state: FormState) -> Path:
+    """Directory containing the app module, relative to the project directory"""
+    return project_dir(form_state) / (form_state.app_path or "")
+
+
+def output_dir(form_state: FormState) -> Path:
+    """Output directory flet build will write to"""
+    if form_state.output_directory:
+        return Path(expanduser(form_state.output_directory))
+    platform = form_state.selected_platform.cmd_value if form_state.selected_platform else ""
+    return project_dir(form_state) / "build" / platform
+
+
+def _check_project_dir(form_state: FormState) -> CheckOutcome:
+    directory = project_dir(form_state)
+    if not directory.is_dir():
+        return "FAILED", f"{directory} is not a directory"
+    return "PASSED", str(directory)
+
+
+def _check_app_path(form_state: FormState) -> CheckOutcome:
+    directory = app_dir(form_state)
+    if not directory.is_dir():
+        return "FAILED", f"app path {directory} does not exist"
+    return "PASSED", str(directory)
+
+
+def _check_module(form_state: FormState) -> CheckOutcome:
+    module_name = form_state.module_name or "main"
+    directory = app_dir(form_state)
+    for candidate in (directory / f"{module_name}.py", directory / module_name / "__main__.py"):
+        if candidate.is_file():
+            return "PASSED", str(candidate)
+    return "FAILED", f"module {module_name}.py not found in {directory}"
+
+
+def _check_icon(form_state: FormState) -> CheckOutcome:
+    icon = Path(expanduser(form_state.app_icon))
+    if not icon.is_file():
+        return "FAILED", f"icon {icon} does not exist"
+    return "PASSED", str(icon)
+
+
+def _check_android_toolchain(form_state: FormState) -> CheckOutcome:
+    index = ToolchainIndex.load()
+    _, missing = index.missing_requirements(form_state.selected_platform)
+    if missing:
+        names = ", ".join(TOOL_NAMES[t] for t in missing)
+        return "WARNING", f"{names} not found, flet build will install it"
+    sdk = index.get("android_sdk")
+    return "PASSED", f"{sdk.path} {sdk.version}".strip()
+
+
+def _check_output_dir(form_state: FormState) -> CheckOutcome:
+    directory = output_dir(form_state)
+    # the directory may not exist yet, check the closest existing parent
+    existing = directory
+    while not existing.exists() and existing != existing.parent:
+        existing = existing.parent
+    if not existing.is_dir():
+        return "FAILED", f"{existing} is not a directory"
+    try:
+        with tempfile.TemporaryFile(dir=existing):
+            pass
+    except OSError as e:
+        return "FAILED", f"{existing} is not writable: {e}"
+    return "PASSED", str(directory)
+
+
+def preflight_checks(form_state: FormState) -> List[Tuple[str, Callable[[FormState], CheckOutcome]]]:
+    """Independent checks derived from the current form state"""
+    checks = [
+        ("project directory", _check_project_dir),
+        ("module", _check_module),
+        ("output directory", _check_output_dir),
+    ]
+    if form_state.app_path:
+        checks.append(("app path", _check_app_path))
+    if form_state.app_icon:
+        checks.append(("icon", _check_icon))
+    if form_state.selected_platform in (Platform.ANDROID_APK, Platform.ANDROID_AAP):
+        checks.append(("android toolchain", _check_android_toolchain))
+    return checks
+
+
+async def _run_check(name: str, check: Callable[[FormState], CheckOutcome], form_state: FormState, deadline: float) -> PreflightResult:
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    try:
+        status, message = await asyncio.wait_for(
+            asyncio.to_thread(check, form_state),
+            timeout=max(0.0, deadline - loop.time()),
+        )
+    except asyncio.TimeoutError:
+        status, message = "TIMEOUT", "check did not finish within the time budget"
+    except Exception as e:
+        status, message = "FAILED", str(e)
+    return PreflightResult(name, status, message, time.perf_counter() - start)
+
+
+async def run_preflight(form_state: FormState, budget_ms: int = DEFAULT_BUDGET_MS) -> List[PreflightResult]:
+    """Run all pre-flight checks concurrently within a total time budget"""
+    deadline = asyncio.get_running_loop().time() + budget_ms / 1000
+    return await asyncio.gather(*(
+        _run_check(name, check, form_state, deadline)
+        for name, check in preflight_checks(form_state)
+    ))
+
+
+def format_preflight_report(results: List[PreflightResult]) -> str:
+    symbols = {"PASSED": "✓", "WARNING": "!", "FAILED": "✗", "TIMEOUT": "…"}
+    lines = [
+        f"{symbols.get(r.status, '?')} {r.name} ({r.duration * 1000:.1f} ms){': ' + r.message if r.status != 'PASSED' else ''}"
+        for r in results
+    ]
+    total = max((r.duration for r in results), default=0.0)
+    lines.append(f"Pre-flight finished in {total * 1000:.1f} ms")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,213 @@
+import asyncio
+import mimetypes
+import os
+from dataclasses import dataclass
+from email.utils import formatdate, parsedate_to_datetime
+from typing import BinaryIO, Dict, Optional, Tuple
+from urllib.parse import unquote
+from utils.utils import format_bytes
+
+# precompressed variants, in order of preference
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+mimetypes.add_type("application/wasm", ".wasm")
+mimetypes.add_type("text/javascript", ".mjs")
+
+
+@dataclass
+class PreviewStats:
+    requests: int = 0
+    bytes_sent: int = 0
+    not_modified: int = 0
+    precompressed: int = 0  # responses served from a .br/.gz variant
+    connections: int = 0  # currently open
+
+    def summary(self) -> str:
+        return (
+            f"{self.requests} requests · {format_bytes(self.bytes_sent)} sent · "
+            f"{self.not_modified} cached · {self.precompressed} compressed"
+        )
+
+
+def _accepted_encodings(header: str) -> set:
+    accepted = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0"):
+            continue
+        if name:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+class PreviewServer:
+    """Static file server for web build output, serving precompressed variants with sendfile"""
+    def __init__(self, root: str, host: str = "127.0.0.1", port: int = 0):
+        self.root = os.path.realpath(os.path.expanduser(root))
+        self.host = host
+        self.port = port
+        self.stats = PreviewStats()
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/"
+
+    @property
+    def running(self) -> bool:
+        return self._server is not None
+
+    async def start(self):
+        if self._server is not None:
+            return
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server is None:
+            return
+        self._server.close()
+        await self._server.wait_closed()
+        self._server = None
+
+    def _resolve(self, target: str) -> Optional[str]:
+        """Map a request path to a file under root, index.html for directories and client side routes"""
+        path = unquote(target.split("?", 1)[0].split("#", 1)[0])
+        candidate = os.path.realpath(os.path.join(self.root, path.lstrip("/")))
+        if candidate != self.root and not candidate.startswith(self.root + os.sep):
+            return None  # outside the served directory
+        if os.path.isdir(candidate):
+            candidate = os.path.join(candidate, "index.html")
+        if os.path.isfile(candidate):
+            return candidate
+        # flet apps route on the client, unknown extension-less paths get the app shell
+        if not os.path.splitext(path)[1]:
+            index = os.path.join(self.root, "index.html")
+            return index if os.path.isfile(index) else None
+        return None
+
+    def _select_variant(self, path: str, accept_encoding: str) -> Tuple[str, str, os.stat_result]:
+        """Return (file to send, content encoding, its stat), preferring an up to date .br or .gz"""
+        source_stat = os.stat(path)
+        accepted = _accepted_encodings(accept_encoding)
+        for encoding, suffix in ENCODINGS:
+            if encoding not in accepted:
+                continue
+            try:
+                variant_stat = os.stat(path + suffix)
+            except OSError:
+                continue
+            # a variant older than its source is stale
+            if variant_stat.st_mtime_ns >= source_stat.st_mtime_ns:
+                return path + suffix, encoding, variant_stat
+        return path, "", source_stat
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.stats.connections += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split(" ", 2)
+                except ValueError:
+                    break
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                self.stats.requests += 1
+                await self._respond(writer, method, target, headers)
+
+                # request bodies are never read, a connection that sent one can't be reused
+                has_body = headers.get("content-length", "0").strip() != "0" or "transfer-encoding" in headers
+                keep_alive = (
+                    headers.get("connection", "").lower() != "close" and version.strip() == "HTTP/1.1"
+                    and method in ("GET", "HEAD") and not has_body
+                )
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.stats.connections -= 1
+            writer.close()
+
+    async def _send_head(self, writer: asyncio.StreamWriter, status: str, headers: Dict[str, str]):
+        lines = [f"HTTP/1.1 {status}"] + [f"{name}: {value}" for name, value in headers.items()]
+        data = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+        writer.write(data)
+        self.stats.bytes_sent += len(data)
+        await writer.drain()
+
+    async def _respond(self, writer: asyncio.StreamWriter, method: str, target: str, headers: Dict[str, str]):
+        if method not in ("GET", "HEAD"):
+            await self._send_head(writer, "405 Method Not Allowed", {"Content-Length": "0", "Allow": "GET, HEAD", "Connection": "close"})
+            return
+        path = self._resolve(target)
+        if path is None:
+            await self._send_not_found(writer, method)
+            return
+        try:
+            file_path, encoding, _ = self._select_variant(path, headers.get("accept-encoding", ""))
+            f = open(file_path, "rb")
+        except OSError:
+            # removed since _resolve, normal while watch mode rebuilds the output
+            await self._send_not_found(writer, method)
+            return
+        with f:
+            await self._send_file(writer, method, headers, path, f, encoding)
+
+    async def _send_not_found(self, writer: asyncio.StreamWriter, method: str):
+        body = b"not found"
+        await self._send_head(writer, "404 Not Found", {"Content-Type": "text/plain", "Content-Length": str(len(body))})
+        if method == "GET":
+            writer.write(body)
+            self.stats.bytes_sent += len(body)
+
+    async def _send_file(self, writer: asyncio.StreamWriter, method: str, headers: Dict[str, str], path: str, f: BinaryIO, encoding: str):
+        # the open file's own stat, the path may have been replaced since the variant was picked
+        st = os.fstat(f.fileno())
+        etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}{"-" + encoding if encoding else ""}"'
+        response_headers = {
+            "Content-Type": mimetypes.guess_type(path)[0] or "application/octet-stream",
+            "ETag": etag,
+            "Last-Modified": formatdate(st.st_mtime, usegmt=True),
+            "Cache-Control": "no-cache",  # always revalidate, the build output changes under us
+            "Vary": "Accept-Encoding",
+        }
+        if encoding:
+            response_headers["Content-Encoding"] = encoding
+
+        if self._not_modified(headers, etag, st.st_mtime):
+            self.stats.not_modified += 1
+            await self._send_head(writer, "304 Not Modified", response_headers)
+            return
+
+        response_headers["Content-Length"] = str(st.st_size)
+        await self._send_head(writer, "200 OK", response_headers)
+        if method == "HEAD":
+            return
+        if encoding:
+            self.stats.precompressed += 1
+        # zero-copy os.sendfile where the transport supports it, asyncio falls back to read/write
+        sent = await asyncio.get_running_loop().sendfile(writer.transport, f, 0, st.st_size)
+        self.stats.bytes_sent += sent
+
+    @staticmethod
+    def _not_modified(headers: Dict[str, str], etag: str, mtime: float) -> bool:
+        if_none_match = headers.get("if-none-match")
+        if if_none_match is not None:
+            return etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+        if_modified_since = headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
@@ -0,0 +1,44 @@
+import asyncio
+import os
+import signal
+import subprocess
+from typing import Awaitable, Callable
+
+TERMINATE_GRACE_SECONDS = 5.0  # time a cancelled build gets to exit on SIGTERM before it is killed
+
+
+def session_kwargs() -> dict:
+    """Popen arguments that start a process as the leader of its own group, so its tree can be killed as one"""
+    if os.name == "nt":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+def signal_process_tree(pid: int, force: bool = False):
+    """Signal the process group led by pid: SIGTERM, or SIGKILL when forced. On windows the tree is always killed"""
+    if os.name == "nt":
+        subprocess.run(["taskkill", "/T", "/F", "/PID", str(pid)], capture_output=True)
+        return
+    try:
+        os.killpg(pid, signal.SIGKILL if force else signal.SIGTERM)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+async def terminate_process_tree(pid: int, wait: Callable[[], Awaitable], grace: float = TERMINATE_GRACE_SECONDS):
+    """
+    Stop the group led by pid: SIGTERM, wait up to grace seconds for the leader, then SIGKILL
+    what is left of the group, children that ignored SIGTERM or outlived the leader included
+    """
+    if os.name == "nt":
+        # taskkill only walks the tree while its root is alive, so there is no graceful step
+        await asyncio.to_thread(signal_process_tree, pid, True)
+        await wait()
+        return
+    signal_process_tree(pid)
+    try:
+        await asyncio.wait_for(wait(), grace)
+    except asyncio.TimeoutError:
+        pass
+    signal_process_tree(pid, force=True)
+    await wait()
@@ -0,0 +1,356 @@
+import copy
+import hashlib
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+PARALLEL_FRONTIER = 32  # scan a directory level in parallel once it has this many directories
+DEFAULT_MAX_AGE = 2.0  # seconds a scan is reused before checking the tree again
+
+
+@dataclass
+class DirEntry:
+    mtime_ns: int
+    dirs: List[str]
+    files: Dict[str, int]  # name -> size
+    names_blob: str = ""  # "\n" joined file names, matched with a single regex call
+    bytes: int = 0
+    # totals of the whole subtree, filled in after each scan
+    tree_files: int = 0
+    tree_bytes: int = 0
+
+    def __post_init__(self):
+        self.names_blob = "\n".join(self.files)
+        self.bytes = sum(self.files.values())
+
+
+@dataclass
+class ScanPreview:
+    included_files: int = 0
+    included_bytes: int = 0
+    excluded_files: int = 0
+    excluded_bytes: int = 0
+    duration: float = 0.0  # seconds spent matching
+
+
+def _glob_to_regex(glob: str) -> str:
+    """Translate a glob to an unanchored regex that never crosses '/' or newlines"""
+    parts, i = [], 0
+    while i < len(glob):
+        c = glob[i]
+        if c == "*":
+            if glob[i:i + 2] == "**":
+                parts.append("[^\n]*")
+                i += 1
+            else:
+                parts.append("[^/\n]*")
+        elif c == "?":
+            parts.append("[^/\n]")
+        elif c == "[":
+            end = glob.find("]", i + 1)
+            if end == -1:
+                parts.append(re.escape(c))
+            else:
+                body = glob[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                parts.append(f"[{body}]")
+                i = end
+        else:
+            parts.append(re.escape(c))
+        i += 1
+    return "".join(parts)
+
+
+class ExcludeMatcher:
+    """
+    Compiles exclude patterns into single regexes
+
+    - "name" or "*.ext" matches a file or directory name anywhere in the tree
+    - "name/" matches directories only
+    - "dir/sub" or "/dir" matches a path relative to the scanned root
+    """
+    def __init__(self, patterns: List[str]):
+        name, dir_name, path = [], [], []
+        # path patterns split at the last "/" into (directory regex, name regex)
+        self._split_paths: List[Tuple["re.Pattern", str]] = []
+        self._deep_paths = False  # a "**" pattern that can't be split
+        for pattern in patterns:
+            pattern = pattern.strip().replace("\\", "/")
+            if not pattern:
+                continue
+            is_dir = pattern.endswith("/")
+            anchored = pattern.startswith("/")
+            pattern = pattern.strip("/")
+            if not pattern:
+                continue
+            regex = _glob_to_regex(pattern)
+            if anchored or "/" in pattern:
+                path.append(regex)
+                dir_glob, _, name_glob = pattern.rpartition("/")
+                if "**" in name_glob:
+                    self._deep_paths = True
+                else:
+                    self._split_paths.append((re.compile(_glob_to_regex(dir_glob) + r"\Z"), _glob_to_regex(name_glob)))
+            elif is_dir:
+                dir_name.append(regex)
+            else:
+                name.append(regex)
+
+        self._name = self._compile(name)
+        self._dir_name = self._compile(name + dir_name)
+        self._path = self._compile(path)
+        self._dir_name_regexes: Dict[str, Optional["re.Pattern"]] = {}
+
+    @staticmethod
+    def _compile(regexes: List[str]):
+        if not regexes:
+            return None
+        return re.compile("^(?:" + "|".join(regexes) + ")$", re.MULTILINE)
+
+    def dir_excluded(self, rel_path: str) -> bool:
+        name = rel_path.rsplit("/", 1)[-1]
+        return bool(
+            (self._dir_name and self._dir_name.match(name))
+            or (self._path and self._path.match(rel_path))
+        )
+
+    def path_excluded(self, rel_path: str, is_dir: bool = False) -> bool:
+        """Whether a single path, or any directory above it, is excluded"""
+        parts = rel_path.split("/")
+        for i in range(1, len(parts) if not is_dir else len(parts) + 1):
+            if self.dir_excluded("/".join(parts[:i])):
+                return True
+        if is_dir:
+            return False
+        return bool(
+            (self._name and self._name.match(parts[-1]))
+            or (self._path and self._path.match(rel_path))
+        )
+
+    def excluded_files(self, rel_dir: str, entry: DirEntry) -> List[str]:
+        """Names of the files of a directory matched by the patterns"""
+        if not entry.files:
+            return []  # an empty blob would match patterns like "*"
+        matched = set(self._name.findall(entry.names_blob)) if self._name else set()
+        if self._split_paths:
+            # only the name part of path patterns whose directory part matches applies here
+            names = [name for dir_regex, name in self._split_paths if dir_regex.match(rel_dir)]
+            if names:
+                key = "|".join(names)
+                if key not in self._dir_name_regexes:
+                    self._dir_name_regexes[key] = self._compile(names)
+                matched.update(self._dir_name_regexes[key].findall(entry.names_blob))
+        if self._deep_paths:
+            prefix = f"{rel_dir}/" if rel_dir else ""
+            matched.update(name for name in entry.files if self._path.match(prefix + name))
+        return list(matched)
+
+
+class ProjectScanner:
+    """Walks a project tree with os.scandir, cached and updated incrementally"""
+    def __init__(self, root: str, max_workers: Optional[int] = None):
+        self.root = os.path.abspath(os.path.expanduser(root))
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) * 4)
+        self.dirs: Dict[str, DirEntry] = {}
+        self.scanned_at = 0.0
+        self.last_scan_duration = 0.0
+        self._lock = threading.Lock()
+
+    def _abs(self, rel_path: str) -> str:
+        return os.path.join(self.root, rel_path) if rel_path else self.root
+
+    def _scan_dir(self, rel_path: str) -> Tuple[str, Optional[DirEntry]]:
+        """
+        Scan one directory, reusing the cached listing while its mtime is unchanged
+
+        Files of unchanged directories are not stat'ed again, so a file rewritten in
+        place keeps its previous size until something is added, removed or renamed
+        next to it. Previews are estimates and keystrokes rescan, stat'ing every file
+        of the tree each time costs more than the staleness.
+        """
+        path = self._abs(rel_path)
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return rel_path, None
+        cached = self.dirs.get(rel_path)
+        if cached and cached.mtime_ns == mtime_ns:
+            # a copy: the new scan fills in its tree totals while previews may still read the published one
+            return rel_path, copy.copy(cached)
+
+        dirs, files = [], {}
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            dirs.append(entry.name)
+                        elif entry.is_file(follow_symlinks=False):
+                            files[entry.name] = entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        continue
+        except OSError:
+            return rel_path, None
+        return rel_path, DirEntry(mtime_ns=mtime_ns, dirs=dirs, files=files)
+
+    def scan(self, max_age: float = DEFAULT_MAX_AGE) -> Dict[str, DirEntry]:
+        """Return the tree listing, listing again only directories whose mtime changed"""
+        with self._lock:
+            if self.dirs and time.monotonic() - self.scanned_at < max_age:
+                return self.dirs
+
+            start = time.perf_counter()
+            scanned: Dict[str, DirEntry] = {}
+            frontier = [""]
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                while frontier:
+                    if len(frontier) >= PARALLEL_FRONTIER:
+                        results = pool.map(self._scan_dir, frontier)
+                    else:
+                        results = map(self._scan_dir, frontier)
+                    frontier = []
+                    for rel_path, entry in results:
+                        if entry is None:
+                            continue
+                        scanned[rel_path] = entry
+                        prefix = f"{rel_path}/" if rel_path else ""
+                        frontier.extend(prefix + name for name in entry.dirs)
+
+            self._compute_tree_totals(scanned)
+            self.dirs = scanned
+            self.scanned_at = time.monotonic()
+            self.last_scan_duration = time.perf_counter() - start
+            return self.dirs
+
+    @staticmethod
+    def _compute_tree_totals(dirs: Dict[str, DirEntry]):
+        """Fill in subtree totals, on a scan's own entries before it is published"""
+        # deepest directories first so children are summed before their parents
+        for rel_path in sorted(dirs, key=lambda p: p.count("/") if p else -1, reverse=True):
+            entry = dirs[rel_path]
+            entry.tree_files = len(entry.files)
+            entry.tree_bytes = entry.bytes
+            prefix = f"{rel_path}/" if rel_path else ""
+            for name in entry.dirs:
+                child = dirs.get(prefix + name)
+                if child:
+                    entry.tree_files += child.tree_files
+                    entry.tree_bytes += child.tree_bytes
+
+    def tree_hash(self, max_age: float = DEFAULT_MAX_AGE) -> str:
+        """Hash of the tree's shape, every directory's mtime and size, for caching derived results"""
+        dirs = self.scan(max_age)
+        digest = hashlib.sha1(self.root.encode("utf-8"))
+        for rel_path in sorted(dirs):
+            entry = dirs[rel_path]
+            digest.update(f"\0{rel_path}:{entry.mtime_ns}:{len(entry.files)}:{entry.bytes}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def preview(self, patterns: List[str], max_age: float = DEFAULT_MAX_AGE) -> ScanPreview:
+        """Count files and bytes included and excluded by the patterns"""
+        dirs = self.scan(max_age)
+        start = time.perf_counter()
+        matcher = ExcludeMatcher(patterns)
+        result = ScanPreview()
+
+        stack = [""]
+        while stack:
+            rel_path = stack.pop()
+            entry = dirs.get(rel_path)
+            if entry is None:
+                continue
+            if rel_path and matcher.dir_excluded(rel_path):
+                # the whole subtree is excluded, use its precomputed totals
+                result.excluded_files += entry.tree_files
+                result.excluded_bytes += entry.tree_bytes
+                continue
+
+            excluded = matcher.excluded_files(rel_path, entry)
+            excluded_bytes = sum(entry.files[name] for name in excluded)
+            result.excluded_files += len(excluded)
+            result.excluded_bytes += excluded_bytes
+            result.included_files += len(entry.files) - len(excluded)
+            result.included_bytes += entry.bytes - excluded_bytes
+
+            prefix = f"{rel_path}/" if rel_path else ""
+            stack.extend(prefix + name for name in entry.dirs)
+
+        result.duration = time.perf_counter() - start
+        return result
+
+    def preview_each(self, patterns: List[str], max_age: float = DEFAULT_MAX_AGE) -> List[ScanPreview]:
+        """
+        What each pattern excludes on its own, counted in a single walk of the tree
+
+        Name patterns ("name", "*.ext", "name/") share one regex, a name matched by several
+        of them counts for the first. Path patterns fall back to a preview of their own.
+        """
+        dirs = self.scan(max_age)
+        start = time.perf_counter()
+        results = [ScanPreview() for _ in patterns]
+        dir_groups, file_groups, path_patterns = [], [], []
+        for i, pattern in enumerate(patterns):
+            pattern = pattern.strip().replace("\\", "/")
+            name = pattern.rstrip("/")
+            if not name:
+                continue
+            if "/" in name:
+                path_patterns.append(i)
+                continue
+            group = f"(?P<p{i}>{_glob_to_regex(name)})"
+            dir_groups.append(group)
+            if not pattern.endswith("/"):
+                file_groups.append(group)
+        dir_regex = re.compile("^(?:" + "|".join(dir_groups) + ")$") if dir_groups else None
+        file_regex = re.compile("^(?:" + "|".join(file_groups) + ")$", re.MULTILINE) if file_groups else None
+
+        # (directory, patterns excluding it through one of its parents)
+        stack: List[Tuple[str, frozenset]] = [("", frozenset())]
+        while stack:
+            rel_path, active = stack.pop()
+            entry = dirs.get(rel_path)
+            if entry is None:
+                continue
+            match = dir_regex.match(rel_path.rsplit("/", 1)[-1]) if rel_path and dir_regex else None
+            if match and int(match.lastgroup[1:]) not in active:
+                index = int(match.lastgroup[1:])
+                results[index].excluded_files += entry.tree_files
+                results[index].excluded_bytes += entry.tree_bytes
+                active = active | {index}
+            if file_regex and entry.files:
+                for match in file_regex.finditer(entry.names_blob):
+                    index = int(match.lastgroup[1:])
+                    if index not in active:
+                        results[index].excluded_files += 1
+                        results[index].excluded_bytes += entry.files[match.group(0)]
+            prefix = f"{rel_path}/" if rel_path else ""
+            stack.extend((prefix + name, active) for name in entry.dirs)
+
+        root = dirs.get("")
+        duration = time.perf_counter() - start
+        for result in results:
+            if root is not None:
+                result.included_files = root.tree_files - result.excluded_files
+                result.included_bytes = root.tree_bytes - result.excluded_bytes
+            result.duration = duration
+        for i in path_patterns:
+            results[i] = self.preview([patterns[i]], max_age)
+        return results
+
+
+_scanners: Dict[str, ProjectScanner] = {}
+_scanners_lock = threading.Lock()
+
+
+def get_scanner(root: str) -> ProjectScanner:
+    """Shared scanner for a root, so its cache survives between previews"""
+    key = os.path.abspath(os.path.expanduser(root))
+    with _scanners_lock:
+        if key not in _scanners:
+            _scanners[key] = ProjectScanner(key)
+        return _scanners[key]
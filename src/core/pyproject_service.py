@@ -54,7 +54,8 @@ class PyProjectService:
             "android_key_alias": ["tool.flet.android.signing.key_alias"],
             "macos_entitlements": ["tool.flet.macos.entitlement"],
             "macos_info_plist": ["tool.flet.macos.info"],
-            "exclude_additional_files": ["tool.flet.app.exclude"]
+            "exclude_additional_files": ["tool.flet.app.exclude"],
+            "size_budgets": ["tool.fletfactory.size_budgets"]
         }
         
         invert_logic = {
@@ -132,10 +133,9 @@ class PyProjectService:
                 # dict format to list format
                 for dep_name, dep_version in dependencies.items():
                     if dep_name != "python": # skip python dep (?)
-                        if isinstance(dep_version, str):
-                            dep_list.append(f"{dep_name}=={dep_version}")
-                        else:
-                            dep_list.append(dep_name)
+                        if isinstance(dep_version, dict):
+                            dep_version = dep_version.get("version", "")
+                        dep_list.append(PyProjectService._poetry_requirement(dep_name, dep_version))
             
             if dep_list:
                 for name, field_def in field_registry.field_definitions.items():
@@ -146,6 +146,36 @@ class PyProjectService:
                             ref.current.value = dep_list
                         break
     
+    @staticmethod
+    def _poetry_requirement(name: str, constraint: Any) -> str:
+        """
+        A PEP 508 requirement from a poetry dependency, e.g. ("flet", "^0.27.1") -> "flet>=0.27.1,<0.28.0"
+
+        Caret and tilde constraints have no PEP 440 equivalent and are expanded to a range;
+        alternatives ("||") can't be expressed in one specifier, they are left unconstrained.
+        """
+        constraint = constraint.strip() if isinstance(constraint, str) else ""
+        if not constraint or constraint == "*" or "||" in constraint:
+            return name
+        if constraint[0] in "^~" and not constraint.startswith("~="):
+            version = constraint[1:].strip()
+            parts = version.split(".")
+            try:
+                numbers = [int(part) for part in parts]
+            except ValueError:
+                return name
+            if constraint[0] == "^":
+                # bump the first non-zero component, or the last given one when all are zero
+                index = next((i for i, number in enumerate(numbers) if number), len(numbers) - 1)
+            else:
+                # ~1.2.3 and ~1.2 allow patch releases, ~1 allows minor ones
+                index = min(1, len(numbers) - 1)
+            upper = numbers[:index] + [numbers[index] + 1] + [0] * (len(numbers) - index - 1)
+            return f"{name}>={version},<{'.'.join(str(number) for number in upper)}"
+        if constraint[0].isdigit():
+            return f"{name}=={constraint}"
+        return f"{name}{constraint}"
+
     @staticmethod
     def _update_field_value(property_name: str, value: Any, form_state: FormState, field_registry: FieldRegistry) -> None:
         field_name = None
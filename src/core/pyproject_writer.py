@@ -36,6 +36,9 @@ class PyProjectWriter:
             
             # Update tool.flet section
             PyProjectWriter._update_flet_section(pyproject_data, form_state)
+
+            # Update tool.fletfactory section
+            PyProjectWriter._update_fletfactory_section(pyproject_data, form_state)
             
             # Write back to file
             with open(pyproject_path, "w", encoding="utf-8") as f:
@@ -199,6 +202,22 @@ class PyProjectWriter:
             PyProjectWriter._ensure_section(flet_data, "flutter")
             flet_data["flutter"]["build_args"] = [str(arg) for arg in form_state.flutter_args]
     
+    @staticmethod
+    def _update_fletfactory_section(pyproject_data: Dict[str, Any], form_state: FormState) -> None:
+        """Update the [tool.fletfactory] section, settings flet itself ignores"""
+        factory_data = pyproject_data["tool"].get("fletfactory", {})
+
+        # removed budgets must not keep failing builds
+        if form_state.size_budgets and len(form_state.size_budgets) > 0:
+            factory_data["size_budgets"] = [str(rule) for rule in form_state.size_budgets]
+        else:
+            factory_data.pop("size_budgets", None)
+
+        if factory_data:
+            pyproject_data["tool"]["fletfactory"] = factory_data
+        else:
+            pyproject_data["tool"].pop("fletfactory", None)
+
     @staticmethod
     def _update_web_section(flet_data: Dict[str, Any], form_state: FormState) -> None:
         """Update the web-specific configuration"""
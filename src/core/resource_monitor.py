@@ -0,0 +1,399 @@
+import asyncio
+import os
+import re
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass, asdict
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple
+from utils.utils import format_bytes
+
+SAMPLE_INTERVAL = 1.0
+SPARKLINE_WIDTH = 24
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+# gradle runs builds in a daemon JVM that detaches from the process that started it
+ADOPTED_CMDLINE = b"GradleDaemon"
+# fan-out builds prefix their lines with the ABI, e.g. "[arm64] Building ..."
+_ABI_PREFIX_RE = re.compile(r"^\[[\w-]+\] ")
+
+# flet build steps, in order, matched against its output; phases only move forward
+PHASES = [
+    ("Bootstrap", re.compile(r"Creating Flutter bootstrap project", re.IGNORECASE)),
+    ("Icons & splash", re.compile(r"app icons|splash (images|screens)", re.IGNORECASE)),
+    ("Python packaging", re.compile(r"Packaging Python app", re.IGNORECASE)),
+    ("Flutter build", re.compile(r"^\W*Building ", re.IGNORECASE)),
+]
+INITIAL_PHASE = "Preparing"
+
+
+@dataclass
+class ProcStat:
+    ppid: int
+    comm: str
+    ticks: int  # utime + stime, plus the cumulative time of reaped children
+    rss: int
+    starttime: int
+
+
+def _read_stat(pid: int) -> Optional[ProcStat]:
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    # comm is in parentheses and may itself contain spaces or parentheses
+    close = data.rfind(b")")
+    fields = data[close + 2:].split()
+    try:
+        return ProcStat(
+            ppid=int(fields[1]),
+            comm=data[data.find(b"(") + 1:close].decode("utf-8", errors="replace"),
+            ticks=sum(int(value) for value in fields[11:15]),
+            rss=int(fields[21]) * PAGE_SIZE,
+            starttime=int(fields[19]),
+        )
+    except (IndexError, ValueError):
+        return None
+
+
+def _read_io(pid: int) -> Tuple[int, int]:
+    """read_bytes/write_bytes of a process, including its reaped children"""
+    read_bytes = write_bytes = 0
+    try:
+        with open(f"/proc/{pid}/io", "rb") as f:
+            for line in f:
+                if line.startswith(b"read_bytes:"):
+                    read_bytes = int(line.split()[1])
+                elif line.startswith(b"write_bytes:"):
+                    write_bytes = int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return read_bytes, write_bytes
+
+
+def _cmdline(pid: int) -> bytes:
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            return f.read()
+    except OSError:
+        return b""
+
+
+def _cwd(pid: int) -> str:
+    try:
+        return os.readlink(f"/proc/{pid}/cwd")
+    except OSError:
+        return ""
+
+
+def _is_within(path: str, directory: str) -> bool:
+    return path == directory or path.startswith(directory.rstrip(os.sep) + os.sep)
+
+
+def sparkline(values: List[float], width: int = SPARKLINE_WIDTH) -> str:
+    values = list(values)[-width:]
+    if not values:
+        return ""
+    top = max(values) or 1.0
+    return "".join(SPARK_CHARS[min(len(SPARK_CHARS) - 1, int(value / top * (len(SPARK_CHARS) - 1)))] for value in values)
+
+
+def is_supported() -> bool:
+    return sys.platform.startswith("linux") and os.path.isdir("/proc/self")
+
+
+@dataclass
+class ResourceSample:
+    timestamp: float
+    phase: str
+    cpu_percent: float  # 100 per fully used core
+    rss: int
+    read_bps: float
+    write_bps: float
+    processes: int
+
+
+@dataclass
+class PhaseStats:
+    name: str
+    seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    peak_cpu_percent: float = 0.0
+    peak_rss: int = 0
+    read_bytes: int = 0
+    write_bytes: int = 0
+
+    @property
+    def average_cpu_percent(self) -> float:
+        return self.cpu_seconds / self.seconds * 100 if self.seconds else 0.0
+
+    def verdict(self, cores: int) -> str:
+        """Rough bottleneck guess, for the build output"""
+        if self.average_cpu_percent >= 70 * cores:
+            return "CPU-bound"
+        if self.seconds and (self.read_bytes + self.write_bytes) / self.seconds > 50 * 1024 * 1024:
+            return "I/O-heavy"
+        if self.average_cpu_percent < 50:
+            return "mostly waiting"
+        return ""
+
+
+class ResourceMonitor:
+    """
+    Samples CPU, RSS and I/O of a build's process tree from /proc
+
+    Times and I/O are read cumulatively, including reaped children, so short lived
+    compiler processes between two samples are still accounted for. Gradle daemon JVMs
+    detach from the build, they are adopted into the tree when they were seen in it, or
+    when they started during the build from one of its directories (the project, its
+    staging mirrors or a build specific GRADLE_USER_HOME). Daemons of other builds on
+    the machine are left out.
+    """
+    def __init__(
+        self,
+        interval: float = SAMPLE_INTERVAL,
+        on_sample: Optional[Callable[["ResourceMonitor"], None]] = None,
+        owned_dirs: Optional[List[str]] = None,
+    ):
+        self.interval = interval
+        self.on_sample = on_sample
+        self.owned_dirs: List[str] = []
+        for directory in owned_dirs or []:
+            self.add_owned_dir(directory)
+        self.roots: Set[int] = set()
+        self.samples: Deque[ResourceSample] = deque(maxlen=3600)
+        self.phases: Dict[str, PhaseStats] = {}
+        self.phase = INITIAL_PHASE
+        self._phase_index = -1
+        self._last: Dict[int, Tuple[int, int, int]] = {}  # pid -> (ticks, read, write) at the previous sample
+        self._adopted: Dict[int, int] = {}  # gradle daemon pid -> its starttime, followed after it detaches
+        self._checked: Set[int] = set()  # java pids whose cmdline and cwd were looked at
+        self._last_time = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._started_ticks = 0
+        self._overhead_cpu = 0.0
+        self._started_at = 0.0
+
+    # MARK: Control
+    def add_root(self, pid: int):
+        """Track a build process and its descendants"""
+        self.roots.add(pid)
+
+    def add_owned_dir(self, directory: str):
+        """A directory of this build, gradle daemons started from it belong to the build"""
+        if directory:
+            self.owned_dirs.append(os.path.realpath(directory))
+
+    def start(self):
+        if not is_supported() or self._task is not None:
+            return
+        self._started_at = time.monotonic()
+        try:
+            with open("/proc/uptime", "r", encoding="utf-8") as f:
+                self._started_ticks = int(float(f.read().split()[0]) * CLK_TCK)
+        except (OSError, ValueError):
+            self._started_ticks = 0
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        self.sample()  # account for the time since the last tick
+
+    async def _run(self):
+        while True:
+            self.sample()
+            await asyncio.sleep(self.interval)
+
+    def feed(self, line: str):
+        """Advance the phase from a line of build output"""
+        line = _ABI_PREFIX_RE.sub("", line, count=1)
+        for index in range(self._phase_index + 1, len(PHASES)):
+            name, pattern = PHASES[index]
+            if pattern.search(line):
+                self._phase_index = index
+                self.phase = name
+                return
+
+    # MARK: Sampling
+    def _tree(self) -> Dict[int, ProcStat]:
+        stats: Dict[int, ProcStat] = {}
+        children: Dict[int, List[int]] = {}
+        for name in os.listdir("/proc"):
+            if not name.isdigit():
+                continue
+            stat = _read_stat(int(name))
+            if stat is None:
+                continue
+            pid = int(name)
+            stats[pid] = stat
+            children.setdefault(stat.ppid, []).append(pid)
+            if stat.comm == "java" and pid not in self._checked and stat.starttime >= self._started_ticks:
+                self._checked.add(pid)
+                if self._is_build_daemon(pid):
+                    self._adopted[pid] = stat.starttime
+
+        roots = [pid for pid in self.roots if pid in stats]
+        # the starttime guards against an unrelated process reusing the pid
+        roots += [pid for pid, starttime in self._adopted.items() if pid in stats and stats[pid].starttime == starttime]
+        tree: Dict[int, ProcStat] = {}
+        while roots:
+            pid = roots.pop()
+            if pid in tree:
+                continue
+            tree[pid] = stats[pid]
+            roots.extend(children.get(pid, []))
+        for pid, stat in tree.items():
+            if stat.comm == "java":
+                # still followed once it is reparented away from the build
+                self._adopted.setdefault(pid, stat.starttime)
+        return tree
+
+    def _is_build_daemon(self, pid: int) -> bool:
+        """A gradle daemon running from, or pointed at, one of the build's directories"""
+        cmdline = _cmdline(pid)
+        if ADOPTED_CMDLINE not in cmdline:
+            return False
+        cwd = _cwd(pid)
+        return any(_is_within(cwd, directory) or os.fsencode(directory) in cmdline for directory in self.owned_dirs)
+
+    def sample(self) -> Optional[ResourceSample]:
+        cpu_start = time.process_time()
+        now = time.monotonic()
+        tree = self._tree()
+        if not tree:
+            # the build exited, an empty sample would only flatten the sparklines
+            self._last, self._last_time = {}, now
+            self._overhead_cpu += time.process_time() - cpu_start
+            return None
+
+        ticks = read_bytes = write_bytes = 0
+        rss = 0
+        current: Dict[int, Tuple[int, int, int]] = {}
+        for pid, stat in tree.items():
+            io = _read_io(pid)
+            current[pid] = (stat.ticks, io[0], io[1])
+            previous = self._last.get(pid)
+            if previous is None:
+                # processes started during the build count from zero, adopted older daemons from now
+                previous = (0, 0, 0) if stat.starttime >= self._started_ticks else current[pid]
+            ticks += max(0, stat.ticks - previous[0])
+            read_bytes += max(0, io[0] - previous[1])
+            write_bytes += max(0, io[1] - previous[2])
+            rss += stat.rss
+        # a reaped child's totals move into its parent, don't count what was already seen twice
+        for pid, (old_ticks, old_read, old_write) in self._last.items():
+            if pid not in current:
+                ticks -= old_ticks
+                read_bytes -= old_read
+                write_bytes -= old_write
+        ticks, read_bytes, write_bytes = max(0, ticks), max(0, read_bytes), max(0, write_bytes)
+        self._last = current
+
+        elapsed = now - self._last_time if self._last_time else 0.0
+        self._last_time = now
+        sample = None
+        if elapsed > 0:
+            cpu_seconds = ticks / CLK_TCK
+            sample = ResourceSample(
+                timestamp=time.time(),
+                phase=self.phase,
+                cpu_percent=cpu_seconds / elapsed * 100,
+                rss=rss,
+                read_bps=read_bytes / elapsed,
+                write_bps=write_bytes / elapsed,
+                processes=len(tree),
+            )
+            self.samples.append(sample)
+            phase = self.phases.setdefault(self.phase, PhaseStats(self.phase))
+            phase.seconds += elapsed
+            phase.cpu_seconds += cpu_seconds
+            phase.peak_cpu_percent = max(phase.peak_cpu_percent, sample.cpu_percent)
+            phase.peak_rss = max(phase.peak_rss, rss)
+            phase.read_bytes += read_bytes
+            phase.write_bytes += write_bytes
+
+        self._overhead_cpu += time.process_time() - cpu_start
+        if sample and self.on_sample:
+            self.on_sample(self)
+        return sample
+
+    # MARK: Reporting
+    @property
+    def overhead_percent(self) -> float:
+        """CPU spent sampling, relative to the monitored wall time"""
+        wall = time.monotonic() - self._started_at if self._started_at else 0.0
+        return self._overhead_cpu / wall * 100 if wall else 0.0
+
+    def peaks(self) -> Dict[str, float]:
+        return {
+            "cpu_percent": max((s.cpu_percent for s in self.samples), default=0.0),
+            "rss": max((s.rss for s in self.samples), default=0),
+            "read_bps": max((s.read_bps for s in self.samples), default=0.0),
+            "write_bps": max((s.write_bps for s in self.samples), default=0.0),
+            "processes": max((s.processes for s in self.samples), default=0),
+        }
+
+    def sparklines(self) -> str:
+        """One line per metric over the last samples, for the live sidebar view"""
+        samples = list(self.samples)[-SPARKLINE_WIDTH:]
+        if not samples:
+            return ""
+        last = samples[-1]
+        return "\n".join([
+            f"CPU {sparkline([s.cpu_percent for s in samples])} {last.cpu_percent:.0f}%",
+            f"RSS {sparkline([s.rss for s in samples])} {format_bytes(last.rss)}",
+            f"I/O {sparkline([s.read_bps + s.write_bps for s in samples])} {format_bytes(last.read_bps + last.write_bps)}/s",
+            f"{last.phase} · {last.processes} processes",
+        ])
+
+    def summary(self) -> str:
+        cores = os.cpu_count() or 1
+        peaks = self.peaks()
+        lines = [
+            f"Resources: peak CPU {peaks['cpu_percent']:.0f}% of {cores * 100}%, peak RSS {format_bytes(peaks['rss'])}, "
+            f"monitor overhead {self.overhead_percent:.2f}% CPU"
+        ]
+        for phase in self.phases.values():
+            verdict = phase.verdict(cores)
+            lines.append(
+                f"  {phase.name:<17} {phase.seconds:>6.1f}s  CPU avg {phase.average_cpu_percent:>4.0f}% "
+                f"peak {phase.peak_cpu_percent:>4.0f}%  RSS {format_bytes(phase.peak_rss):>9}  "
+                f"read {format_bytes(phase.read_bytes):>9}  write {format_bytes(phase.write_bytes):>9}"
+                + (f"  {verdict}" if verdict else "")
+            )
+        return "\n".join(lines)
+
+    def to_dict(self) -> dict:
+        """Peaks and per-phase totals, for the build history"""
+        return {"peaks": self.peaks(), "phases": [asdict(phase) for phase in self.phases.values()]}
+
+
+# MARK: Benchmark
+async def measure_overhead(seconds: float = 5.0) -> ResourceMonitor:
+    """Monitor a tree of busy python processes and report what the sampling itself cost"""
+    script = (
+        "import subprocess, sys, time\n"
+        "children = [subprocess.Popen([sys.executable, '-c', 'import time\\nend = time.time() + %f\\nwhile time.time() < end: pass']) for _ in range(2)]\n"
+        "data = bytearray(64 * 1024 * 1024)\n"
+        "[child.wait() for child in children]\n" % seconds
+    )
+    process = await asyncio.create_subprocess_exec(sys.executable, "-c", script)
+    monitor = ResourceMonitor()
+    monitor.add_root(process.pid)
+    monitor.start()
+    await process.wait()
+    await monitor.stop()
+    return monitor
+
+
+if __name__ == "__main__":
+    # usage: python -m core.resource_monitor
+    result = asyncio.run(measure_overhead())
+    print(result.summary())
+    print(result.sparklines())
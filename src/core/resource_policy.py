@@ -0,0 +1,157 @@
+import functools
+import os
+import shutil
+import subprocess
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Set
+
+# ionice(1) scheduling classes
+IOPRIO_CLASSES = {"realtime": 1, "best-effort": 2, "idle": 3}
+
+
+def is_supported() -> bool:
+    return os.name == "posix"
+
+
+def parse_cpus(spec: str) -> Set[int]:
+    """'0-3,6' to {0, 1, 2, 3, 6}"""
+    cpus = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        cpus.update(range(int(first), int(last or first) + 1))
+    return cpus
+
+
+@functools.lru_cache(maxsize=None)
+def _tool(name: str) -> Optional[str]:
+    """Path of a wrapper tool, None where it isn't installed (ionice, taskset and prlimit are linux only)"""
+    return shutil.which(name)
+
+
+_cgroup_scope_available: Optional[bool] = None
+
+
+def cgroup_scope_available() -> bool:
+    """Whether builds can run in a transient systemd user scope, checked once"""
+    global _cgroup_scope_available
+    if _cgroup_scope_available is None:
+        _cgroup_scope_available = False
+        if shutil.which("systemd-run"):
+            try:
+                probe = subprocess.run(
+                    ["systemd-run", "--user", "--scope", "--quiet", "true"],
+                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=5,
+                )
+                _cgroup_scope_available = probe.returncode == 0
+            except (OSError, subprocess.TimeoutExpired):
+                pass
+    return _cgroup_scope_available
+
+
+@dataclass
+class ResourcePolicy:
+    nice: int = 0  # 0 (normal) to 19 (lowest)
+    io_class: str = ""  # "", best-effort or idle
+    io_level: int = 4  # 0 (highest) to 7, for best-effort
+    cpus: str = ""  # affinity as a cpu list, e.g. "2-7"; empty for every cpu
+    reserve_cpus: int = 0  # without cpus, keep this many cpus free for the UI
+    memory_mb: int = 0  # 0 for no ceiling
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ResourcePolicy":
+        known = {name: data[name] for name in cls.__dataclass_fields__ if name in data}
+        return cls(**known)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @property
+    def is_default(self) -> bool:
+        return self == ResourcePolicy()
+
+    def affinity(self) -> Set[int]:
+        """CPUs the build may run on, empty for no restriction"""
+        if self.cpus:
+            return parse_cpus(self.cpus)
+        available = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+        if self.reserve_cpus and len(available) > self.reserve_cpus:
+            # the UI and the event loop keep the first cpus to themselves
+            return set(available[self.reserve_cpus:])
+        return set()
+
+    def _rlimit(self) -> int:
+        """Per process data limit in bytes, used when no cgroup scope is available"""
+        return self.memory_mb * 1024 * 1024 if self.memory_mb and not cgroup_scope_available() else 0
+
+    def command(self, args: List[str]) -> List[str]:
+        """
+        The build command wrapped in the tools applying the policy
+
+        Each tool sets its attribute and execs the next, so the build keeps the pid and its
+        children inherit everything. Nothing runs between fork and exec in this process,
+        which is not safe with the threads flet runs.
+        """
+        if not is_supported() or self.is_default:
+            return args
+        prefix = []
+        if self.memory_mb and cgroup_scope_available():
+            # the scope covers every process of the build, daemons included; --scope keeps the pid
+            prefix += ["systemd-run", "--user", "--scope", "--quiet", "--collect", "-p", f"MemoryMax={self.memory_mb}M", "--"]
+        # nice(1) adds to the current niceness, the policy's value is absolute
+        increment = min(19, self.nice) - os.getpriority(os.PRIO_PROCESS, 0) if self.nice else 0
+        if increment > 0 and _tool("nice"):
+            prefix += [_tool("nice"), "-n", str(increment)]
+        if self.io_class in IOPRIO_CLASSES and _tool("ionice"):
+            prefix += [_tool("ionice"), "-c", str(IOPRIO_CLASSES[self.io_class])]
+            if self.io_class != "idle":
+                prefix += ["-n", str(max(0, min(7, self.io_level)))]
+        affinity = self.affinity()
+        if affinity and _tool("taskset"):
+            prefix += [_tool("taskset"), "-c", ",".join(str(cpu) for cpu in sorted(affinity))]
+        if self._rlimit() and _tool("prlimit"):
+            # per process rather than for the whole build: caps each JVM's and compiler's heap
+            prefix += [_tool("prlimit"), f"--data={self._rlimit()}", "--"]
+        return prefix + args
+
+    def env(self, env: Optional[Dict[str, str]]) -> Optional[Dict[str, str]]:
+        """
+        The build environment with gradle's daemon turned off
+
+        A daemon started under the policy would outlive the build and run later, unrestricted
+        builds with its limits, while a daemon already running would run this build without them.
+        """
+        if not is_supported() or self.is_default:
+            return env
+        env = dict(os.environ if env is None else env)
+        env["GRADLE_OPTS"] = f"{env.get('GRADLE_OPTS', '')} -Dorg.gradle.daemon=false".strip()
+        return env
+
+    def describe(self) -> str:
+        def unavailable(tool: str) -> str:
+            return "" if _tool(tool) else f" (not applied, {tool} not found)"
+
+        parts = []
+        if self.nice:
+            parts.append(f"nice {self.nice}" + unavailable("nice"))
+        if self.io_class:
+            parts.append(f"io {self.io_class}" + (f" {self.io_level}" if self.io_class != "idle" else "") + unavailable("ionice"))
+        affinity = self.affinity()
+        if affinity:
+            parts.append(f"cpus {','.join(str(cpu) for cpu in sorted(affinity))}" + unavailable("taskset"))
+        if self.memory_mb:
+            if cgroup_scope_available():
+                parts.append(f"memory {self.memory_mb} MB (cgroup)")
+            else:
+                parts.append(f"memory {self.memory_mb} MB per process" + unavailable("prlimit"))
+        if parts:
+            parts.append("no gradle daemon")
+        return ", ".join(parts) or "unrestricted"
+
+
+def policy_for(profiles: Dict[str, dict], target: str) -> ResourcePolicy:
+    """The policy of a platform's profile (keyed by cmd value, e.g. apk), or of the "default" profile"""
+    profile = profiles.get(target, profiles.get("default", {}))
+    return ResourcePolicy.from_dict(profile or {})
@@ -0,0 +1,149 @@
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+from utils.utils import format_bytes
+from core.artifact_report import ArtifactReport
+from core.asset_manifest import MANIFEST_EXCLUDES
+from core.project_scan import ExcludeMatcher
+
+WARN_RATIO = 0.9  # warn once a component uses this much of its budget
+
+_UNITS = {"": 1, "B": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+_SIZE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMG]?B?)\s*$", re.IGNORECASE)
+
+
+def parse_size(text: str) -> int:
+    """'40MB', '1.5 GB' or '900kb' to bytes"""
+    match = _SIZE.match(text)
+    if not match:
+        raise ValueError(f"invalid size '{text}'")
+    unit = match.group(2).upper()
+    if unit and not unit.endswith("B"):
+        unit += "B"
+    return int(float(match.group(1)) * _UNITS[unit])
+
+
+@dataclass
+class SizeBudget:
+    target: str  # platform cmd value, e.g. apk, ipa, web
+    component: str  # "" for the whole artifact or output directory
+    limit: int
+
+    @property
+    def label(self) -> str:
+        return f"{self.target}:{self.component}" if self.component else self.target
+
+
+def parse_budgets(rules: List[str]) -> Tuple[List[SizeBudget], List[str]]:
+    """
+    Parse budget rules like 'apk=40MB', 'apk:Native libraries=25MB' or 'web:assets=5MB'
+
+    Components are artifact size categories for APK/AAB/IPA builds (a prefix, so
+    'Native libraries' covers every ABI) and paths inside the output directory otherwise.
+    Returns the budgets and an error message per invalid rule.
+    """
+    budgets, errors = [], []
+    for rule in rules:
+        key, sep, size = rule.rpartition("=")
+        target, _, component = key.partition(":")
+        if not sep or not target.strip():
+            errors.append(f"'{rule}': expected <target>[:<component>]=<size>")
+            continue
+        try:
+            budgets.append(SizeBudget(target.strip().lower(), component.strip(), parse_size(size)))
+        except ValueError as e:
+            errors.append(f"'{rule}': {e}")
+    return budgets, errors
+
+
+@dataclass
+class BudgetResult:
+    budget: SizeBudget
+    subject: str  # artifact name or output directory
+    actual: int
+
+    @property
+    def status(self) -> str:
+        if self.actual > self.budget.limit:
+            return "failed"
+        return "warned" if self.actual >= self.budget.limit * WARN_RATIO else "passed"
+
+
+@dataclass
+class BudgetReport:
+    results: List[BudgetResult] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+    duration: float = 0.0
+
+    @property
+    def status(self) -> str:
+        statuses = {result.status for result in self.results}
+        return "failed" if "failed" in statuses else "warned" if "warned" in statuses else "passed"
+
+    def offending(self) -> List[BudgetResult]:
+        return [result for result in self.results if result.status != "passed"]
+
+    def summary(self) -> str:
+        icons = {"failed": "❌", "warned": "⚠️", "passed": "✅"}
+        lines = [f"Size budgets: {self.status} ({len(self.results)} checked in {self.duration * 1000:.0f} ms)"]
+        for result in sorted(self.results, key=lambda r: r.actual / r.budget.limit if r.budget.limit else 0, reverse=True):
+            usage = result.actual / result.budget.limit if result.budget.limit else 0
+            lines.append(
+                f"  {icons[result.status]} {result.budget.label:<28} {format_bytes(result.actual):>9} of "
+                f"{format_bytes(result.budget.limit)} ({usage:.0%})  {result.subject}"
+            )
+        lines.extend(f"  Invalid rule {error}" for error in self.errors)
+        return "\n".join(lines)
+
+
+def _component_bytes(report: ArtifactReport, component: str) -> int:
+    if not component or component.lower() == "total":
+        return report.file_size
+    prefix = component.lower()
+    return sum(item.compressed for name, item in report.categories.items() if name.lower().startswith(prefix))
+
+
+def _directory_bytes(output_dir: str, component: str) -> Optional[int]:
+    """Bytes of a file or directory of the output, without the post-build .gz/.br variants, manifest and service worker"""
+    path = os.path.join(output_dir, component.strip("/")) if component.strip("/") else output_dir
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    if not os.path.isdir(path):
+        return None
+    # every file is stat'ed: a file rewritten in place leaves its directory's mtime unchanged
+    matcher = ExcludeMatcher(MANIFEST_EXCLUDES)
+    total = 0
+    for current, _, files in os.walk(path):
+        rel_dir = os.path.relpath(current, output_dir).replace(os.sep, "/")
+        prefix = "" if rel_dir == "." else f"{rel_dir}/"
+        for name in files:
+            if matcher.path_excluded(prefix + name):
+                continue
+            try:
+                total += os.stat(os.path.join(current, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def evaluate_budgets(rules: List[str], target: str, output_dir: str, artifacts: Optional[List[ArtifactReport]] = None) -> BudgetReport:
+    """Check the budgets of a target against its artifacts, or its output directory when there are none"""
+    start = time.perf_counter()
+    budgets, errors = parse_budgets(rules)
+    report = BudgetReport(errors=errors)
+    for budget in budgets:
+        if budget.target != target:
+            continue
+        if artifacts:
+            for artifact in artifacts:
+                report.results.append(BudgetResult(budget, artifact.name, _component_bytes(artifact, budget.component)))
+        elif os.path.isdir(output_dir):
+            actual = _directory_bytes(output_dir, budget.component)
+            if actual is None:
+                report.errors.append(f"'{budget.label}': {budget.component} not found in {output_dir}")
+                continue
+            report.results.append(BudgetResult(budget, output_dir, actual))
+    report.duration = time.perf_counter() - start
+    return report
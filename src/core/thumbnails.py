@@ -0,0 +1,93 @@
+import base64
+import hashlib
+import os
+from pathlib import Path
+from typing import Optional
+from utils.utils import app_data_dir
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional, previews fall back to the source image
+    Image = None
+
+THUMB_SIZE = 66  # 2x the 33px IconPicker preview
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+
+class ThumbnailCache:
+    """Small pre-rendered previews under ~/.fletfactory/thumbs, bounded by an LRU size limit"""
+    def __init__(self, cache_dir: Optional[Path] = None, max_bytes: int = DEFAULT_MAX_BYTES, size: int = THUMB_SIZE):
+        self.cache_dir = cache_dir or app_data_dir("thumbs")
+        self.max_bytes = max_bytes
+        self.size = size
+
+    @staticmethod
+    def is_available() -> bool:
+        return Image is not None
+
+    def _thumb_path(self, source: str) -> Optional[Path]:
+        """Cache entry for a source, keyed by its path hash, mtime and size"""
+        try:
+            stat = os.stat(source)
+        except OSError:
+            return None
+        key = hashlib.sha1(
+            f"{os.path.realpath(source)}:{stat.st_mtime_ns}:{stat.st_size}:{self.size}".encode("utf-8")
+        ).hexdigest()
+        return self.cache_dir / f"{key}.png"
+
+    def get(self, source: str) -> Optional[Path]:
+        """Return a cached thumbnail, marking it as recently used"""
+        thumb = self._thumb_path(source)
+        if thumb is None or not thumb.exists():
+            return None
+        os.utime(thumb)  # mtime doubles as the LRU timestamp
+        return thumb
+
+    def create(self, source: str) -> Optional[Path]:
+        """Render and cache a thumbnail, this decodes the full image so keep it off the UI thread"""
+        thumb = self._thumb_path(source)
+        if thumb is None or not self.is_available():
+            return None
+        tmp = thumb.with_name(f".{thumb.name}.{os.getpid()}.tmp")
+        try:
+            with Image.open(source) as image:
+                image.draft("RGB", (self.size, self.size))  # lets JPEG decode at reduced scale
+                image = image.convert("RGBA")
+                image.thumbnail((self.size, self.size), Image.LANCZOS)
+                image.save(tmp, format="PNG")
+            os.replace(tmp, thumb)
+        except (OSError, ValueError) as e:
+            print(f"Error creating thumbnail for {source}: {e}")
+            return None
+        self._evict()
+        return thumb
+
+    def get_or_create(self, source: str) -> Optional[Path]:
+        return self.get(source) or self.create(source)
+
+    def _evict(self):
+        """Remove least recently used thumbnails until the cache fits its size limit"""
+        entries = []
+        total = 0
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith(".png"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+                    total += stat.st_size
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+
+def read_base64(path: Path) -> str:
+    with open(path, "rb") as f:
+        return base64.b64encode(f.read()).decode("ascii")
@@ -0,0 +1,300 @@
+import glob
+import hashlib
+import json
+import os
+import plistlib
+import re
+import shutil
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from utils.utils import Platform, app_data_dir, buildable_platforms, current_os
+
+# environment variables that influence discovery
+TOOLCHAIN_ENV_VARS = ["PATH", "FLUTTER_ROOT", "ANDROID_HOME", "ANDROID_SDK_ROOT", "JAVA_HOME", "DEVELOPER_DIR"]
+
+TOOL_NAMES = {
+    "flutter": "Flutter SDK",
+    "android_sdk": "Android SDK",
+    "jdk": "JDK",
+    "xcode": "Xcode",
+}
+
+# Toolchains each target needs. "required" ones must be installed beforehand,
+# "provisioned" ones are downloaded by `flet build` when missing.
+PLATFORM_REQUIREMENTS = {
+    Platform.WINDOWS: {"required": [], "provisioned": ["flutter"]},
+    Platform.LINUX: {"required": [], "provisioned": ["flutter"]},
+    Platform.MACOS: {"required": ["xcode"], "provisioned": ["flutter"]},
+    Platform.IOS: {"required": ["xcode"], "provisioned": ["flutter"]},
+    Platform.ANDROID_APK: {"required": [], "provisioned": ["flutter", "android_sdk", "jdk"]},
+    Platform.ANDROID_AAP: {"required": [], "provisioned": ["flutter", "android_sdk", "jdk"]},
+    Platform.WEB: {"required": [], "provisioned": ["flutter"]},
+}
+
+
+@dataclass
+class ToolInfo:
+    name: str
+    path: str = ""
+    version: str = ""
+    source: str = ""  # where it was found, e.g. PATH or ANDROID_HOME
+
+    @property
+    def found(self) -> bool:
+        return bool(self.path)
+
+
+def _home(*parts) -> str:
+    return str(Path.home().joinpath(*parts))
+
+
+def _version_key(text: str) -> list:
+    """Natural sort key, so 3.29.0 sorts after 3.9.0"""
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", text)]
+
+
+def _is_pattern(path: str) -> bool:
+    return any(c in path for c in "*?[")
+
+
+def _expand(patterns: List[str]) -> List[str]:
+    """Expand glob patterns, newest looking entries first"""
+    paths = []
+    for pattern in patterns:
+        if _is_pattern(pattern):
+            paths.extend(sorted(glob.glob(pattern), key=_version_key, reverse=True))
+        else:
+            paths.append(pattern)
+    return paths
+
+
+def _which_root(binary: str, levels: int) -> Optional[str]:
+    """Resolve a binary on PATH and walk up to its install root"""
+    found = shutil.which(binary)
+    if not found:
+        return None
+    root = os.path.realpath(found)
+    for _ in range(levels):
+        root = os.path.dirname(root)
+    return root
+
+
+def _read_text(path: str) -> str:
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return f.read()
+    except OSError:
+        return ""
+
+
+def _default_locations(tool: str) -> List[str]:
+    """Usual install locations of a tool, glob patterns included"""
+    if tool == "flutter":
+        return [
+            _home("flutter", "*"),  # installed by flet build
+            _home("flutter"),
+            _home("development", "flutter"),
+            _home("fvm", "default"),
+            "/opt/flutter",
+            "C:\\src\\flutter",
+        ]
+    if tool == "android_sdk":
+        local_app_data = os.environ.get("LOCALAPPDATA", "")
+        return [
+            _home("Library", "Android", "sdk"),
+            _home("Android", "Sdk"),
+            _home("Android", "sdk"),
+            os.path.join(local_app_data, "Android", "Sdk") if local_app_data else "",
+        ]
+    if tool == "jdk":
+        return [
+            _home("java", "*"),  # installed by flet build
+            "/Library/Java/JavaVirtualMachines/*/Contents/Home",
+            "/usr/lib/jvm/*",
+            "C:\\Program Files\\Java\\*",
+        ]
+    if tool == "xcode" and current_os == "darwin":
+        return [
+            "/Applications/Xcode.app",
+            "/Applications/Xcode*.app",
+        ]
+    return []
+
+
+def _candidates(tool: str) -> List[Tuple[str, str]]:
+    """(source, path) pairs where a tool may be installed, most specific first"""
+    env = os.environ
+    defaults = [("default location", p) for p in _expand(_default_locations(tool))]
+    if tool == "flutter":
+        return [
+            ("FLUTTER_ROOT", env.get("FLUTTER_ROOT", "")),
+            ("PATH", _which_root("flutter", 2) or ""),
+            *defaults,
+        ]
+    if tool == "android_sdk":
+        return [
+            ("ANDROID_HOME", env.get("ANDROID_HOME", "")),
+            ("ANDROID_SDK_ROOT", env.get("ANDROID_SDK_ROOT", "")),
+            ("PATH", _which_root("adb", 2) or ""),
+            *defaults,
+        ]
+    if tool == "jdk":
+        return [
+            ("JAVA_HOME", env.get("JAVA_HOME", "")),
+            ("PATH", _which_root("java", 2) or ""),
+            *defaults,
+        ]
+    if tool == "xcode":
+        if current_os != "darwin":
+            return []
+        developer_dir = env.get("DEVELOPER_DIR", "")
+        return [
+            # DEVELOPER_DIR points at Xcode.app/Contents/Developer
+            ("DEVELOPER_DIR", os.path.dirname(os.path.dirname(developer_dir)) if developer_dir else ""),
+            *defaults,
+        ]
+    return []
+
+
+def _is_valid(tool: str, path: str) -> bool:
+    if tool == "flutter":
+        return os.path.exists(os.path.join(path, "bin", "flutter")) or os.path.exists(os.path.join(path, "bin", "flutter.bat"))
+    if tool == "android_sdk":
+        return any(os.path.isdir(os.path.join(path, d)) for d in ("platform-tools", "platforms", "cmdline-tools", "build-tools"))
+    if tool == "jdk":
+        return os.path.exists(os.path.join(path, "bin", "java")) or os.path.exists(os.path.join(path, "bin", "java.exe"))
+    if tool == "xcode":
+        return os.path.isdir(os.path.join(path, "Contents", "Developer"))
+    return False
+
+
+def _detect_version(tool: str, path: str) -> str:
+    """Read a tool version from files in its install root, without spawning anything"""
+    if tool == "flutter":
+        version_json = _read_text(os.path.join(path, "bin", "cache", "flutter.version.json"))
+        if version_json:
+            try:
+                return json.loads(version_json).get("frameworkVersion", "")
+            except json.JSONDecodeError:
+                pass
+        return _read_text(os.path.join(path, "version")).strip()
+    if tool == "android_sdk":
+        build_tools = sorted(glob.glob(os.path.join(path, "build-tools", "*")), key=_version_key)
+        return f"build-tools {os.path.basename(build_tools[-1])}" if build_tools else ""
+    if tool == "jdk":
+        for line in _read_text(os.path.join(path, "release")).splitlines():
+            if line.startswith("JAVA_VERSION="):
+                return line.split("=", 1)[1].strip().strip('"')
+        return ""
+    if tool == "xcode":
+        try:
+            with open(os.path.join(path, "Contents", "version.plist"), "rb") as f:
+                return plistlib.load(f).get("CFBundleShortVersionString", "")
+        except (OSError, plistlib.InvalidFileException):
+            return ""
+    return ""
+
+
+def _version_files(tool: str, path: str) -> List[str]:
+    """Files and directories inside an install root that change when the tool is upgraded"""
+    if tool == "flutter":
+        return [os.path.join(path, "version"), os.path.join(path, "bin", "cache", "flutter.version.json")]
+    if tool == "android_sdk":
+        return [os.path.join(path, d) for d in ("platform-tools", "platforms", "cmdline-tools", "build-tools")]
+    if tool == "jdk":
+        return [os.path.join(path, "release")]
+    if tool == "xcode":
+        return [os.path.join(path, "Contents", "version.plist")]
+    return []
+
+
+def _fingerprint(tools: Dict[str, ToolInfo]) -> str:
+    """
+    Fingerprint the toolchain env vars and the mtimes of what discovery looks at, without
+    running it: the PATH directories, the default locations (the parent of glob patterns, where
+    new versions appear) and the version files of the tools found last time. Only stats, no
+    which or glob, so it stays cheap on every load.
+    """
+    parts = [f"{var}={os.environ.get(var, '')}" for var in TOOLCHAIN_ENV_VARS]
+    paths = [p for p in os.environ.get("PATH", "").split(os.pathsep) if p]
+    for tool in TOOL_NAMES:
+        for location in _default_locations(tool):
+            if _is_pattern(location):
+                # the deepest directory above the first wildcard
+                location = os.path.dirname(re.split(r"[*?\[]", location, maxsplit=1)[0])
+            if location:
+                paths.append(location)
+    for info in tools.values():
+        if info.found:
+            paths.append(info.path)
+            paths.extend(_version_files(info.name, info.path))
+    for path in paths:
+        try:
+            parts.append(f"{path}:{os.stat(path).st_mtime_ns}")
+        except OSError:
+            parts.append(f"{path}:missing")
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def discover_tool(tool: str) -> ToolInfo:
+    """Find a tool by scanning env vars, PATH and the usual install locations"""
+    for source, path in _candidates(tool):
+        if path and _is_valid(tool, path):
+            return ToolInfo(name=tool, path=path, version=_detect_version(tool, path), source=source)
+    return ToolInfo(name=tool)
+
+
+class ToolchainIndex:
+    """Index of installed build toolchains, cached in ~/.fletfactory/toolchain.json"""
+    def __init__(self, tools: Dict[str, ToolInfo], fingerprint: str = ""):
+        self.tools = tools
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def load(cls, cache_file: Optional[Path] = None) -> "ToolchainIndex":
+        """Load the cached index, re-discovering when PATH or any location changed"""
+        cache_file = cache_file or app_data_dir() / "toolchain.json"
+
+        if cache_file.exists():
+            try:
+                with open(cache_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                tools = {name: ToolInfo(**info) for name, info in data.get("tools", {}).items()}
+                fingerprint = _fingerprint(tools)
+                if data.get("fingerprint") == fingerprint:
+                    return cls(tools, fingerprint)
+            except (json.JSONDecodeError, IOError, TypeError) as e:
+                print(f"Error loading toolchain index: {e}")
+
+        tools = {tool: discover_tool(tool) for tool in TOOL_NAMES}
+        index = cls(tools, _fingerprint(tools))
+        try:
+            with open(cache_file, "w", encoding="utf-8") as f:
+                json.dump({
+                    "fingerprint": index.fingerprint,
+                    "tools": {name: asdict(info) for name, info in index.tools.items()},
+                }, f, indent=2)
+        except IOError as e:
+            print(f"Error saving toolchain index: {e}")
+        return index
+
+    def get(self, tool: str) -> ToolInfo:
+        return self.tools.get(tool) or ToolInfo(name=tool)
+
+    def missing_requirements(self, platform: Platform) -> Tuple[List[str], List[str]]:
+        """Return the missing (required, provisioned) toolchains for a target"""
+        requirements = PLATFORM_REQUIREMENTS.get(platform, {})
+        required = [t for t in requirements.get("required", []) if not self.get(t).found]
+        provisioned = [t for t in requirements.get("provisioned", []) if not self.get(t).found]
+        return required, provisioned
+
+    def can_build(self, platform: Platform) -> bool:
+        """Whether the host OS and the installed toolchains can build a target"""
+        if platform not in buildable_platforms:
+            return False
+        required, _ = self.missing_requirements(platform)
+        return not required
+
+    def buildable_platforms(self) -> List[Platform]:
+        return [platform for platform in buildable_platforms if self.can_build(platform)]
@@ -0,0 +1,286 @@
+import asyncio
+import ctypes
+import ctypes.util
+import errno
+import os
+import struct
+import sys
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+from core.project_scan import ExcludeMatcher
+from core.merkle_index import MerkleIndex
+
+DEFAULT_DEBOUNCE = 0.3  # seconds of quiet before a burst of saves triggers a rebuild
+MAX_LATENCY = 2.0  # rebuild at least this often while events keep coming
+POLL_INTERVAL = 1.0
+
+# never trigger rebuilds: build output, caches and editor temp files
+DEFAULT_WATCH_EXCLUDES = [
+    "build/", "dist/", "__pycache__/", ".git/", ".venv/", "venv/", "node_modules/",
+    ".pytest_cache/", ".mypy_cache/", "*.pyc", "*.swp", "*.swx", "*~", ".#*", ".DS_Store",
+]
+
+# inotify(7)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MODIFY | IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF
+_EVENT_HEADER = struct.Struct("iIII")
+
+EventCallback = Callable[[str], None]  # relative path of a changed file or directory
+
+
+class InotifyUnavailable(Exception):
+    """inotify can't be used here, fall back to polling"""
+
+
+class InotifyWatcher:
+    """Recursive inotify watches on a tree, read from the event loop"""
+    def __init__(self, root: str, matcher: ExcludeMatcher, on_event: EventCallback):
+        if not sys.platform.startswith("linux"):
+            raise InotifyUnavailable("inotify is linux only")
+        self.root = root
+        self.matcher = matcher
+        self.on_event = on_event
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise InotifyUnavailable(os.strerror(ctypes.get_errno()))
+        self._paths: Dict[int, str] = {}  # watch descriptor -> relative dir
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _add_watch(self, rel_dir: str):
+        path = os.path.join(self.root, rel_dir) if rel_dir else self.root
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            if error == errno.ENOSPC:
+                # fs.inotify.max_user_watches exhausted
+                raise InotifyUnavailable("inotify watch limit reached")
+            return
+        self._paths[wd] = rel_dir
+
+    def _add_tree(self, rel_dir: str):
+        stack = [rel_dir]
+        while stack:
+            current = stack.pop()
+            self._add_watch(current)
+            path = os.path.join(self.root, current) if current else self.root
+            try:
+                with os.scandir(path) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            child = f"{current}/{entry.name}" if current else entry.name
+                            if not self.matcher.path_excluded(child, is_dir=True):
+                                stack.append(child)
+            except OSError:
+                continue
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        try:
+            self._add_tree("")
+        except InotifyUnavailable:
+            self.stop()
+            raise
+        self._loop.add_reader(self._fd, self._read)
+
+    def stop(self):
+        if self._fd < 0:
+            return
+        if self._loop is not None:
+            self._loop.remove_reader(self._fd)
+        os.close(self._fd)
+        self._fd = -1
+
+    def _read(self):
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buffer):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(buffer, offset)
+            name = buffer[offset + _EVENT_HEADER.size:offset + _EVENT_HEADER.size + length].rstrip(b"\0")
+            offset += _EVENT_HEADER.size + length
+
+            if mask & IN_Q_OVERFLOW:
+                self.on_event("")  # events were lost, treat the whole tree as changed
+                continue
+            if mask & IN_IGNORED:
+                self._paths.pop(wd, None)
+                continue
+            rel_dir = self._paths.get(wd)
+            if rel_dir is None:
+                continue
+            rel_path = rel_dir
+            if name:
+                rel_path = f"{rel_dir}/{os.fsdecode(name)}" if rel_dir else os.fsdecode(name)
+            is_dir = bool(mask & IN_ISDIR)
+            if self.matcher.path_excluded(rel_path, is_dir=is_dir):
+                continue
+            if is_dir and mask & (IN_CREATE | IN_MOVED_TO):
+                try:
+                    self._add_tree(rel_path)
+                except InotifyUnavailable:
+                    pass
+            self.on_event(rel_path)
+
+
+class PollingWatcher:
+    """Fallback that diffs a Merkle index of the tree every interval"""
+    def __init__(self, root: str, exclude: List[str], on_event: EventCallback, interval: float = POLL_INTERVAL):
+        self.index = MerkleIndex(root, exclude=exclude)
+        self.on_event = on_event
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._poll())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _poll(self):
+        # the first update only establishes the baseline
+        await asyncio.to_thread(self.index.update)
+        while True:
+            await asyncio.sleep(self.interval)
+            diff = await asyncio.to_thread(self.index.update)
+            for rel_path in diff.changed:
+                self.on_event(rel_path)
+
+
+@dataclass
+class WatchStats:
+    events: int = 0
+    batches: int = 0
+    rebuilds: int = 0
+    cancelled: int = 0  # in-flight builds cancelled because they became stale
+    last_duration: float = 0.0
+    last_returncode: Optional[int] = None
+
+    @property
+    def skipped_events(self) -> int:
+        """Events that did not start a rebuild of their own"""
+        return self.events - self.batches
+
+    def summary(self) -> str:
+        last = f"{self.last_duration:.1f}s" if self.rebuilds else "-"
+        return f"Rebuilds: {self.rebuilds} · last {last} · skipped {self.skipped_events} events"
+
+
+class ProjectWatcher:
+    """
+    Watches a tree and calls on_batch with the changed paths once a burst of events settles
+
+    Uses inotify on Linux and falls back to polling a Merkle index elsewhere, or when
+    the inotify watch limit is reached.
+    """
+    def __init__(
+        self,
+        root: str,
+        on_batch: Callable[[Set[str]], None],
+        exclude: Optional[List[str]] = None,
+        debounce: float = DEFAULT_DEBOUNCE,
+        force_polling: bool = False,
+    ):
+        self.root = os.path.abspath(os.path.expanduser(root))
+        self.on_batch = on_batch
+        self.exclude = DEFAULT_WATCH_EXCLUDES + list(exclude or [])
+        self.debounce = debounce
+        self.force_polling = force_polling
+        self.stats = WatchStats()
+        self.backend = ""
+        self._source = None
+        self._pending: Set[str] = set()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._first_event_at = 0.0
+
+    def start(self):
+        if not self.force_polling:
+            try:
+                self._source = InotifyWatcher(self.root, ExcludeMatcher(self.exclude), self._on_event)
+                self._source.start()
+                self.backend = "inotify"
+                return
+            except (InotifyUnavailable, OSError, AttributeError) as e:
+                print(f"inotify unavailable, polling instead: {e}")
+        self._source = PollingWatcher(self.root, self.exclude, self._on_event)
+        self._source.start()
+        self.backend = "polling"
+
+    def stop(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._source is not None:
+            self._source.stop()
+            self._source = None
+
+    def _on_event(self, rel_path: str):
+        self.stats.events += 1
+        loop = asyncio.get_running_loop()
+        if not self._pending:
+            self._first_event_at = loop.time()
+        self._pending.add(rel_path)
+        if self._timer is not None:
+            self._timer.cancel()
+        # keep pushing the deadline back while saves keep coming, up to MAX_LATENCY
+        delay = min(self.debounce, max(0.0, self._first_event_at + MAX_LATENCY - loop.time()))
+        self._timer = loop.call_later(delay, self._flush)
+
+    def _flush(self):
+        self._timer = None
+        paths, self._pending = self._pending, set()
+        if paths:
+            self.stats.batches += 1
+            self.on_batch(paths)
+
+
+class RebuildScheduler:
+    """Runs a build per batch of changes, cancelling an in-flight build that became stale"""
+    def __init__(self, run_build: Callable[[], Awaitable[int]], stats: WatchStats, on_finished: Optional[Callable[[WatchStats], None]] = None):
+        self.run_build = run_build
+        self.stats = stats
+        self.on_finished = on_finished
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def building(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def trigger(self):
+        if self.building:
+            self._task.cancel()
+            self.stats.cancelled += 1
+        self._task = asyncio.get_running_loop().create_task(self._run(self._task))
+
+    async def _run(self, previous: Optional[asyncio.Task]):
+        if previous is not None:
+            # let the cancelled build tear down its process before starting the next one
+            await asyncio.gather(previous, return_exceptions=True)
+        start = time.perf_counter()
+        returncode = await self.run_build()
+        self.stats.rebuilds += 1
+        self.stats.last_duration = time.perf_counter() - start
+        self.stats.last_returncode = returncode
+        if self.on_finished:
+            self.on_finished(self.stats)
+
+    def cancel(self):
+        if self.building:
+            self._task.cancel()
@@ -0,0 +1,229 @@
+import asyncio
+import os
+import platform
+import re
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from utils.utils import Platform, app_data_dir
+
+OutputCallback = Callable[[str], None]
+
+EMBEDDED_PYTHON_VERSION = "3.12"  # the interpreter serious_python embeds in built apps, desktop ones included
+FLET_MOBILE_INDEX = "https://pypi.flet.dev"  # prebuilt native wheels for Android and iOS
+
+
+@dataclass(frozen=True)
+class WheelTarget:
+    """A set of pip platform tags wheels are fetched for"""
+    tag: str  # wheelhouse subdirectory
+    platforms: tuple = ()  # pip --platform values, empty for the host platform
+    python_version: str = ""
+    extra_index_urls: tuple = ()
+
+
+def _host_target() -> WheelTarget:
+    """Desktop builds run on this platform, but with the embedded python rather than the one running the app"""
+    return WheelTarget(
+        tag=f"host-{sys.platform}-{platform.machine().lower()}-cp{EMBEDDED_PYTHON_VERSION.replace('.', '')}",
+        python_version=EMBEDDED_PYTHON_VERSION,
+    )
+
+
+ANDROID_TARGET = WheelTarget(
+    tag="android-24",
+    platforms=("android_24_arm64_v8a", "android_24_armeabi_v7a", "android_24_x86_64", "android_24_x86"),
+    python_version=EMBEDDED_PYTHON_VERSION,
+    extra_index_urls=(FLET_MOBILE_INDEX,),
+)
+
+IOS_TARGET = WheelTarget(
+    tag="ios-13",
+    platforms=("ios_13_0_arm64_iphoneos", "ios_13_0_arm64_iphonesimulator", "ios_13_0_x86_64_iphonesimulator"),
+    python_version=EMBEDDED_PYTHON_VERSION,
+    extra_index_urls=(FLET_MOBILE_INDEX,),
+)
+
+
+def target_for(platform_: Optional[Platform]) -> Optional[WheelTarget]:
+    """Wheel target of a build platform, None where pip wheels don't apply (web uses pyodide)"""
+    if platform_ in (Platform.ANDROID_APK, Platform.ANDROID_AAP):
+        return ANDROID_TARGET
+    if platform_ == Platform.IOS:
+        return IOS_TARGET
+    if platform_ in (Platform.WINDOWS, Platform.MACOS, Platform.LINUX):
+        return _host_target()
+    return None
+
+
+# pip download / install output, used to count cache hits
+_ALREADY_DOWNLOADED_RE = re.compile(r"File was already downloaded (\S+)")
+_SAVED_RE = re.compile(r"^\s*Saved (\S+)")
+_PROCESSING_LOCAL_RE = re.compile(r"^\s*Processing (\S+\.whl)")
+_DOWNLOADING_RE = re.compile(r"^\s*Downloading (\S+)")
+
+
+@dataclass
+class WheelhouseStats:
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.hits + self.misses
+
+    @property
+    def hit_ratio(self) -> float:
+        return self.hits / self.total if self.total else 0.0
+
+    def feed(self, line: str, wheelhouse_dir: Optional[str] = None):
+        """Count a pip output line as a cache hit or miss"""
+        if _ALREADY_DOWNLOADED_RE.search(line):
+            self.hits += 1
+        elif _SAVED_RE.search(line):
+            self.misses += 1
+        elif wheelhouse_dir and (match := _PROCESSING_LOCAL_RE.search(line)) and wheelhouse_dir in match.group(1):
+            self.hits += 1
+        elif (match := _DOWNLOADING_RE.search(line)) and match.group(1).startswith(("http://", "https://")):
+            self.misses += 1
+
+    def summary(self) -> str:
+        if not self.total:
+            return "no packages fetched"
+        return f"{self.hits}/{self.total} cached ({self.hit_ratio:.0%})"
+
+
+class Wheelhouse:
+    """
+    Shared wheel cache in ~/.fletfactory/wheelhouse/<platform tag>
+
+    Pure python wheels live once in wheelhouse/any and are hardlinked into every tag
+    directory, so they are downloaded and stored once across projects and targets.
+    """
+    def __init__(
+        self,
+        root: Optional[Path] = None,
+        index_url: str = "",
+        find_links: Optional[List[str]] = None,
+        offline: bool = False,
+    ):
+        self.root = root or app_data_dir("wheelhouse")
+        self.index_url = index_url
+        self.find_links = find_links or []
+        self.offline = offline  # resolve from find_links only, e.g. a local directory index
+
+    def target_dir(self, target: WheelTarget) -> Path:
+        directory = self.root / target.tag
+        directory.mkdir(parents=True, exist_ok=True)
+        return directory
+
+    @property
+    def shared_dir(self) -> Path:
+        directory = self.root / "any"
+        directory.mkdir(parents=True, exist_ok=True)
+        return directory
+
+    def download_command(self, requirements: List[str], target: WheelTarget, platform_tag: str = "") -> List[str]:
+        """pip download for one platform tag of the target, or the host platform without one"""
+        cmd = [sys.executable, "-m", "pip", "download", "--disable-pip-version-check",
+               "--dest", str(self.target_dir(target))]
+        if platform_tag:
+            cmd += ["--platform", platform_tag]
+        if target.python_version:
+            cmd += ["--python-version", target.python_version]
+        if platform_tag or target.python_version:
+            # pip only resolves for another platform or interpreter from wheels
+            cmd += ["--only-binary=:all:"]
+        if self.offline:
+            cmd += ["--no-index"]
+        else:
+            if self.index_url:
+                cmd += ["--index-url", self.index_url]
+            for url in target.extra_index_urls:
+                cmd += ["--extra-index-url", url]
+        for link in self.find_links:
+            cmd += ["--find-links", link]
+        return cmd + list(requirements)
+
+    async def prefetch(self, requirements: List[str], target: WheelTarget, on_output: Optional[OutputCallback] = None) -> WheelhouseStats:
+        """Download missing wheels for the requirements, returning how many were already cached"""
+        stats = WheelhouseStats()
+        if not requirements:
+            return stats
+        self._link_shared_wheels(target)
+        # pip picks a single wheel per requirement, whatever the number of --platform flags,
+        # so every ABI is downloaded on its own; runs after the first find the pure wheels in place
+        for platform_tag in target.platforms or ("",):
+            process = await asyncio.create_subprocess_exec(
+                *self.download_command(requirements, target, platform_tag),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+            )
+            while True:
+                line_bytes = await process.stdout.readline()
+                if not line_bytes:
+                    break
+                line = line_bytes.decode("utf-8", errors="replace")
+                stats.feed(line)
+                if on_output:
+                    on_output(line)
+            await process.wait()
+            if process.returncode != 0:
+                raise RuntimeError(f"pip download{f' for {platform_tag}' if platform_tag else ''} failed with exit code {process.returncode}")
+        self._share_pure_wheels(target)
+        return stats
+
+    def _link_shared_wheels(self, target: WheelTarget):
+        """Make wheels another target already fetched visible to pip as downloaded"""
+        target_dir = self.target_dir(target)
+        for shared in self.shared_dir.glob("*-none-any.whl"):
+            wheel = target_dir / shared.name
+            if not wheel.exists():
+                try:
+                    os.link(shared, wheel)
+                except OSError:
+                    continue
+
+    def _share_pure_wheels(self, target: WheelTarget):
+        """Replace pure python wheels with hardlinks to a single copy in the shared directory"""
+        shared_dir = self.shared_dir
+        for wheel in self.target_dir(target).glob("*-none-any.whl"):
+            shared = shared_dir / wheel.name
+            try:
+                if not shared.exists():
+                    os.link(wheel, shared)
+                elif not os.path.samefile(wheel, shared):
+                    tmp = wheel.with_name(f".{wheel.name}.tmp")
+                    os.link(shared, tmp)
+                    os.replace(tmp, wheel)
+            except OSError as e:
+                # e.g. a filesystem without hardlinks, the tag directory keeps its own copy
+                print(f"Error sharing wheel {wheel.name}: {e}")
+
+    def build_env(self, target: WheelTarget) -> Dict[str, str]:
+        """
+        Environment pointing pip inside flet build at the wheelhouse
+
+        Applied before the index proxy's environment, so a running proxy's PIP_INDEX_URL
+        wins over the wheelhouse index; the wheelhouse itself is reached through find links.
+        """
+        # pip splits the variable on whitespace, local paths go in as percent-encoded file urls
+        links = [self.target_dir(target).as_uri(), self.shared_dir.as_uri()]
+        links += [link if "://" in link else Path(link).expanduser().resolve().as_uri() for link in self.find_links]
+        env = {"PIP_FIND_LINKS": " ".join(links)}
+        if self.offline:
+            env["PIP_NO_INDEX"] = "1"
+        elif self.index_url:
+            env["PIP_INDEX_URL"] = self.index_url
+        return env
+
+    def size(self) -> int:
+        """Bytes on disk, hardlinked wheels counted once"""
+        seen, total = set(), 0
+        for wheel in self.root.rglob("*.whl"):
+            stat = wheel.stat()
+            if (stat.st_dev, stat.st_ino) not in seen:
+                seen.add((stat.st_dev, stat.st_ino))
+                total += stat.st_size
+        return total
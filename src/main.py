@@ -20,6 +20,7 @@ from core.field_definitions import (
 )
 from core.pyproject_service import PyProjectService
 from config.pyproject_autosave import AutoSaveManager
+from core.toolchain import ToolchainIndex
 
 environ["FLET_CLI_NO_RICH_OUTPUT"] = "1"
 
@@ -183,6 +184,11 @@ def main(page: ft.Page):
     permissions_fields = [f.name for f in get_permissions_fields()]
     permissions_card = CardFactory.create_card("Permissions", permissions_fields, field_registry)
     
+    # the icon picker exists once its card has been created
+    app_icon_ref = field_registry.get_ref("app_icon")
+    if app_icon_ref and app_icon_ref.current:
+        icons_manager.set_icon_picker(app_icon_ref.current)
+
     main_content = ft.Container(
         content=ft.Column(
             controls=[
@@ -224,6 +230,7 @@ def main(page: ft.Page):
                     command_ref=command_display_ref,
                     auto_save_manager=auto_save_manager,
                     icons_manager=icons_manager,  # Add this
+                    form_state=form_state,
                 ),
                 main_content,
             ],
@@ -233,6 +240,9 @@ def main(page: ft.Page):
         )
     )
 
+    # discovery stats install locations, keep it off the UI start
+    page.run_thread(lambda: platforms_row.set_toolchain_index(ToolchainIndex.load()))
+
 def register_all_fields(registry: FieldRegistry):
     fields = []
     fields.extend(get_building_fields())
@@ -249,4 +259,5 @@ def register_all_fields(registry: FieldRegistry):
     for field_def in fields:
         registry.register_field(field_def)
 
-ft.app(main, assets_dir="assets")
\ No newline at end of file
+if __name__ == "__main__":
+    ft.app(main, assets_dir="assets")
\ No newline at end of file
@@ -0,0 +1,100 @@
+import itertools
+import threading
+import weakref
+from collections import deque
+from typing import Callable, Deque, Dict, Optional, Tuple
+import flet as ft
+
+PICK_TIMEOUT = 10 * 60  # seconds an unanswered dialog may block the queue
+
+
+class FilePickerService:
+    """
+    One shared FilePicker per page.
+
+    Widgets request a dialog through `pick_files` and get the result routed
+    back by request id, instead of appending a new FilePicker to the page
+    overlay on every click. Only one native dialog can be open, so requests
+    made while one is showing are queued and opened in turn. A dialog whose
+    result never arrives (the page reconnected, the dialog failed to open)
+    is given up on after `timeout` seconds so the queue keeps moving.
+    """
+    # instrumentation: number of FilePickers ever appended to a page overlay
+    overlay_appends = 0
+    # the page keeps its service alive through the overlay, entries go with the page
+    _services: "weakref.WeakValueDictionary[int, FilePickerService]" = weakref.WeakValueDictionary()
+
+    def __init__(self, page: ft.Page, timeout: float = PICK_TIMEOUT):
+        self.page = page
+        self.timeout = timeout
+        self._lock = threading.Lock()  # results and timeouts arrive on other threads
+        self._timer: Optional[threading.Timer] = None
+        self._request_ids = itertools.count(1)
+        self._callbacks: Dict[int, Callable] = {}
+        self._queue: Deque[Tuple[int, dict]] = deque()  # (request id, pick_files kwargs) waiting for the dialog
+        self._active_request: Optional[int] = None
+        self.file_picker = ft.FilePicker(on_result=self._on_result)
+        page.overlay.append(self.file_picker)
+        FilePickerService.overlay_appends += 1
+        page.update()
+
+    @classmethod
+    def for_page(cls, page: ft.Page) -> "FilePickerService":
+        """Return the page's service, creating it on first use"""
+        service = cls._services.get(id(page))
+        if service is None or service.page is not page:
+            service = cls(page)
+            cls._services[id(page)] = service
+        return service
+
+    @property
+    def overlay_size(self) -> int:
+        """Current number of controls in the page overlay"""
+        return len(self.page.overlay)
+
+    @property
+    def pending(self) -> int:
+        """Requests waiting for a result, the open dialog's included"""
+        return len(self._callbacks)
+
+    def pick_files(self, on_result: Callable[[ft.FilePickerResultEvent], None], **kwargs) -> int:
+        """Open the file dialog, or queue it behind the open one, and route its result to on_result"""
+        with self._lock:
+            request_id = next(self._request_ids)
+            self._callbacks[request_id] = on_result
+            self._queue.append((request_id, kwargs))
+            if self._active_request is None:
+                self._open_next()
+        return request_id
+
+    def cancel(self, request_id: int):
+        """Drop a request; a dialog already open for it still closes, its result is discarded"""
+        with self._lock:
+            self._callbacks.pop(request_id, None)
+            self._queue = deque(item for item in self._queue if item[0] != request_id)
+
+    def _open_next(self):
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        self._active_request = None
+        if self._queue:
+            self._active_request, kwargs = self._queue.popleft()
+            self._timer = threading.Timer(self.timeout, self._on_timeout, args=(self._active_request,))
+            self._timer.daemon = True
+            self._timer.start()
+            self.file_picker.pick_files(**kwargs)
+
+    def _on_timeout(self, request_id: int):
+        with self._lock:
+            if self._active_request != request_id:
+                return
+            self._callbacks.pop(request_id, None)
+            self._open_next()
+
+    def _on_result(self, e: ft.FilePickerResultEvent):
+        with self._lock:
+            callback = self._callbacks.pop(self._active_request, None)
+            self._open_next()
+        if callback:
+            callback(e)
@@ -39,8 +39,10 @@ class FormState:
     disable_android_splash_screen: bool = False
     
     # Package options
+    dependencies: List[str] = field(default_factory=list)
     include_optional_controls: List[str] = field(default_factory=list)
     exclude_additional_files: List[str] = field(default_factory=list)
+    size_budgets: List[str] = field(default_factory=list)  # e.g. apk=40MB, checked after each build
     compile_app_py_files: bool = False
     compile_site_packages_py_files: bool = False
     remove_unnecessary_app_files: bool = False
@@ -1,10 +1,21 @@
 import flet as ft
 from config.settings_manager import SettingsManager
-from typing import List, Union, Callable, Optional
+from typing import Dict, List, Union, Callable, Optional
 from time import time, sleep
-from utils.utils import colors_map, Platform, buildable_platforms, current_os
+from utils.utils import colors_map, Platform, buildable_platforms, current_os, format_bytes
+from pathlib import Path
 import asyncio, re, json, shutil, os
 from .toast import ToastPosition
+from .file_picker import FilePickerService
+from core.doctor import run_flutter_doctor, run_flet_doctor
+from core.doctor_cache import DoctorCache, DEFAULT_TTL, format_age
+from core.toolchain import TOOL_NAMES
+from core.asset_sync import AssetManifest, sync_asset, SyncReport
+from core.thumbnails import ThumbnailCache, read_base64
+from core.icon_pipeline import IconPipeline, PLATFORM_ICON_SPECS, ICON_SET_SPECS, is_available as icon_pipeline_available
+from core.project_scan import get_scanner
+from core.bundle_advisor import BundleAdvisor, Suggestion, format_heaviest
+from core.dependency_weights import DependencyWeights, environment_fingerprint, site_packages_dirs
 
 class FactoryButton(ft.TextButton):
     def __init__(self, content, on_click=None, **kwargs):
@@ -249,7 +260,7 @@ class FactoryField(ft.Container):
         )
 
 class FactoryBadge(ft.TextButton):
-    def __init__(self, text, on_click=None, **kwargs):
+    def __init__(self, text, on_click=None, detail="", **kwargs):
         super().__init__(
             on_click=on_click,
             **kwargs
@@ -261,15 +272,22 @@ class FactoryBadge(ft.TextButton):
             bgcolor=colors_map["secondary"],
             shape=ft.RoundedRectangleBorder(radius=6),
         )
+        self._detail = ft.Text(detail, size=11, color=colors_map["text_secondary"], visible=bool(detail))
         self.content=ft.Row(
             [
                 ft.Text(self.text),
+                self._detail,
                 ft.Icon(ft.Icons.CLOSE, size=12, color=colors_map["primary"])
             ],
             expand=False,
             tight=True
         )
 
+    def set_detail(self, detail: str):
+        """Show secondary info next to the badge text, e.g. a dependency size"""
+        self._detail.value = detail
+        self._detail.visible = bool(detail)
+
 class FactoryBadgeInput(ft.Container):
     def __init__(self, hint_text="", value="", badges=[], on_change=None, **kwargs):
         super().__init__(**kwargs)
@@ -365,6 +383,161 @@ class FactoryBadgeInput(ft.Container):
             # Trigger on_change event
             self._trigger_on_change()
 
+class ExcludeFilesInput(FactoryBadgeInput):
+    """Badge input for exclude patterns with a live preview of what they remove from the package"""
+    def __init__(self, root_getter: Callable[[], str], **kwargs):
+        super().__init__(**kwargs)
+        self.root_getter = root_getter
+        self._preview_generation = 0
+        self._suggest_pending = False
+        self._preview_text = ft.Text(
+            "",
+            size=12,
+            color=colors_map["text_secondary"],
+        )
+        self._suggestions_row = ft.Row(spacing=5, run_spacing=5, wrap=True)
+        self._heaviest_text = ft.Text(
+            "",
+            size=11,
+            color=colors_map["text_secondary"],
+        )
+        self.advisor = BundleAdvisor()
+        # suggestions only depend on the badges, a keystroke just updates the counts
+        self._text_field.on_change = lambda e: self.refresh_preview(suggest=False)
+        self.content.controls += [self._preview_text, self._suggestions_row, self._heaviest_text]
+
+    def did_mount(self):
+        self.refresh_preview()
+
+    def _trigger_on_change(self):
+        super()._trigger_on_change()
+        self.refresh_preview()
+
+    @FactoryBadgeInput.value.setter
+    def value(self, new_values):
+        FactoryBadgeInput.value.fset(self, new_values)
+        self.refresh_preview()
+
+    def refresh_preview(self, suggest: bool = True):
+        """Recompute the preview off the UI thread, including the pattern being typed"""
+        if not self.page:
+            return
+        patterns = self.value
+        if self._text_field.value:
+            patterns = patterns + [self._text_field.value]
+        # a keystroke superseding a badge change still has to refresh the suggestions
+        self._suggest_pending = self._suggest_pending or suggest
+        self._preview_generation += 1
+        self.page.run_thread(self._compute_preview, patterns, self._preview_generation, self._suggest_pending)
+
+    def _compute_preview(self, patterns: List[str], generation: int, suggest: bool = True):
+        root = self.root_getter()
+        suggestions, heaviest = [], ""
+        if not root or not os.path.isdir(root):
+            text = ""
+        else:
+            preview = get_scanner(root).preview(patterns)
+            text = (
+                f"Packaged: {preview.included_files} files ({format_bytes(preview.included_bytes)}) - "
+                f"excluded: {preview.excluded_files} files ({format_bytes(preview.excluded_bytes)})"
+            )
+            if suggest:
+                # cached per tree hash, so this is only slow the first time a tree is seen
+                report = self.advisor.analyze(root)
+                suggestions = report.suggestions_for(self.value)
+                heaviest = format_heaviest(report)
+        # a newer keystroke already started another preview
+        if generation != self._preview_generation or not self.page:
+            return
+        self._preview_text.value = text
+        if suggest or not text:
+            self._suggest_pending = False
+            self._suggestions_row.controls = [self._suggestion_chip(s) for s in suggestions]
+            self._heaviest_text.value = heaviest
+        self.update()
+
+    def _suggestion_chip(self, suggestion: Suggestion) -> ft.Control:
+        return ft.TextButton(
+            text=f"+ {suggestion.label}",
+            tooltip=suggestion.description,
+            style=ft.ButtonStyle(
+                color=colors_map["text_secondary"],
+                shape=ft.RoundedRectangleBorder(radius=6),
+                side=ft.BorderSide(color=colors_map["border_normal"], width=1),
+            ),
+            on_click=lambda e: self.add_pattern(suggestion.pattern),
+        )
+
+    def add_pattern(self, pattern: str):
+        """Add a suggested pattern as a badge"""
+        if pattern in self.value:
+            return
+        self._badges.append(FactoryBadge(text=pattern, on_click=self.remove_badge))
+        self._badges_row.controls = self._badges
+        self.update()
+        self._trigger_on_change()
+
+class DependencyBadgeInput(FactoryBadgeInput):
+    """Badge input for requirements, showing what each one weighs in the local environment"""
+    def __init__(self, project_dir_getter: Callable[[], str], **kwargs):
+        super().__init__(**kwargs)
+        self.project_dir_getter = project_dir_getter
+        self.weights: Optional[DependencyWeights] = None
+        self._weights_generation = 0
+        self._summary_text = ft.Text(
+            "",
+            size=12,
+            color=colors_map["text_secondary"],
+        )
+        self.content.controls.append(self._summary_text)
+
+    def did_mount(self):
+        self.refresh_weights()
+
+    def _trigger_on_change(self):
+        super()._trigger_on_change()
+        self.refresh_weights()
+
+    @FactoryBadgeInput.value.setter
+    def value(self, new_values):
+        FactoryBadgeInput.value.fset(self, new_values)
+        self.refresh_weights()
+
+    def refresh_weights(self):
+        """Weigh the current requirements off the UI thread"""
+        if not self.page:
+            return
+        self._weights_generation += 1
+        self.page.run_thread(self._compute_weights, self.value, self._weights_generation)
+
+    def _compute_weights(self, requirements: List[str], generation: int):
+        project_dir = self.project_dir_getter()
+        # a new environment fingerprint means packages were installed or removed since the last run
+        if self.weights is None or self.weights.fingerprint != environment_fingerprint(site_packages_dirs(project_dir)):
+            self.weights = DependencyWeights(project_dir)
+        try:
+            results = self.weights.analyze(requirements)
+        except Exception as e:
+            print(f"Error weighing dependencies: {e}")
+            return
+        if generation != self._weights_generation or not self.page:
+            return
+
+        by_requirement = {result.requirement: result for result in results}
+        for badge in self._badges:
+            result = by_requirement.get(badge.text)
+            badge.set_detail(result.label if result else "")
+            badge.tooltip = (
+                f"{len(result.closure)} packages, {format_bytes(result.unique_bytes)} not shared "
+                f"with other dependencies" + (f", not installed: {', '.join(result.missing)}" if result.missing else "")
+            ) if result and result.installed else None
+        installed = [result for result in results if result.installed]
+        self._summary_text.value = (
+            f"Estimated site-packages: {format_bytes(self.weights.union_bytes(installed))} "
+            f"from {len({name for result in installed for name in result.closure})} installed packages"
+        ) if installed else ""
+        self.update()
+
 class FactoryCard(ft.Container):
     def __init__(self, title: ft.Text = "Title", content: List[FactoryField] = []):
         super().__init__(
@@ -491,7 +664,7 @@ class PlatformButton(ft.ElevatedButton):
         self.state = 0
 
 class PlatformsRow(ft.Row):
-    def __init__(self, platforms: list[Platform], on_change=None):
+    def __init__(self, platforms: list[Platform], on_change=None, toolchain_index=None):
         super().__init__(
             alignment=ft.MainAxisAlignment.START,
             spacing=10,
@@ -523,6 +696,36 @@ class PlatformsRow(ft.Row):
         
         # same as before
         self.controls.append(ft.Container(width=0))
+
+        if toolchain_index:
+            self.set_toolchain_index(toolchain_index)
+
+    def set_toolchain_index(self, toolchain_index):
+        """Disable the platforms whose required toolchains are missing, the index may arrive after the row is shown"""
+        for button in self.buttons:
+            platform = button.platform
+            if platform not in buildable_platforms:
+                continue
+            required, provisioned = toolchain_index.missing_requirements(platform)
+            if required:
+                if button is self.selected_button:
+                    self.selected_button = None
+                    if self._on_change_callback:
+                        self._on_change_callback(None)
+                button.disable()
+                if button.page:
+                    button._update_style()
+                button.tooltip = ft.Tooltip(
+                    message=f"Cannot build {platform.value} app: {', '.join(TOOL_NAMES[t] for t in required)} not found",
+                    prefer_below=False,
+                )
+            elif provisioned:
+                button.tooltip = ft.Tooltip(
+                    message=f"{', '.join(TOOL_NAMES[t] for t in provisioned)} not found, flet build will install it",
+                    prefer_below=False,
+                )
+        if self.page:
+            self.update()
     
     def _handle_button_select(self, button):
         if button == self.selected_button:
@@ -544,6 +747,9 @@ class PlatformsRow(ft.Row):
         return self.selected_button.platform if self.selected_button else None
 
 # MARK: Icon selector
+ICON_EXTENSIONS = ["png", "jpg", "jpeg", "webp", "bmp", "gif"]
+
+
 class IconPicker(ft.Container):
     def __init__(
         self,
@@ -551,11 +757,14 @@ class IconPicker(ft.Container):
         on_change: Optional[Callable] = None,
         ref: Optional[ft.Ref] = None
     ):
-        super().__init__()
+        super().__init__(ref=ref)
         self.hint_text = hint_text
         self.on_change = on_change
         self._value = ""
         self.ref = ref
+        self.last_sync_report = None
+        self.icon_sets: Dict[str, Path] = {}  # rendered icon sets of the last copy, see ICON_SET_SPECS
+        self.thumbnails = ThumbnailCache()
         self.content = self._build_content()
         self.padding = 0
         self.margin = 0
@@ -606,13 +815,11 @@ class IconPicker(ft.Container):
                 if self.on_change:
                     self.on_change(e)
                 
-        file_picker = ft.FilePicker(on_result=on_dialog_result)
-        self.page.overlay.append(file_picker)
-        self.page.update()
         # Only allow image files
-        file_picker.pick_files(
+        FilePickerService.for_page(self.page).pick_files(
+            on_dialog_result,
             dialog_title=f"Select app icon file",
-            allowed_extensions=["png", "jpg", "jpeg", "webp", "bmp", "gif"],
+            allowed_extensions=ICON_EXTENSIONS,
             allow_multiple=False,
         )
     
@@ -629,15 +836,43 @@ class IconPicker(ft.Container):
             if value:
                 # Update preview
                 self.preview.visible = True
-                self.preview.content.src = value
+                thumb = self.thumbnails.get(value)
+                if thumb:
+                    self._show_thumbnail(thumb)
+                elif self.thumbnails.is_available() and self.page:
+                    # decoding a full resolution image must not block the UI
+                    self.page.run_thread(self._load_thumbnail, value)
+                else:
+                    self.preview.content.src_base64 = None
+                    self.preview.content.src = value
             else:
                 self.preview.visible = False
             
             self.update()
+
+    def _show_thumbnail(self, thumb):
+        self.preview.content.src = None
+        self.preview.content.src_base64 = read_base64(thumb)
+
+    def _load_thumbnail(self, value):
+        """Render the preview thumbnail, runs in a background thread"""
+        thumb = self.thumbnails.create(value)
+        if value != self._value:
+            return  # a newer icon was picked meanwhile
+        if thumb:
+            self._show_thumbnail(thumb)
+        else:
+            self.preview.content.src_base64 = None
+            self.preview.content.src = value
+        self.update()
     
     def copy_to_assets(self, project_path, create_assets=True):
         """
         Copy the selected icon to the assets directory with all the required filenames
+
+        When Pillow is installed, each platform gets a pre-rendered icon in its
+        own size and format from the cached icon pipeline. Destinations that
+        already hold the same content are skipped, see `sync_asset`.
         
         Args:
             project_path: Path to the project directory
@@ -666,18 +901,44 @@ class IconPicker(ft.Container):
         # All icon types to create
         icon_types = ["icon", "icon_ios", "icon_android", "icon_web", "icon_macos", "icon_windows"]
         
-        copied_files = []
-        
-        # Copy the file with each icon type name
+        if icon_pipeline_available():
+            outputs = IconPipeline().generate(source_path, PLATFORM_ICON_SPECS + ICON_SET_SPECS)
+            self.icon_sets = {spec.name: outputs[spec.name] for spec in ICON_SET_SPECS}
+            destinations = [assets_dir / spec.filename for spec in PLATFORM_ICON_SPECS]
+            self._remove_stale_icons(assets_dir, icon_types, destinations)
+            self.last_sync_report = SyncReport()
+            for spec, dest in zip(PLATFORM_ICON_SPECS, destinations):
+                self.last_sync_report.merge(sync_asset(outputs[spec.name], [dest], manifest_dir=assets_dir))
+        else:
+            self.icon_sets = {}
+            destinations = [assets_dir / f"{icon_type}{ext}" for icon_type in icon_types]
+            self._remove_stale_icons(assets_dir, icon_types, destinations)
+            self.last_sync_report = sync_asset(source_path, destinations, manifest_dir=assets_dir)
+        return self.last_sync_report.files
+
+    @staticmethod
+    def _remove_stale_icons(assets_dir: Path, icon_types: List[str], keep: List[Path]):
+        """
+        Remove icons left in another format by a previous icon, flet would pick either one
+
+        Only files the asset manifest records as synced by us, and unchanged since, are
+        removed: an icon the user put in assets by hand is never deleted.
+        """
+        manifest = AssetManifest(assets_dir)
+        removed = False
         for icon_type in icon_types:
-            dest_filename = f"{icon_type}{ext}"
-            dest_path = assets_dir / dest_filename
-            
-            # Copy the file
-            shutil.copy2(source_path, dest_path)
-            copied_files.append(str(dest_path))
-        
-        return copied_files
+            for extension in ICON_EXTENSIONS + ["ico"]:
+                path = assets_dir / f"{icon_type}.{extension}"
+                if path in keep or not manifest.wrote(path.name, path):
+                    continue
+                try:
+                    path.unlink()
+                    manifest.forget(path.name)
+                    removed = True
+                except OSError as e:
+                    print(f"Error removing stale icon {path}: {e}")
+        if removed:
+            manifest.save()
 
 
 class IconsManager:
@@ -687,6 +948,8 @@ class IconsManager:
     def __init__(self, project_path_getter):
         self.project_path_getter = project_path_getter
         self.icon_picker = None
+        self.last_sync_report = None
+        self.icon_sets = {}
     
     def set_icon_picker(self, picker):
         """Set the icon picker component"""
@@ -699,6 +962,8 @@ class IconsManager:
             return False
             
         copied_files = self.icon_picker.copy_to_assets(project_path, create_assets=True)
+        self.last_sync_report = self.icon_picker.last_sync_report
+        self.icon_sets = self.icon_picker.icon_sets
         return copied_files
 
 # MARK: Template
@@ -955,6 +1220,18 @@ class FactorySettingsDialog(ft.AlertDialog):
             "Flet Version", "Python Version", "Operating System"
         ]
 
+        # Cached doctor results, shown instantly when the dialog opens
+        self.doctor_cache = DoctorCache(
+            ttl=self.settings_manager.get("doctor_cache_ttl", DEFAULT_TTL)
+        )
+        self._live_doctors = set()  # doctor types whose rows a manual run is streaming into
+        self.doctor_runners = {
+            "flutter": run_flutter_doctor,
+            "flet": run_flet_doctor,
+        }
+        self.flutter_status = ft.Text("", size=10, color=ft.Colors.GREY_500)
+        self.flet_status = ft.Text("", size=10, color=ft.Colors.GREY_500)
+
         self._create_settings_content()
 
     def on_cancel(self, e):
@@ -1000,6 +1277,34 @@ class FactorySettingsDialog(ft.AlertDialog):
         """Handle auto save checkbox changes"""
         self.settings_manager.set("auto_save", e.control.value)
 
+    def _on_build_worker_change(self, e):
+        """Handle build worker checkbox changes"""
+        self.settings_manager.set("build_execution_mode", "worker" if e.control.value else "subprocess")
+
+    def _on_wheelhouse_change(self, e):
+        """Handle wheelhouse checkbox changes"""
+        self.settings_manager.set("wheelhouse_enabled", e.control.value)
+
+    def _on_index_proxy_change(self, e):
+        """Handle index proxy checkbox changes"""
+        self.settings_manager.set("index_proxy_enabled", e.control.value)
+
+    def _on_precompress_change(self, e):
+        """Handle web precompression checkbox changes"""
+        self.settings_manager.set("web_precompress_enabled", e.control.value)
+
+    def _on_asset_manifest_change(self, e):
+        """Handle web asset manifest checkbox changes"""
+        self.settings_manager.set("web_asset_manifest_enabled", e.control.value)
+
+    def _on_abi_fanout_change(self, e):
+        """Handle per-ABI Android build checkbox changes"""
+        self.settings_manager.set("android_abi_fanout_enabled", e.control.value)
+
+    def _on_resource_policy_change(self, e):
+        """Handle build resource policy checkbox changes"""
+        self.settings_manager.set("resource_policy_enabled", e.control.value)
+
     def _create_settings_content(self):
         """Create the settings dialog content with controls"""
         # Get current settings
@@ -1044,6 +1349,48 @@ class FactorySettingsDialog(ft.AlertDialog):
             on_change=self._on_auto_save_change
         )
         
+        build_worker_checkbox = FactoryCheckBox(
+            value=self.settings_manager.get("build_execution_mode", "subprocess") == "worker",
+            label="Run builds in a pre-warmed worker process",
+            on_change=self._on_build_worker_change
+        )
+
+        wheelhouse_checkbox = FactoryCheckBox(
+            value=self.settings_manager.get("wheelhouse_enabled", False),
+            label="Prefetch dependency wheels into a shared wheelhouse",
+            on_change=self._on_wheelhouse_change
+        )
+
+        index_proxy_checkbox = FactoryCheckBox(
+            value=self.settings_manager.get("index_proxy_enabled", False),
+            label="Share package downloads through a local caching index",
+            on_change=self._on_index_proxy_change
+        )
+
+        precompress_checkbox = FactoryCheckBox(
+            value=self.settings_manager.get("web_precompress_enabled", False),
+            label="Precompress web build output (.gz/.br)",
+            on_change=self._on_precompress_change
+        )
+
+        asset_manifest_checkbox = FactoryCheckBox(
+            value=self.settings_manager.get("web_asset_manifest_enabled", False),
+            label="Precache web assets by content hash (service worker)",
+            on_change=self._on_asset_manifest_change
+        )
+
+        abi_fanout_checkbox = FactoryCheckBox(
+            value=self.settings_manager.get("android_abi_fanout_enabled", False),
+            label="Build split APKs in parallel, one build per ABI",
+            on_change=self._on_abi_fanout_change
+        )
+
+        resource_policy_checkbox = FactoryCheckBox(
+            value=self.settings_manager.get("resource_policy_enabled", False),
+            label="Run builds at low priority, per-platform profiles in settings.json",
+            on_change=self._on_resource_policy_change
+        )
+
         # Flutter results
         
         # Create the content
@@ -1066,6 +1413,18 @@ class FactorySettingsDialog(ft.AlertDialog):
                         header=ft.Text("Auto Save", font_family="OpenRunde Regular", color=colors_map["text_secondary"]),
                         content=autosave_checkbox
                     ),
+                    SettingsItemExpander(
+                        header=ft.Text("Build Optimizations", font_family="OpenRunde Regular", color=colors_map["text_secondary"]),
+                        content=ft.Column([
+                            ft.Row([build_worker_checkbox]),
+                            ft.Row([wheelhouse_checkbox]),
+                            ft.Row([index_proxy_checkbox]),
+                            ft.Row([precompress_checkbox]),
+                            ft.Row([asset_manifest_checkbox]),
+                            ft.Row([abi_fanout_checkbox]),
+                            ft.Row([resource_policy_checkbox]),
+                        ])
+                    ),
                     ft.Text("Run checks", font_family="OpenRunde Regular", size=12, color="#595b5d"),
                     SettingsItemExpander(
                         "Run Flutter Doctor",
@@ -1081,6 +1440,7 @@ class FactorySettingsDialog(ft.AlertDialog):
                                     ],
                                     alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
                                 ),
+                                self.flutter_status,
                                 self.flutter_results,
                             ],
                             spacing=5
@@ -1100,6 +1460,7 @@ class FactorySettingsDialog(ft.AlertDialog):
                                     ],
                                     alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
                                 ),
+                                self.flet_status,
                                 self.flet_results,
                             ],
                             spacing=5
@@ -1195,57 +1556,90 @@ class FactorySettingsDialog(ft.AlertDialog):
             result_column.controls.append(new_row)
             result_rows[component] = new_row
         
-    async def execute_flutter_doctor(self, e):
-        """Run flutter doctor and display results"""
-        self.create_loading_rows("flutter")
-        self.update()
-        
-        # Run flutter doctor and update UI with results
-        async for result_json in run_flutter_doctor():
-            try:
-                result = json.loads(result_json)
-                # Update component statuses
-                for component, status in result.items():
-                    self.update_result_row(component, status, "flutter")
-                    self.update()
-            except json.JSONDecodeError:
-                print(f"Failed to decode JSON: {result_json}")
-        
-        # Check for any remaining components that didn't get updated
-        for component in list(self.flutter_result_rows.keys()):
-            row = self.flutter_result_rows[component]
+    def _apply_doctor_result(self, result, doctor_type="flutter"):
+        """Update the result rows from a single doctor result"""
+        version_info = result.get("version_info", "")
+        for component, status in result.items():
+            if component != "version_info":  # Skip the version_info key
+                self.update_result_row(component, status, doctor_type, version_info)
+
+    def _finalize_result_rows(self, doctor_type="flutter"):
+        """Mark components that didn't get a result as not checked"""
+        result_rows = self.flutter_result_rows if doctor_type == "flutter" else self.flet_result_rows
+        for component in list(result_rows.keys()):
+            row = result_rows[component]
             # If the first control is still a ProgressRing, it means this component wasn't checked
             if isinstance(row.controls[0], ft.ProgressRing):
-                self.update_result_row(component, "NOT CHECKED", "flutter")
-                
+                self.update_result_row(component, "NOT CHECKED", doctor_type)
+
+    def _set_doctor_status(self, doctor_type, text):
+        status = self.flutter_status if doctor_type == "flutter" else self.flet_status
+        status.value = text
+
+    def show_cached_results(self):
+        """Render cached doctor results with a staleness indicator"""
+        for doctor_type in self.doctor_runners:
+            if doctor_type in self._live_doctors:
+                continue
+            entry = self.doctor_cache.get(doctor_type)
+            refreshing = self.doctor_cache.is_refreshing(doctor_type)
+            if entry is None:
+                self._set_doctor_status(doctor_type, "Checking in background..." if refreshing else "")
+                continue
+
+            self.create_loading_rows(doctor_type)
+            for result in entry["results"]:
+                self._apply_doctor_result(result, doctor_type)
+            self._finalize_result_rows(doctor_type)
+
+            age = format_age(self.doctor_cache.age(entry))
+            if not self.doctor_cache.is_stale(entry):
+                self._set_doctor_status(doctor_type, f"Cached {age}")
+            elif refreshing:
+                self._set_doctor_status(doctor_type, f"Stale (cached {age}), refreshing...")
+            else:
+                self._set_doctor_status(doctor_type, f"Stale (cached {age}), run again to refresh")
+
+    async def refresh_doctors_in_background(self):
+        """Refresh stale doctor results concurrently and re-render if the dialog is open"""
+        refresh = asyncio.ensure_future(self.doctor_cache.refresh_all(self.doctor_runners))
+        if self.open and self.page:
+            self.show_cached_results()
+            self.update()
+        await refresh
+        if self.open and self.page:
+            self.show_cached_results()
+            self.update()
+
+    async def _execute_doctor(self, doctor_type):
+        """Run a doctor live through the cache, joining a background run of it if there is one"""
+        if doctor_type in self._live_doctors:
+            return  # already streaming into the rows
+        self._live_doctors.add(doctor_type)
+        self.create_loading_rows(doctor_type)
+        self._set_doctor_status(doctor_type, "Running...")
         self.update()
-    
+
+        def on_result(result):
+            # Update component statuses
+            self._apply_doctor_result(result, doctor_type)
+            self.update()
+
+        try:
+            await self.doctor_cache.refresh(doctor_type, self.doctor_runners[doctor_type], on_result)
+        finally:
+            self._live_doctors.discard(doctor_type)
+        self._finalize_result_rows(doctor_type)
+        self._set_doctor_status(doctor_type, "Cached just now")
+        self.update()
+
+    async def execute_flutter_doctor(self, e):
+        """Run flutter doctor and display results"""
+        await self._execute_doctor("flutter")
+
     async def execute_flet_doctor(self, e):
         """Run flet doctor and display results"""
-        self.create_loading_rows("flet")
-        self.update()
-        
-        # Run flet doctor and update UI with results
-        async for result_json in run_flet_doctor():
-            try:
-                result = json.loads(result_json)
-                # Update component statuses
-                for component, status in result.items():
-                    if component != "version_info":  # Skip the version_info key
-                        version_info = result.get("version_info", "")
-                        self.update_result_row(component, status, "flet", version_info)
-                        self.update()
-            except json.JSONDecodeError:
-                print(f"Failed to decode JSON: {result_json}")
-        
-        # Check for any remaining components that didn't get updated
-        for component in list(self.flet_result_rows.keys()):
-            row = self.flet_result_rows[component]
-            # If the first control is still a ProgressRing, it means this component wasn't checked
-            if isinstance(row.controls[0], ft.ProgressRing):
-                self.update_result_row(component, "NOT CHECKED", "flet")
-                
-        self.update()
+        await self._execute_doctor("flet")
 
 class SettingsItemExpander(ft.Container):
     def __init__(
@@ -1452,10 +1846,13 @@ class FactoryHeader(ft.Row):
 
     def did_mount(self):
         self.controls[1].on_click = self.open_settings_dialog
+        # warm the doctor cache so the settings dialog can show results instantly
+        self.page.run_task(self._settings_dialog.refresh_doctors_in_background)
     
     def open_settings_dialog(self, e):
         """Open the settings dialog when the button is clicked"""
         print("Opening settings dialog")
+        self._settings_dialog.show_cached_results()
         self.page.open(self._settings_dialog)
 
     async def _execute_flutter_doctor(self, e):
@@ -1466,86 +1863,3 @@ class FactoryHeader(ft.Row):
         """Wrapper to call the dialog's execute_flet_doctor method"""
         await self._settings_dialog.execute_flet_doctor(e)
 
-
-# Flutter doctor components that are typically checked
-async def run_flutter_doctor():
-    # env = os_environ.copy()
-
-    process = await asyncio.create_subprocess_exec(
-        'flutter', 'doctor', '-v',
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.STDOUT,
-        # env=env
-    )
-
-    # match check results
-    check_pattern = re.compile(r'^\[(.)?\]\s*(.*?)(?:\s*\(.*\))?$')
-    detected_components = set()
-    
-    while True:
-        line_bytes = await process.stdout.readline()
-        if not line_bytes:
-            break
-            
-        line = line_bytes.decode('utf-8')
-        if not line.strip():
-            continue
-            
-        # check if this is a section header line
-        match = check_pattern.match(line.strip())
-        if match:
-            status_symbol, description = match.groups()
-            # determine status based on symbol
-            status = "PASSED" if status_symbol == "✓" else "FAILED" if status_symbol == "✗" else "WARNING" if status_symbol == "!" else "UNKNOWN"
-            component_name = description.strip()
-            detected_components.add(component_name)
-            result = {component_name: status}
-            yield json.dumps(result)
-    
-    await process.wait() # wait for process to complete
-    
-    if process.returncode != 0:
-        yield json.dumps({"Error": f"Flutter doctor exited with code {process.returncode}"})
-
-async def run_flet_doctor():
-    """Run flet doctor command and yield results line by line"""
-    process = await asyncio.create_subprocess_shell(
-        "flet doctor",
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE
-    )
-    
-    # Read all output at once
-    stdout_data, stderr_data = await process.communicate()
-    
-    if stdout_data:
-        # Get the full output as a string
-        full_output = stdout_data.decode().strip()
-        
-        # Extract the main components using regex
-        flet_version_match = re.search(r'✔\s+Flet\s+Version:\s+(.*?)(?:\n|$)', full_output)
-        python_version_match = re.search(r'✔\s+Python\s+Version:\s+(.*?)(?:\n✔|$)', full_output, re.DOTALL)
-        os_version_match = re.search(r'✔\s+Operating\s+System:\s+(.*?)(?:\n|$)', full_output, re.DOTALL)
-        
-        # Yield the extracted information with PASSED status to match Flutter Doctor format
-        if flet_version_match:
-            result = {"Flet Version": "PASSED"}
-            result["version_info"] = flet_version_match.group(1).strip()
-            yield json.dumps(result)
-        
-        if python_version_match:
-            # Clean up any line breaks in the Python version
-            python_version = python_version_match.group(1).replace('\n', ' ').strip()
-            result = {"Python Version": "PASSED"}
-            result["version_info"] = python_version
-            yield json.dumps(result)
-        
-        if os_version_match:
-            # Clean up any line breaks in the OS version
-            os_version = os_version_match.group(1).replace('\n', ' ').strip()
-            result = {"Operating System": "PASSED"}
-            result["version_info"] = os_version
-            yield json.dumps(result)
-    
-    # Wait for the process to complete
-    await process.wait()
\ No newline at end of file
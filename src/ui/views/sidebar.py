@@ -5,12 +5,33 @@ import re
 import json
 import asyncio
 import shlex
+import dataclasses
+import functools
+import time
 from os import environ as os_environ
+from typing import List, Optional, Set, Tuple
 from ui.components.widgets import *
 from config.settings_manager import SettingsManager
+from core.preflight import run_preflight, format_preflight_report, DEFAULT_BUDGET_MS, project_dir, output_dir
+from core.watcher import ProjectWatcher, RebuildScheduler, WatchStats
+from core.preview_server import PreviewServer
+from core.precompress import precompress
+from core.asset_manifest import generate_manifest
+from core.artifact_report import ArtifactReport, analyze_artifacts
+from core.build_history import BuildHistory, BuildRecord
+from core.size_budgets import evaluate_budgets
+from core.resource_monitor import ResourceMonitor
+from core.resource_policy import ResourcePolicy, policy_for
+from core.icon_pipeline import install_web_icons, is_available as icon_pipeline_available
+from utils.utils import Platform
+from ui.components.form import FormState
+from core.build_runner import BuildRunner, run_build_subprocess
+from core.abi_fanout import AbiFanout, DEFAULT_BUILD_MEMORY_MB, fanout_abis
+from core.wheelhouse import Wheelhouse, WheelhouseStats, target_for
+from core.index_proxy import IndexProxy, get_proxy, DEFAULT_UPSTREAM
 
 class FactorySidebar(ft.Container):
-    def __init__(self, version="v0.0.1", command_ref=None, auto_save_manager=None, icons_manager=None):
+    def __init__(self, version="v0.0.1", command_ref=None, auto_save_manager=None, icons_manager=None, form_state=None):
         super().__init__()
         self.version = version
 
@@ -23,8 +44,21 @@ class FactorySidebar(ft.Container):
         self._flet_command_ref = command_ref
         self.auto_save_manager = auto_save_manager
         self.icons_manager = icons_manager
+        self.form_state = form_state
+        self.settings_manager = SettingsManager()
+        self.build_runner = BuildRunner(self.settings_manager)
         self._flet_build_output_ref = ft.Ref[ft.TextField]()
         self._build_button_ref = ft.Ref[FactoryButton]()
+        self._watch_checkbox_ref = ft.Ref[FactoryCheckBox]()
+        self._watch_stats_ref = ft.Ref[ft.Text]()
+        self.watcher: Optional[ProjectWatcher] = None
+        self.rebuild_scheduler: Optional[RebuildScheduler] = None
+        # manual builds and watch rebuilds share the output field, the worker and the project's build directory
+        self._build_lock = asyncio.Lock()
+        self._preview_button_ref = ft.Ref[FactoryButton]()
+        self._preview_stats_ref = ft.Ref[ft.Text]()
+        self._resource_stats_ref = ft.Ref[ft.Text]()
+        self.preview_server: Optional[PreviewServer] = None
         
         self.result_rows = {}
 
@@ -82,6 +116,14 @@ class FactorySidebar(ft.Container):
                     multiline=True,
                     max_lines=20
                 ),
+                ft.Text(
+                    "",
+                    ref=self._resource_stats_ref,
+                    font_family="FiraCode Light",
+                    size=8,
+                    color=colors_map["text_secondary"],
+                    visible=False,
+                ),
                 FactoryTextField(
                     "current command",
                     ref=self._flet_command_ref,
@@ -107,6 +149,38 @@ class FactorySidebar(ft.Container):
                     ref=self._build_button_ref,
                     on_click=self.execute_build_command
                 ),
+                ft.Row(
+                    [
+                        FactoryCheckBox(
+                            label="Watch & rebuild web",
+                            ref=self._watch_checkbox_ref,
+                            on_change=self._on_watch_change,
+                        ),
+                        ft.Text(
+                            "",
+                            ref=self._watch_stats_ref,
+                            size=10,
+                            color=colors_map["text_secondary"],
+                        ),
+                    ],
+                    alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+                ),
+                ft.Row(
+                    [
+                        FactoryButton(
+                            ft.Text("Preview web", size=12),
+                            ref=self._preview_button_ref,
+                            on_click=self.toggle_preview,
+                        ),
+                        ft.Text(
+                            "",
+                            ref=self._preview_stats_ref,
+                            size=10,
+                            color=colors_map["text_secondary"],
+                            expand=True,
+                        ),
+                    ],
+                ),
             ],
             spacing=5,
             expand=True,
@@ -135,6 +209,8 @@ class FactorySidebar(ft.Container):
         if self.page:
             self.height = self.page.window.height
             self.update()
+            # pre-warm the build worker so the first build skips flet_cli startup
+            self.page.run_task(self.build_runner.warm_up)
         
     async def execute_build_command(self, e):
         """Handle build button click"""
@@ -162,15 +238,19 @@ class FactorySidebar(ft.Container):
         
         # Copy icons to assets directory if icons_manager is provided
         if self.icons_manager:
-            copied_files = self.icons_manager.copy_icons_to_assets()
+            # icon rendering and hashing stay off the event loop
+            copied_files = await asyncio.to_thread(self.icons_manager.copy_icons_to_assets)
             if copied_files:
-                # Show toast with copied files
+                # Show toast with synced files
+                report = self.icons_manager.last_sync_report
                 self.page.pubsub.send_all({
                     "type": "toast",
-                    "message": f"Copied {len(copied_files)} icon files to assets directory",
+                    "message": f"Icons: {report.summary()}" if report else f"Copied {len(copied_files)} icon files to assets directory",
                     "toast_type": "success",
                     "duration": 10,
                 })
+                if not icon_pipeline_available():
+                    self.show_toast("Pillow is not installed: icons were copied as-is, not resized per platform", "warning", duration=10)
 
         # Get references to UI elements
         build_button = self._build_button_ref.current
@@ -186,8 +266,24 @@ class FactorySidebar(ft.Container):
             self.show_toast("No command to execute", "error")
             return
         
+        # Catch misconfigurations before spending minutes in flet build
+        if self.form_state:
+            output_field.value = "Running pre-flight checks...\n"
+            output_field.update()
+            preflight_results = await run_preflight(
+                self.form_state,
+                budget_ms=self.settings_manager.get("preflight_budget_ms", DEFAULT_BUDGET_MS)
+            )
+            output_field.value = format_preflight_report(preflight_results)
+            output_field.update()
+            if any(result.failed for result in preflight_results):
+                output_field.value += "\n❌ Build aborted: pre-flight checks failed"
+                output_field.update()
+                self.show_toast("Pre-flight checks failed", "error")
+                return
+
         # Clear previous output
-        output_field.value = f"Executing: {command}\n\n"
+        output_field.value = (output_field.value + "\n" if self.form_state else "") + f"Executing: {command}\n\n"
         output_field.update()
         
         # Disable the build button
@@ -204,38 +300,86 @@ class FactorySidebar(ft.Container):
                 "duration": 0,
                 "toast_id": build_toast_id
             })  # Duration 0 means it won't auto-dismiss
-        
+
+        if self._build_lock.locked():
+            output_field.value += "Waiting for the running watch rebuild to finish...\n\n"
+            output_field.update()
+        await self._build_lock.acquire()
         try:
             if isinstance(command, list):
                 args = command
             else:
                 args = shlex.split(command)
             
-            # Create and start the process
-            process = await asyncio.create_subprocess_exec(
-                *args,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.STDOUT,
-                env={
-                    **os_environ, 
-                    "LINES": "40",
-                    "COLUMNS": "40",
-                    # "CHROME_EXECUTABLE": "/Applications/Thorium.app/Contents/MacOS/Thorium"
-                }
-            )
-            
-            # Stream output to the text field
-            while True:
-                line_bytes = await process.stdout.readline()
-                if not line_bytes:
-                    break
-                    
-                line = line_bytes.decode('utf-8')
+            # counts pip installs served from the wheelhouse during the build
+            wheel_stats = WheelhouseStats()
+            wheelhouse_root = ""
+
+            # samples the build's process tree, the phase follows flet's output
+            monitor = ResourceMonitor(on_sample=self._update_resource_view)
+
+            def on_output(line):
                 output_field.value += line
                 output_field.update()
-            
-            # Wait for process to complete
-            await process.wait()
+                monitor.feed(line)
+                if wheelhouse_root:
+                    wheel_stats.feed(line, wheelhouse_root)
+
+            proxy = await self.start_index_proxy()
+            proxy_env = proxy.build_env() if proxy else {}
+            # the proxy is shared and long lived, report only what happened from here on
+            proxy_stats = proxy.stats.snapshot() if proxy else None
+            wheelhouse_env, wheelhouse_root = await self.prefetch_wheels(on_output, proxy)
+
+            # Run the build, as a subprocess or in the pre-warmed worker
+            build_env = {
+                **os_environ, 
+                "LINES": "40",
+                "COLUMNS": "40",
+                # the proxy's index wins over the wheelhouse's, the wheelhouse adds its find links either way
+                **wheelhouse_env,
+                **proxy_env,
+                # "CHROME_EXECUTABLE": "/Applications/Thorium.app/Contents/MacOS/Thorium"
+            }
+            policy = self.resource_policy(self.form_state.selected_platform if self.form_state else None)
+            if policy:
+                on_output(f"Resource policy: {await asyncio.to_thread(policy.describe)}\n\n")
+            build_started = time.perf_counter()
+            build_started_at = time.time()  # artifacts older than this are leftovers of earlier builds
+            artifacts = None  # the build's artifacts when known, found in the output directory otherwise
+            abis = fanout_abis(self.form_state) if self.form_state and self.settings_manager.get("android_abi_fanout_enabled", False) else []
+            # gradle daemons started from these directories belong to this build
+            if self.form_state:
+                monitor.add_owned_dir(str(project_dir(self.form_state)))
+                for abi in abis:
+                    monitor.add_owned_dir(AbiFanout.staging_dir(self.form_state, abi))
+            monitor.add_owned_dir(build_env.get("GRADLE_USER_HOME", ""))
+            monitor.start()
+            try:
+                if abis:
+                    # concurrent builds run as plain subprocesses, the worker pool has a single slot
+                    fanout = AbiFanout(
+                        functools.partial(run_build_subprocess, on_start=monitor.add_root, policy=policy),
+                        self.settings_manager.get("android_abi_build_memory_mb", DEFAULT_BUILD_MEMORY_MB),
+                    )
+                    returncode, results = await fanout.run(self.form_state, abis, build_env, on_output)
+                    # only what this run merged, not earlier outputs left in the output directory
+                    artifacts = [path for result in results for path in result.artifacts]
+                else:
+                    returncode = await self.build_runner.run(
+                        args, env=build_env, on_output=on_output, on_start=monitor.add_root, policy=policy
+                    )
+            finally:
+                await monitor.stop()
+
+            build_duration = time.perf_counter() - build_started
+            if monitor.samples:
+                output_field.value += f"\n{monitor.summary()}"
+
+            if wheelhouse_env and wheel_stats.total:
+                output_field.value += f"\nWheelhouse during build: {wheel_stats.summary()}"
+            if proxy:
+                output_field.value += f"\nIndex proxy during build: {proxy.stats.since(proxy_stats).summary()}"
 
             if self.page:
                 self.page.pubsub.send_all({
@@ -243,13 +387,24 @@ class FactorySidebar(ft.Container):
                     "toast_id": build_toast_id
                 })
             
+            # budgets see the build's own output, before post-build steps add files to it
+            budget_status = ""
+            if self.form_state:
+                budget_status = await self.report_build(
+                    self.form_state, returncode, build_duration, on_output, build_started_at, monitor.to_dict(), artifacts
+                )
+
             # Add final status
-            if process.returncode == 0:
+            if returncode == 0 and budget_status == "failed":
+                output_field.value += "\n❌ Build failed: size budget exceeded"
+            elif returncode == 0:
                 output_field.value += "\n✅ Build completed successfully!"
                 self.show_toast("Build completed successfully!", "success")
+                if self.form_state and self.form_state.selected_platform == Platform.WEB:
+                    await self.run_web_post_build(self.form_state, on_output)
             else:
-                output_field.value += f"\n❌ Build failed with exit code {process.returncode}"
-                self.show_toast(f"Build failed with exit code {process.returncode}", "error")
+                output_field.value += f"\n❌ Build failed with exit code {returncode}"
+                self.show_toast(f"Build failed with exit code {returncode}", "error")
             
             output_field.update()
             
@@ -259,11 +414,259 @@ class FactorySidebar(ft.Container):
             self.show_toast(f"Error: {str(e)}", "error")
         
         finally:
+            self._build_lock.release()
             # Re-enable the build button
             build_button.disabled = False
             build_button.content.controls[0] = active_btn_icon
             build_button.update()
 
+    async def start_index_proxy(self) -> Optional[IndexProxy]:
+        """Start the shared caching index proxy when enabled, concurrent builds reuse the running one"""
+        if not self.settings_manager.get("index_proxy_enabled", False):
+            return None
+        try:
+            return await get_proxy(self.settings_manager.get("index_proxy_upstream", DEFAULT_UPSTREAM))
+        except OSError as e:
+            print(f"Error starting index proxy: {e}")
+            return None
+
+    def resource_policy(self, platform: Optional[Platform]) -> Optional[ResourcePolicy]:
+        """Resource policy of the platform's profile, None when policies are off or unrestricted"""
+        if not platform or not self.settings_manager.get("resource_policy_enabled", False):
+            return None
+        policy = policy_for(self.settings_manager.get("resource_policies", {}), platform.cmd_value)
+        return None if policy.is_default else policy
+
+    def _update_resource_view(self, monitor: ResourceMonitor):
+        """Live sparklines of the running build"""
+        text = self._resource_stats_ref.current
+        if text is None:
+            return
+        text.value = monitor.sparklines()
+        text.visible = True
+        text.update()
+
+    async def report_build(
+        self,
+        form_state: FormState,
+        returncode: int,
+        duration: float,
+        on_output,
+        started_at: float,
+        resources: Optional[dict] = None,
+        artifacts: Optional[List[str]] = None,
+    ) -> str:
+        """
+        Record the build in history, breaking mobile artifacts down against the previous
+        successful build and checking the project's size budgets
+
+        Returns the budget status, "failed" when the build has to be reported as failed.
+        """
+        platform = form_state.selected_platform.cmd_value if form_state.selected_platform else ""
+        project = str(project_dir(form_state))
+        history = BuildHistory()
+        reports = []
+        if returncode == 0 and form_state.selected_platform in (Platform.ANDROID_APK, Platform.ANDROID_AAP, Platform.IOS):
+            reports = await asyncio.to_thread(analyze_artifacts, str(output_dir(form_state)), started_at, artifacts)
+            previous_record = history.last_successful(project, platform)
+            previous = [ArtifactReport.from_dict(data) for data in previous_record.artifacts] if previous_record else []
+            for report in reports:
+                before = next((item for item in previous if item.name == report.name), None)
+                on_output(f"\n\n{report.summary(before)}")
+                regressions = report.regressions(before) if before else []
+                if regressions:
+                    on_output("\n⚠️ Size regression since the last build:\n  " + "\n  ".join(regressions))
+                    self.show_toast(f"{report.name} grew since the last build", "warning", duration=10)
+
+        budget_status = ""
+        if returncode == 0 and form_state.size_budgets:
+            budgets = await asyncio.to_thread(
+                evaluate_budgets, form_state.size_budgets, platform, str(output_dir(form_state)), reports
+            )
+            if budgets.results or budgets.errors:
+                budget_status = budgets.status
+                on_output(f"\n\n{budgets.summary()}")
+                offending = ", ".join(result.budget.label for result in budgets.offending())
+                if budget_status == "failed":
+                    self.show_toast(f"Size budget exceeded: {offending}", "error", duration=10)
+                elif budget_status == "warned":
+                    self.show_toast(f"Close to size budget: {offending}", "warning", duration=10)
+
+        history.add(project, BuildRecord(platform=platform, returncode=returncode, duration=duration,
+                                         artifacts=[report.to_dict() for report in reports], budget_status=budget_status,
+                                         resources=resources or {}))
+        return budget_status
+
+    async def run_web_post_build(self, web_state: FormState, on_output):
+        """Post-build steps over the web output, each one optional"""
+        web_output = str(output_dir(web_state))
+        if self.icons_manager and self.icons_manager.icon_sets:
+            # before the manifest, so it hashes the icons that are served
+            written = await asyncio.to_thread(install_web_icons, self.icons_manager.icon_sets, web_output)
+            if written:
+                on_output(f"\nInstalled {len(written)} web icons, maskable ones padded into the safe zone\n")
+        # before precompression, so the manifest and service worker get their .gz/.br variants too
+        if self.settings_manager.get("web_asset_manifest_enabled", False):
+            report = await asyncio.to_thread(generate_manifest, web_output)
+            on_output(f"\n{report.summary()}\n")
+        if self.settings_manager.get("web_precompress_enabled", False):
+            report = await asyncio.to_thread(precompress, web_output)
+            on_output(f"\n{report.summary()}\n")
+
+    def will_unmount(self):
+        self.stop_watch()
+        if self.preview_server:
+            self.page.run_task(self.preview_server.stop)
+
+    # MARK: Preview server
+    async def toggle_preview(self, e):
+        """Serve the web build output locally, or stop serving it"""
+        button = self._preview_button_ref.current
+        if self.preview_server and self.preview_server.running:
+            await self.preview_server.stop()
+            self.preview_server = None
+            button.content.value = "Preview web"
+            button.update()
+            return
+        if not self.form_state:
+            return
+
+        web_output = output_dir(dataclasses.replace(self.form_state, selected_platform=Platform.WEB, on_change=None))
+        if not (web_output / "index.html").is_file():
+            self.show_toast("No web build found, build the web target first", "error")
+            return
+        self.preview_server = PreviewServer(str(web_output))
+        try:
+            await self.preview_server.start()
+        except OSError as e:
+            self.preview_server = None
+            self.show_toast(f"Could not start preview server: {e}", "error")
+            return
+        button.content.value = "Stop preview"
+        button.update()
+        self.page.launch_url(self.preview_server.url)
+        self.page.run_task(self._refresh_preview_stats, self.preview_server)
+
+    async def _refresh_preview_stats(self, server: PreviewServer):
+        stats_text = self._preview_stats_ref.current
+        while server.running and stats_text.page:
+            stats_text.value = f"{server.url}\n{server.stats.summary()}"
+            stats_text.update()
+            await asyncio.sleep(1)
+        if stats_text.page:
+            stats_text.value = ""
+            stats_text.update()
+
+    # MARK: Watch mode
+    def _on_watch_change(self, e):
+        """Handle watch checkbox changes"""
+        if e.control.value:
+            self.page.run_task(self.start_watch)
+        else:
+            self.stop_watch()
+
+    async def start_watch(self):
+        """Watch the project and rebuild the web target whenever sources change"""
+        if not self.form_state or not self.form_state.python_app_path:
+            self.show_toast("Select a project before enabling watch mode", "error")
+            self._watch_checkbox_ref.current.value = False
+            self._watch_checkbox_ref.current.update()
+            return
+        self.stop_watch()
+
+        root = project_dir(self.form_state)
+        exclude = list(self.form_state.exclude_additional_files)
+        # a custom output directory inside the project must not retrigger builds
+        web_output = output_dir(dataclasses.replace(self.form_state, selected_platform=Platform.WEB, on_change=None))
+        if web_output.resolve().is_relative_to(root):
+            exclude.append(f"/{web_output.resolve().relative_to(root).as_posix()}/")
+
+        self.watcher = ProjectWatcher(str(root), on_batch=self._on_watch_batch, exclude=exclude)
+        self.rebuild_scheduler = RebuildScheduler(self._run_watch_build, self.watcher.stats, on_finished=self._update_watch_stats)
+        self.watcher.start()
+        self.show_toast(f"Watching {root} ({self.watcher.backend})", "success")
+        self.rebuild_scheduler.trigger()
+        self._update_watch_stats(self.watcher.stats)
+
+    def stop_watch(self):
+        if self.watcher:
+            self.watcher.stop()
+            self.watcher = None
+        if self.rebuild_scheduler:
+            self.rebuild_scheduler.cancel()
+            self.rebuild_scheduler = None
+
+    def _on_watch_batch(self, paths: Set[str]):
+        if self.rebuild_scheduler:
+            self.rebuild_scheduler.trigger()
+        self._update_watch_stats(self.watcher.stats)
+
+    def _update_watch_stats(self, stats: WatchStats):
+        stats_text = self._watch_stats_ref.current
+        if stats_text and stats_text.page:
+            stats_text.value = stats.summary() + (f" · {stats.cancelled} cancelled" if stats.cancelled else "")
+            stats_text.update()
+
+    async def _run_watch_build(self) -> int:
+        """Build the web target from the current form state once no manual build is running, returns the exit code"""
+        async with self._build_lock:
+            return await self._run_watch_build_locked()
+
+    async def _run_watch_build_locked(self) -> int:
+        output_field = self._flet_build_output_ref.current
+        web_state = dataclasses.replace(self.form_state, selected_platform=Platform.WEB, on_change=None)
+        args = web_state.get_build_command()
+        output_field.value = f"[watch] Rebuilding: {shlex.join(args)}\n\n"
+        output_field.update()
+
+        def on_output(line):
+            output_field.value += line
+            output_field.update()
+
+        try:
+            returncode = await self.build_runner.run(
+                args,
+                env={**os_environ, "LINES": "40", "COLUMNS": "40"},
+                on_output=on_output,
+                policy=self.resource_policy(Platform.WEB),
+            )
+        except asyncio.CancelledError:
+            output_field.value += "\n⏹ Build cancelled, sources changed again"
+            output_field.update()
+            raise
+        output_field.value += "\n✅ Web build up to date" if returncode == 0 else f"\n❌ Web build failed with exit code {returncode}"
+        output_field.update()
+        if returncode == 0:
+            await self.run_web_post_build(web_state, on_output)
+        return returncode
+
+    def _get_wheelhouse(self, proxy: Optional[IndexProxy] = None) -> Optional[Wheelhouse]:
+        if not self.settings_manager.get("wheelhouse_enabled", False):
+            return None
+        return Wheelhouse(
+            index_url=self.settings_manager.get("wheelhouse_index_url", "") or (proxy.index_url if proxy else ""),
+            find_links=self.settings_manager.get("wheelhouse_find_links", []),
+            offline=self.settings_manager.get("wheelhouse_offline", False),
+        )
+
+    async def prefetch_wheels(self, on_output, proxy: Optional[IndexProxy] = None) -> Tuple[dict, str]:
+        """Fill the wheelhouse for the project's dependencies, returning the env pointing the build at it and its root"""
+        wheelhouse = self._get_wheelhouse(proxy)
+        if not wheelhouse or not self.form_state or not self.form_state.dependencies:
+            return {}, ""
+        target = target_for(self.form_state.selected_platform)
+        if target is None:
+            return {}, ""
+        on_output(f"Prefetching wheels for {target.tag}...\n")
+        try:
+            stats = await wheelhouse.prefetch(self.form_state.dependencies, target, on_output)
+        except (RuntimeError, OSError) as e:
+            # the build can still fetch everything itself
+            on_output(f"⚠️ Wheelhouse prefetch failed, building without it: {e}\n\n")
+            return {}, ""
+        on_output(f"Wheelhouse prefetch: {stats.summary()}\n\n")
+        return wheelhouse.build_env(target), str(wheelhouse.root)
+
     def show_toast(self, message, toast_type="default", duration=3):
         """Send a toast notification via pubsub"""
         if self.page:
@@ -1,4 +1,5 @@
 from enum import Enum
+from pathlib import Path
 import platform
 
 colors_map = {
@@ -36,4 +37,19 @@ buildable_platforms_map = {
     "linux": [Platform.LINUX, Platform.ANDROID_APK, Platform.ANDROID_AAP, Platform.WEB],
 }
 # get the buildable platforms for the current os
-buildable_platforms = buildable_platforms_map.get(current_os, [])
\ No newline at end of file
+buildable_platforms = buildable_platforms_map.get(current_os, [])
+
+def app_data_dir(*parts) -> Path:
+    """Return (and create) a directory under ~/.fletfactory"""
+    directory = Path.home() / ".fletfactory"
+    directory = directory.joinpath(*parts)
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def format_bytes(size: float) -> str:
+    """Human readable byte size, e.g. '1.2 MB'"""
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(size) < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
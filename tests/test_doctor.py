@@ -0,0 +1,63 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+from core.doctor import DoctorLineParser, merge_result, stream_doctor
+
+TRANSCRIPTS = Path(__file__).parent / "transcripts"
+REPLAY = "import sys; sys.stdout.write(open(sys.argv[1], encoding='utf-8').read())"
+
+
+def parse(name: str):
+    """Feed a recorded transcript through the parser, merging results like the consumers do"""
+    parser, emitted, results = DoctorLineParser(), [], []
+    with open(TRANSCRIPTS / name, encoding="utf-8") as f:
+        for line in f:
+            result = parser.feed(line)
+            if result:
+                emitted.append(result)
+                merge_result(results, result)
+    return emitted, results
+
+
+def test_flutter_doctor_checks():
+    _, results = parse("flutter_doctor.txt")
+    assert results == [
+        {"Flutter": "PASSED"},
+        {"Android toolchain - develop for Android devices": "WARNING"},
+        {"Xcode - develop for iOS and macOS": "PASSED"},
+        {"Chrome - develop for the web": "PASSED"},
+        {"Android Studio": "FAILED"},
+        {"VS Code": "PASSED"},
+        {"Connected device": "PASSED"},
+        {"Network resources": "PASSED"},
+    ]
+
+
+def test_flet_doctor_wrapped_lines_merge_into_one_result():
+    emitted, results = parse("flet_doctor.txt")
+    # wrapped lines re-emit their check extended, so it updates live...
+    assert len(emitted) == 5
+    # ...but each check is kept once, with its full text
+    assert [next(iter(result)) for result in results] == ["Flet Version", "Python Version", "Operating System"]
+    assert results[0]["version_info"] == "0.27.6"
+    assert results[1]["version_info"] == "3.12.8 (main, Dec  3 2024, 18:42:41) [Clang 16.0.0 (clang-1600.0.26.4)]"
+    assert results[2]["version_info"].endswith("root:xnu-11215.81.4~3/RELEASE_ARM64_T6000)")
+
+
+def collect(*args):
+    async def run():
+        return [json.loads(result) async for result in stream_doctor(*args, name="Flet doctor")]
+    return asyncio.run(run())
+
+
+def test_stream_doctor_replays_a_transcript():
+    results = collect(sys.executable, "-c", REPLAY, str(TRANSCRIPTS / "flet_doctor.txt"))
+    assert [next(iter(result)) for result in results] == ["Flet Version", "Python Version", "Python Version", "Operating System", "Operating System"]
+
+
+def test_missing_doctor_binary_is_reported_as_a_result():
+    results = collect("fletfactory-no-such-doctor", "doctor")
+    assert len(results) == 1
+    assert results[0]["Error"].startswith("Could not run Flet doctor")
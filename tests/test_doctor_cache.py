@@ -0,0 +1,28 @@
+import asyncio
+import json
+
+from core.doctor_cache import DoctorCache
+
+
+def test_a_run_joining_an_in_flight_refresh_gets_every_result(tmp_path):
+    runs = []
+
+    async def runner():
+        runs.append(1)
+        for i in range(4):
+            yield json.dumps({f"check {i}": "PASSED"})
+            await asyncio.sleep(0.02)
+
+    async def main():
+        cache = DoctorCache(cache_file=tmp_path / "doctor_cache.json")
+        background = asyncio.ensure_future(cache.refresh_all({"flet": runner}))
+        await asyncio.sleep(0.03)  # joins after the first results arrived
+        streamed = []
+        results = await cache.refresh("flet", runner, streamed.append)
+        await background
+        return cache, streamed, results
+
+    cache, streamed, results = asyncio.run(main())
+    assert len(runs) == 1
+    assert streamed == results == [{f"check {i}": "PASSED"} for i in range(4)]
+    assert cache.get("flet")["results"] == results
@@ -0,0 +1,113 @@
+import gc
+import importlib
+import importlib.util
+import sys
+import time
+import types
+from types import SimpleNamespace
+
+import pytest
+
+
+class FakePage:
+    """Just what the service touches: the overlay and update()"""
+    def __init__(self):
+        self.overlay = []
+
+    def update(self):
+        pass
+
+
+class FakeFilePicker:
+    """Records the dialogs opened, results are delivered by calling the service's _on_result"""
+    def __init__(self, on_result=None):
+        self.on_result = on_result
+        self.opened = []
+
+    def pick_files(self, **kwargs):
+        self.opened.append(kwargs["dialog_title"])
+
+
+@pytest.fixture
+def file_picker(monkeypatch):
+    """The file_picker module with a fake FilePicker, importable without flet installed"""
+    if "flet" not in sys.modules and importlib.util.find_spec("flet") is None:
+        flet = types.ModuleType("flet")
+        flet.Page = flet.FilePickerResultEvent = object
+        monkeypatch.setitem(sys.modules, "flet", flet)
+    module = importlib.import_module("ui.components.file_picker")
+    monkeypatch.setattr(module.ft, "FilePicker", FakeFilePicker, raising=False)
+    return module
+
+
+@pytest.fixture
+def service(file_picker):
+    service = file_picker.FilePickerService.for_page(FakePage())
+    service.opened = service.file_picker.opened
+    return service
+
+
+def result(path: str):
+    return SimpleNamespace(files=[SimpleNamespace(path=path)])
+
+
+def test_one_picker_per_page(service, file_picker):
+    assert file_picker.FilePickerService.for_page(service.page) is service
+    service.pick_files(lambda e: None, dialog_title="a")
+    service.pick_files(lambda e: None, dialog_title="b")
+    assert service.overlay_size == 1
+
+
+def test_results_are_routed_to_their_request(service):
+    received = []
+    first = service.pick_files(lambda e: received.append(("first", e.files[0].path)), dialog_title="first")
+    second = service.pick_files(lambda e: received.append(("second", e.files[0].path)), dialog_title="second")
+    assert first != second
+    # the second dialog waits until the first one is answered
+    assert service.opened == ["first"]
+
+    service._on_result(result("icon.png"))
+    assert received == [("first", "icon.png")]
+    assert service.opened == ["first", "second"]
+
+    service._on_result(result("app.png"))
+    assert received == [("first", "icon.png"), ("second", "app.png")]
+    assert service.pending == 0
+
+
+def test_cancelled_requests_get_no_result(service):
+    received = []
+    first = service.pick_files(received.append, dialog_title="first")
+    second = service.pick_files(received.append, dialog_title="second")
+    service.cancel(second)
+    service.cancel(first)
+    service._on_result(result("icon.png"))
+    assert received == []
+    assert service.opened == ["first"]
+    assert service.pending == 0
+
+
+def test_unanswered_dialogs_stop_blocking_the_queue(service):
+    received = []
+    service.timeout = 0.05
+    service.pick_files(lambda e: received.append("first"), dialog_title="first")
+    service.timeout = 60  # only the first dialog goes unanswered
+    service.pick_files(lambda e: received.append("second"), dialog_title="second")
+    deadline = time.monotonic() + 2
+    while service.opened != ["first", "second"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert service.opened == ["first", "second"]
+
+    service._on_result(result("icon.png"))
+    assert received == ["second"]
+    assert service.pending == 0
+
+
+def test_services_go_away_with_their_page(file_picker):
+    page = FakePage()
+    key = id(page)
+    file_picker.FilePickerService.for_page(page)
+    assert key in file_picker.FilePickerService._services
+    del page
+    gc.collect()
+    assert key not in file_picker.FilePickerService._services
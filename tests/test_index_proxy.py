@@ -0,0 +1,122 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from core.index_proxy import IndexProxy
+
+ARCHIVE = b"demo archive bytes"
+
+
+class UpstreamHandler(BaseHTTPRequestHandler):
+    """Stand-in index: one project page linking a file on itself, one on another host and a local path"""
+    requests = []  # paths asked for, reset by the fixture
+
+    def do_GET(self):
+        UpstreamHandler.requests.append(self.path)
+        if self.path == "/simple/demo/":
+            host = f"127.0.0.1:{self.server.server_address[1]}"
+            body = (
+                f'<a href="http://{host}/files/demo-1.0.tar.gz#sha256=00">demo-1.0.tar.gz</a>'
+                '<a href="file:///etc/hostname">local</a>'
+            ).encode("utf-8")
+            content_type = "text/html"
+        elif self.path == "/files/demo-1.0.tar.gz":
+            time.sleep(0.2)  # slow enough for concurrent requests to overlap
+            body, content_type = ARCHIVE, "application/octet-stream"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def upstream():
+    UpstreamHandler.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), UpstreamHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+async def request(proxy: IndexProxy, path: str, host: str = ""):
+    reader, writer = await asyncio.open_connection(proxy.host, proxy.port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host or f'{proxy.host}:{proxy.port}'}\r\nConnection: close\r\n\r\n".encode("latin-1"))
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), body
+
+
+def run_proxy(upstream: str, store_dir, check):
+    async def main():
+        proxy = IndexProxy(f"{upstream}/simple", store_dir=store_dir)
+        await proxy.start()
+        try:
+            await check(proxy)
+        finally:
+            await proxy.stop()
+    asyncio.run(main())
+
+
+def test_files_are_served_through_the_proxy(upstream, tmp_path):
+    async def check(proxy):
+        status, page = await request(proxy, "/simple/demo/")
+        assert status == 200
+        proxied = f"/_files/http/{upstream[len('http://'):]}/files/demo-1.0.tar.gz"
+        assert f'href="{proxied}#sha256=00"'.encode("utf-8") in page
+        # links to other schemes are left alone rather than proxied
+        assert b'href="file:///etc/hostname"' in page
+
+        assert await request(proxy, proxied) == (200, ARCHIVE)
+        assert await request(proxy, proxied) == (200, ARCHIVE)
+        assert proxy.stats.hits == 1
+
+    run_proxy(upstream, tmp_path, check)
+
+
+def test_concurrent_requests_share_one_upstream_fetch(upstream, tmp_path):
+    async def check(proxy):
+        await request(proxy, "/simple/demo/")
+        proxied = f"/_files/http/{upstream[len('http://'):]}/files/demo-1.0.tar.gz"
+        responses = await asyncio.gather(*(request(proxy, proxied) for _ in range(5)))
+        assert responses == [(200, ARCHIVE)] * 5
+        assert UpstreamHandler.requests.count("/files/demo-1.0.tar.gz") == 1
+        assert proxy.stats.coalesced == 4
+
+    run_proxy(upstream, tmp_path, check)
+
+
+def test_files_route_rejects_other_schemes_and_hosts(upstream, tmp_path):
+    async def check(proxy):
+        await request(proxy, "/simple/demo/")
+        assert (await request(proxy, "/_files/file//etc/hostname"))[0] == 403
+        assert (await request(proxy, "/_files/http/example.com/files/demo-1.0.tar.gz"))[0] == 403
+        assert proxy.stats.misses == 1  # only the project page reached the upstream
+
+    run_proxy(upstream, tmp_path, check)
+
+
+def test_requests_for_other_hosts_are_rejected(upstream, tmp_path):
+    async def check(proxy):
+        assert (await request(proxy, "/simple/demo/", host=f"rebound.example:{proxy.port}"))[0] == 421
+        assert proxy.stats.misses == 0
+
+    run_proxy(upstream, tmp_path, check)
+
+
+def test_upstream_must_be_http(tmp_path):
+    with pytest.raises(ValueError):
+        IndexProxy("file:///etc", store_dir=tmp_path)
@@ -0,0 +1,26 @@
+from core.bundle_advisor import DATA_RULES, JUNK_RULES
+from core.project_scan import ProjectScanner
+
+
+def write(path, size: int):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+
+
+def test_preview_each_matches_one_preview_per_pattern(tmp_path):
+    write(tmp_path / "main.py", 10)
+    write(tmp_path / "data" / "big.csv", 500)
+    write(tmp_path / "__pycache__" / "main.cpython-312.pyc", 20)
+    write(tmp_path / "venv" / "lib" / "six.py", 30)
+    write(tmp_path / "venv" / "lib" / "__pycache__" / "six.cpython-312.pyc", 40)
+    write(tmp_path / "tests" / "test_main.py", 5)
+    write(tmp_path / "tests" / "fixtures" / "rows.csv", 7)
+    write(tmp_path / ".DS_Store", 1)
+
+    scanner = ProjectScanner(str(tmp_path))
+    patterns = [pattern for pattern, _ in JUNK_RULES + DATA_RULES] + ["tests/fixtures"]
+    for pattern, each in zip(patterns, scanner.preview_each(patterns, max_age=60)):
+        one = scanner.preview([pattern], max_age=60)
+        assert (each.excluded_files, each.excluded_bytes, each.included_files, each.included_bytes) == (
+            one.excluded_files, one.excluded_bytes, one.included_files, one.included_bytes
+        ), pattern
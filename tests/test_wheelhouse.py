@@ -0,0 +1,66 @@
+import asyncio
+import subprocess
+import sys
+import zipfile
+from urllib.parse import unquote, urlsplit
+
+from core.wheelhouse import ANDROID_TARGET, EMBEDDED_PYTHON_VERSION, Wheelhouse, target_for
+from utils.utils import Platform
+
+
+def make_wheel(directory, name: str, tag: str) -> str:
+    """A minimal installable wheel, enough for pip to read its metadata"""
+    filename = f"{name}-1.0-{tag}.whl"
+    dist_info = f"{name}-1.0.dist-info"
+    with zipfile.ZipFile(directory / filename, "w") as wheel:
+        wheel.writestr(f"{dist_info}/METADATA", f"Metadata-Version: 2.1\nName: {name}\nVersion: 1.0\n")
+        wheel.writestr(f"{dist_info}/WHEEL", f"Wheel-Version: 1.0\nGenerator: test\nRoot-Is-Purelib: false\nTag: {tag}\n")
+        wheel.writestr(f"{dist_info}/RECORD", "")
+    return filename
+
+
+def test_prefetch_downloads_a_wheel_per_abi_offline(tmp_path):
+    # spaces in both paths: find links are passed to pip through a whitespace separated variable
+    index = tmp_path / "local index"
+    index.mkdir()
+    native = [make_wheel(index, "native", f"cp312-cp312-{platform}") for platform in ANDROID_TARGET.platforms]
+    pure = make_wheel(index, "pure", "py3-none-any")
+
+    wheelhouse = Wheelhouse(root=tmp_path / "wheel house", find_links=[str(index)], offline=True)
+    lines = []
+    stats = asyncio.run(wheelhouse.prefetch(["native", "pure"], ANDROID_TARGET, lines.append))
+
+    target_dir = wheelhouse.target_dir(ANDROID_TARGET)
+    assert sorted(path.name for path in target_dir.glob("*.whl")) == sorted(native + [pure]), "".join(lines)
+    assert (wheelhouse.shared_dir / pure).samefile(target_dir / pure)
+    # the pure wheel is fetched by the first platform's run and found in place by the others
+    assert stats.hits >= len(ANDROID_TARGET.platforms) - 1
+
+    env = wheelhouse.build_env(ANDROID_TARGET)
+    links = env["PIP_FIND_LINKS"].split()
+    assert [unquote(urlsplit(link).path) for link in links] == [str(target_dir), str(wheelhouse.shared_dir), str(index)]
+    assert env["PIP_NO_INDEX"] == "1"
+
+
+def test_build_env_lets_pip_install_from_the_wheelhouse(tmp_path):
+    wheelhouse_dir = tmp_path / "wheel house"
+    wheelhouse = Wheelhouse(root=wheelhouse_dir, offline=True)
+    make_wheel(wheelhouse.shared_dir, "pure", "py3-none-any")
+
+    target = tmp_path / "site"
+    result = subprocess.run(
+        [sys.executable, "-m", "pip", "install", "--disable-pip-version-check", "--target", str(target), "pure"],
+        env={**wheelhouse.build_env(ANDROID_TARGET), "PATH": ""},
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert (target / "pure-1.0.dist-info").is_dir()
+
+
+def test_desktop_wheels_target_the_embedded_python(tmp_path):
+    target = target_for(Platform.LINUX)
+    assert target.tag.endswith(f"-cp{EMBEDDED_PYTHON_VERSION.replace('.', '')}")
+    cmd = Wheelhouse(root=tmp_path).download_command(["pure"], target)
+    assert cmd[cmd.index("--python-version") + 1] == EMBEDDED_PYTHON_VERSION
+    assert "--only-binary=:all:" in cmd and "--platform" not in cmd